@@ -1,15 +1,72 @@
 import os
 
+from commons.mongo import close_mongo_db_client, reset_mongo_db_client
+from commons.tasks import DEAD_LETTER_QUEUE
+from kombu import Queue
+
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
 app = Celery("app")
 
+# Queues of satellite images pipeline stages, consumed by separate workers:
+# cpu bound extraction runs on prefork pool, i/o bound mongo and email
+# steps and cheap status updates run on thread pools.
+# Prefetch multiplier of a worker is the lowest one of queues it consumes,
+# --prefetch-multiplier is ignored by workers consuming them.
+# Errback of the pipeline is not routed, it runs in the worker of failed task.
+TASK_QUEUES = {
+    "satellite_images.cpu": {
+        "prefetch_multiplier": 1,
+        "acks_late": True,
+        "tasks": [
+            "satellite_images.tasks.generate_satellite_image_pyramid",
+            "satellite_images.tasks.process_satellite_image",
+            "satellite_images.tasks.run_satellite_image_pipeline",
+        ],
+    },
+    "satellite_images.io": {
+        "prefetch_multiplier": 16,
+        "acks_late": True,
+        "tasks": [
+            "satellite_images.tasks.save_satellite_image_data_to_mongo",
+            "satellite_images.tasks.buffer_satellite_image_data_to_mongo",
+            "satellite_images.tasks.send_email_notification",
+            "satellite_images.tasks.send_email_notification_digest",
+            "satellite_images.tasks.remove_satellite_image_file",
+        ],
+    },
+    "satellite_images.db": {
+        "prefetch_multiplier": 32,
+        "acks_late": True,
+        "tasks": [
+            "satellite_images.tasks.set_satellite_image_status",
+        ],
+    },
+}
+DEFAULT_QUEUE = "celery"
+
 # Optional configuration, see the application user guide.
 app.conf.update(
     result_expires=3600,
+    task_default_queue=DEFAULT_QUEUE,
+    task_queues=[
+        Queue(queue, routing_key=queue)
+        for queue in [DEFAULT_QUEUE, DEAD_LETTER_QUEUE, *TASK_QUEUES]
+    ],
+    task_routes={
+        task: {"queue": queue}
+        for queue, queue_config in TASK_QUEUES.items()
+        for task in queue_config["tasks"]
+    },
+    task_annotations={
+        task: {"acks_late": queue_config["acks_late"]}
+        for queue_config in TASK_QUEUES.values()
+        for task in queue_config["tasks"]
+    },
 )
 
 if __name__ == "__main__":
@@ -22,3 +79,27 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # prefork child must not reuse MongoClient created in parent
+    reset_mongo_db_client()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    close_mongo_db_client()
+
+
+@worker_init.connect
+def configure_worker_prefetch(sender=None, **kwargs):
+    # sent once --prefetch-multiplier was resolved, which it overrides,
+    # and consumed queues were selected, before consumer reads it
+    prefetch_multipliers = [
+        TASK_QUEUES[queue]["prefetch_multiplier"]
+        for queue in sender.app.amqp.queues.consume_from
+        if queue in TASK_QUEUES
+    ]
+    if prefetch_multipliers:
+        sender.prefetch_multiplier = min(prefetch_multipliers)
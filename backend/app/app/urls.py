@@ -14,10 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from commons.views import MetricsView
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("satellite_images.urls", "satellite_images")),
-]
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
+] + static(
+    f"{settings.MEDIA_URL}pyramids/", document_root=settings.MEDIA_ROOT / "pyramids"
+)
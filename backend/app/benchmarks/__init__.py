@@ -0,0 +1,47 @@
+"""
+Benchmarks are run from the `app` directory, e.g.
+`python -m benchmarks.listing`.
+They use a throwaway test database, the same way as `manage.py test`.
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def measure(func, repeat):
+    """
+    Run func `repeat` times, return median duration in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
@@ -0,0 +1,100 @@
+"""
+Latency and throughput of /api/satellite_images/ compared with its async
+variant /api/satellite_images/async/, for given latency of mongo.
+
+    python -m benchmarks.async_listing --mongo-latency 5 20 --concurrency 20
+
+Mongo is not queried, details lookups of both endpoints are replaced
+by a sleep of given milliseconds. List cache of sync endpoint is missed
+on every request, async endpoint has none. Throughput is measured with
+`--concurrency` requests sent at once to a single process,
+one after another for sync endpoint.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest import mock
+
+from benchmarks import measure, setup_django, test_database
+from benchmarks.listing import disable_list_cache, fill_table
+
+
+def run(rows, mongo_latencies, concurrency, repeat):
+    from asgiref.sync import async_to_sync
+    from django.contrib.auth.models import User
+    from django.test import AsyncClient, Client
+    from django.urls import reverse
+
+    user = User.objects.create(username="benchmark")
+    fill_table(user, rows)
+    sync_client = Client()
+    sync_client.force_login(user)
+    async_client = AsyncClient()
+    async_to_sync(async_client.aforce_login)(user)
+    sync_url = reverse("satellite_images:satellite_images-list")
+    async_url = reverse("satellite_images:satellite_images_async")
+
+    def sync_burst():
+        for _ in range(concurrency):
+            sync_client.get(sync_url)
+
+    @async_to_sync
+    async def measure_async_request(repeat):
+        # timed in one event loop, without cost of starting it
+        timings = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            await async_client.get(async_url)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        return statistics.median(timings)
+
+    @async_to_sync
+    async def async_burst():
+        await asyncio.gather(*(async_client.get(async_url) for _ in range(concurrency)))
+
+    print(
+        f"{'mongo ms':>9} {'sync ms':>8} {'async ms':>9}"
+        f" {'sync req/s':>11} {'async req/s':>12}"
+    )
+    for latency in mongo_latencies:
+        delay = latency / 1000
+
+        async def get_details(ids, projection=None):
+            await asyncio.sleep(delay)
+            return {}
+
+        with (
+            mock.patch(
+                "satellite_images.views.SatelliteImageViewSet._get_details",
+                side_effect=lambda ids: time.sleep(delay) or {},
+            ),
+            mock.patch("satellite_images.views.aget_details", get_details),
+            disable_list_cache(),
+        ):
+            sync_ms = measure(lambda: sync_client.get(sync_url), repeat)
+            async_ms = measure_async_request(repeat)
+            sync_rps = concurrency / measure(sync_burst, 3) * 1000
+            async_rps = concurrency / measure(async_burst, 3) * 1000
+        print(
+            f"{latency:>9} {sync_ms:>8.2f} {async_ms:>9.2f}"
+            f" {sync_rps:>11.1f} {async_rps:>12.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--mongo-latency", type=float, nargs="+", default=[0, 5, 20])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.rows, args.mongo_latency, args.concurrency, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Time of decoding exif tags already parsed by Pillow,
+previous per tag loop compared with precomputed tables of `satellite_images.exif`.
+
+    python -m benchmarks.exif_decoding --tags 10 100 250
+
+Synthetic exif gets given number (at most ~250) of known tags with int, rational,
+text and array values. Previous loop only handled IFD0 and crashed
+on binary values, so only values it can decode are generated.
+Both are measured in alternating rounds, so drift of machine load affects
+them alike, speedup is the median of speedups of rounds.
+"""
+
+import argparse
+import itertools
+import statistics
+
+from benchmarks import measure, setup_django
+
+POINTER_TAGS = {34665, 34853, 40965, 37500}
+
+
+def legacy_process_exifdata(exifdata):
+    from PIL.ExifTags import TAGS
+
+    result = {}
+    for tag_id in exifdata:
+        tag = TAGS.get(tag_id, tag_id)
+        data = exifdata.get(tag_id)
+        if isinstance(data, bytes):
+            data = data.decode()
+        result[tag] = str(data)
+    return result
+
+
+def build_tags(count):
+    from PIL.ExifTags import TAGS
+    from PIL.TiffImagePlugin import IFDRational
+
+    values = itertools.cycle(
+        [
+            7,
+            IFDRational(72, 1),
+            "benchmark",
+            (IFDRational(1, 3), IFDRational(5, 2), IFDRational(9, 4)),
+            b"0220",
+        ]
+    )
+    tag_ids = sorted(tag_id for tag_id in TAGS if tag_id not in POINTER_TAGS)
+    return {tag_id: next(values) for tag_id in tag_ids[:count]}
+
+
+def run(tag_counts, repeat, rounds):
+    from satellite_images.exif import IFD0_TAG_NAMES, decode_tags
+
+    print(f"{'tags':>6} {'legacy us':>10} {'tables us':>10} {'speedup':>8}")
+    for count in sorted(tag_counts):
+        tags = build_tags(count)
+        legacy, tables = [], []
+        for _ in range(rounds):
+            legacy.append(measure(lambda: legacy_process_exifdata(tags), repeat))
+            tables.append(measure(lambda: decode_tags(tags, IFD0_TAG_NAMES), repeat))
+        speedup = statistics.median(map(lambda a, b: a / b, legacy, tables))
+        print(
+            f"{count:>6} {statistics.median(legacy) * 1000:>10.1f}"
+            f" {statistics.median(tables) * 1000:>10.1f} {speedup:>7.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tags", type=int, nargs="+", default=[10, 100, 250])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.tags, args.repeat, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Memory and time of SatelliteImageProcessor metadata extraction
+depending on pixel count of the image.
+
+    python -m benchmarks.header_extraction --sizes 1024 4096 8192 16384
+
+Synthetic grayscale PNGs with exif are written row by row,
+so generating them does not need memory proportional to pixel count.
+Default sizes include 16384x16384, over decompression bomb limit of Pillow.
+Every measurement runs in a forked process, memory is its max RSS growth.
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue as queue_module
+import resource
+import struct
+import tempfile
+import time
+import zlib
+
+from benchmarks import setup_django
+
+IDAT_CHUNK_SIZE = 1024 * 1024
+MEASURE_TIMEOUT = 600
+
+
+def _write_chunk(fp, chunk_type, data):
+    fp.write(struct.pack(">I", len(data)))
+    fp.write(chunk_type)
+    fp.write(data)
+    fp.write(struct.pack(">I", zlib.crc32(chunk_type + data)))
+
+
+def write_png(path, size):
+    from PIL import Image
+
+    exif = Image.Exif()
+    exif[271] = "benchmark"
+    exif[272] = "synthetic"
+
+    row = bytes(size + 1)  # filter type byte + pixels
+    compressor = zlib.compressobj()
+    with open(path, "wb") as fp:
+        fp.write(b"\x89PNG\r\n\x1a\n")
+        _write_chunk(fp, b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 0, 0, 0, 0))
+        # png eXIf chunk holds exif without "Exif\0\0" prefix
+        _write_chunk(fp, b"eXIf", exif.tobytes()[6:])
+        idat = bytearray()
+        for _ in range(size):
+            idat += compressor.compress(row)
+            if len(idat) >= IDAT_CHUNK_SIZE:
+                _write_chunk(fp, b"IDAT", bytes(idat))
+                idat.clear()
+        idat += compressor.flush()
+        _write_chunk(fp, b"IDAT", bytes(idat))
+        _write_chunk(fp, b"IEND", b"")
+
+
+def _extract_header(path):
+    from satellite_images.tasks import SatelliteImageProcessor
+
+    processor = SatelliteImageProcessor(path, remove_after_processing=False)
+    processor.get_processed_satellite_image_data()
+
+
+def _full_decode(path):
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.load()
+
+
+def _measure_in_child(func, path, queue):
+    max_rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started_at = time.perf_counter()
+    func(path)
+    duration = (time.perf_counter() - started_at) * 1000
+    max_rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((duration, (max_rss_after - max_rss_before) / 1024))
+
+
+def measure(func, path):
+    """
+    Return duration in milliseconds and max RSS growth in MiB.
+    Raise RuntimeError when measured process fails or times out.
+    """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_measure_in_child, args=(func, path, queue))
+    process.start()
+    try:
+        result = queue.get(timeout=MEASURE_TIMEOUT)
+    except queue_module.Empty:
+        process.kill()
+        result = None
+    process.join()
+    if result is None or process.exitcode != 0:
+        raise RuntimeError(
+            f"{func.__name__} of {path} failed, exit code {process.exitcode}"
+        )
+    return result
+
+
+def run(sizes, with_decode):
+    header = f"{'pixels':>12} {'file MiB':>9} {'header ms':>10} {'header MiB':>11}"
+    if with_decode:
+        header += f" {'decode ms':>10} {'decode MiB':>11}"
+    print(header)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sorted(sizes):
+            path = os.path.join(directory, f"{size}.png")
+            write_png(path, size)
+            file_size = os.path.getsize(path) / 1024 / 1024
+
+            duration, memory = measure(_extract_header, path)
+            line = (
+                f"{size * size:>12} {file_size:>9.2f} {duration:>10.2f} {memory:>11.2f}"
+            )
+            if with_decode:
+                duration, memory = measure(_full_decode, path)
+                line += f" {duration:>10.2f} {memory:>11.2f}"
+            print(line)
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1024, 4096, 8192, 16384]
+    )
+    parser.add_argument(
+        "--with-decode",
+        action="store_true",
+        help="also measure full pixel decode for comparison",
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.sizes, args.with_decode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Latency of /api/satellite_images/ depending on size of SatelliteImage table.
+
+    python -m benchmarks.listing --rows 100 10000 1000000
+
+Mongo is not queried, `_get_details` is replaced and only records
+how many ids it was asked for. Pages are measured with list cache
+missing, then cached first page for comparison.
+"""
+
+import argparse
+from unittest import mock
+
+from benchmarks import measure, setup_django, test_database
+
+
+def fill_table(user, rows, batch_size=10000):
+    from satellite_images.models import SatelliteImage
+
+    current = SatelliteImage.objects.count()
+    while current < rows:
+        size = min(batch_size, rows - current)
+        SatelliteImage.objects.bulk_create(
+            SatelliteImage(title=f"img_{current + i}.png", uploader=user)
+            for i in range(size)
+        )
+        current += size
+
+
+def disable_list_cache():
+    """
+    Every page is a cache miss, pages are still written to the cache.
+    """
+    from satellite_images.caches import list_cache
+
+    return mock.patch.object(list_cache, "get", return_value=None)
+
+
+def run(rows_list, repeat):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from satellite_images.models import SatelliteImage
+
+    user = User.objects.create(username="benchmark")
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse("satellite_images:satellite_images-list")
+
+    print(
+        f"{'rows':>10} {'first page ms':>14} {'next page ms':>13}"
+        f" {'cached page ms':>15} {'mongo ids':>10}"
+    )
+    requested_ids = []
+    with mock.patch(
+        "satellite_images.views.SatelliteImageViewSet._get_details",
+        side_effect=lambda ids: requested_ids.append(len(ids)) or {},
+    ):
+        for rows in sorted(rows_list):
+            fill_table(user, rows)
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {SatelliteImage._meta.db_table}")
+
+            with disable_list_cache():
+                next_url = client.get(url).data["next"]
+                first_page = measure(lambda: client.get(url), repeat)
+                next_page = measure(lambda: client.get(next_url), repeat)
+                mongo_ids = requested_ids[-1]
+            cached_page = measure(lambda: client.get(url), repeat)
+            print(
+                f"{rows:>10} {first_page:>14.2f} {next_page:>13.2f}"
+                f" {cached_page:>15.2f} {mongo_ids:>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Throughput of processing pipeline in "split" and "fused" modes.
+
+    python -m benchmarks.pipeline_modes --images 200
+
+Pipelines run on an in-process solo celery worker with in-memory broker
+and result backend, so numbers show task overhead rather than network
+latency of a real broker. Mongo is replaced by a mock, emails are kept
+in memory and previews are disabled. Images are small, the work
+of each step is cheaper than passing it between tasks.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks import setup_django, test_database
+
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "satellite_images", "tests", "fixtures", "pic.jpg"
+)
+
+
+def configure_celery():
+    from app.celery import app
+
+    # configuration is loaded from django settings, keys use CELERY_ namespace
+    app.conf.update(
+        CELERY_BROKER_URL="memory://",
+        CELERY_RESULT_BACKEND="cache+memory://",
+        CELERY_BROKER_TRANSPORT_OPTIONS={"polling_interval": 0.001},
+    )
+    return app
+
+
+def run_mode(mode, images_count, user, directory):
+    from commons.models import StatusEnum
+    from django.test import override_settings
+    from satellite_images.models import SatelliteImage
+    from satellite_images.services import SatelliteImageService
+
+    satellite_images = []
+    for index in range(images_count):
+        image_path = os.path.join(directory, f"{mode}_{index}.jpg")
+        shutil.copyfile(FIXTURE_PATH, image_path)
+        satellite_images.append(
+            SatelliteImage.objects.create(
+                title=os.path.basename(image_path), uploader=user, image=image_path
+            )
+        )
+
+    with override_settings(SATELLITE_IMAGES_PIPELINE_MODE=mode):
+        started_at = time.perf_counter()
+        for satellite_image in satellite_images:
+            SatelliteImageService(
+                satellite_image.id,
+                satellite_image.image.name,
+                satellite_image.title,
+                user.email,
+            ).handle_service()
+
+        # images are PROCESSING since extraction starts, until finalized
+        ids = [satellite_image.id for satellite_image in satellite_images]
+        while SatelliteImage.objects.filter(
+            id__in=ids, status__in=SatelliteImage.ACTIVE_STATUSES
+        ).exists():
+            time.sleep(0.005)
+        duration = time.perf_counter() - started_at
+
+    failed = SatelliteImage.objects.filter(
+        id__in=ids, status=StatusEnum.FAILED.value
+    ).count()
+    return images_count / duration, failed
+
+
+def run(modes, images_count):
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+
+    from celery.contrib.testing.worker import start_worker
+
+    app = configure_celery()
+    user = User.objects.create(username="benchmark", email="benchmark@example.com")
+
+    print(f"{'mode':>6} {'images/s':>9} {'failed':>7}")
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        override_settings(
+            SATELLITE_IMAGES_PYRAMID_SIZES=[], SATELLITE_IMAGES_MONGO_BATCH_SIZE=1
+        ),
+        mock.patch("satellite_images.tasks.get_mongo_db_client"),
+        mock.patch("satellite_images.caches.get_details_collection"),
+        start_worker(app, pool="solo", perform_ping_check=False, shutdown_timeout=30),
+    ):
+        for mode in modes:
+            throughput, failed = run_mode(mode, images_count, user, directory)
+            print(f"{mode:>6} {throughput:>9.1f} {failed:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument(
+        "--modes", nargs="+", default=["split", "fused"], choices=["split", "fused"]
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.modes, args.images)
+
+
+if __name__ == "__main__":
+    main()
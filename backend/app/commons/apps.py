@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "commons"
+
+    def ready(self):
+        from .metrics import register_metric
+        from .mongo import pool_metrics
+
+        register_metric("mongo_pool", pool_metrics.snapshot)
@@ -0,0 +1,48 @@
+import threading
+
+
+class TimedBatchBuffer:
+    """
+    Thread-safe buffer of items flushed to `flush_callback` in one batch
+    when it holds `max_size` items or its oldest item waits `max_age` seconds.
+    Buffer lives in memory of a single process.
+    """
+
+    def __init__(self, flush_callback, max_size, max_age):
+        self.flush_callback = flush_callback
+        self.max_size = max_size
+        self.max_age = max_age
+        self._items = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _take_items(self):
+        items, self._items = self._items, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return items
+
+    def add(self, item):
+        batch = None
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) >= self.max_size:
+                batch = self._take_items()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_age, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if batch:
+            self.flush_callback(batch)
+
+    def flush(self):
+        with self._lock:
+            batch = self._take_items()
+
+        if batch:
+            self.flush_callback(batch)
@@ -0,0 +1,60 @@
+import functools
+import os
+import threading
+from smtplib import SMTPException
+
+from django.core.mail import get_connection
+from django.template.loader import get_template
+
+
+@functools.cache
+def get_cached_template(template_name):
+    """
+    Template is looked up and compiled once per process.
+    """
+    return get_template(template_name)
+
+
+class PooledMailConnection:
+    """
+    Mail connection opened once and reused for every message sent
+    by the process. Broken connection is reopened once per send.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # connection of parent process must not be shared after fork
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = get_connection()
+            self._connection.open()
+        return self._connection
+
+    def send_messages(self, messages):
+        with self._lock:
+            try:
+                return self._get_connection().send_messages(messages)
+            except (SMTPException, OSError):
+                self._close()
+                return self._get_connection().send_messages(messages)
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+mail_connection = PooledMailConnection()
+
+os.register_at_fork(after_in_child=mail_connection.reset)
@@ -0,0 +1,12 @@
+_collectors = {}
+
+
+def register_metric(name, collector):
+    """
+    Register callable returning JSON serializable value of metric.
+    """
+    _collectors[name] = collector
+
+
+def collect_metrics():
+    return {name: collector() for name, collector in _collectors.items()}
@@ -2,6 +2,7 @@ import uuid
 from enum import Enum
 
 from django.db import models
+from django.utils import timezone
 
 
 class StatusEnum(Enum):
@@ -33,12 +34,51 @@ class ProcessedModel(models.Model):
         default=StatusEnum.PENDING.value,
     )
 
-    def set_status(self, new_status):
-        all_possible_values = [status.value for status in StatusEnum]
-        if new_status not in all_possible_values:
+    # statuses from which each status can be reached, reaching current
+    # status again is allowed, so retried transitions are no-ops
+    STATUS_TRANSITIONS = {
+        StatusEnum.PENDING.value: [StatusEnum.PENDING.value, StatusEnum.FAILED.value],
+        StatusEnum.PROCESSING.value: [
+            StatusEnum.PENDING.value,
+            StatusEnum.PROCESSING.value,
+        ],
+        StatusEnum.COMPLETED.value: [
+            StatusEnum.PENDING.value,
+            StatusEnum.PROCESSING.value,
+            StatusEnum.COMPLETED.value,
+        ],
+        StatusEnum.FAILED.value: [
+            StatusEnum.PENDING.value,
+            StatusEnum.PROCESSING.value,
+            StatusEnum.FAILED.value,
+        ],
+    }
+
+    @classmethod
+    def transition_status(cls, ids, new_status, **fields):
+        """
+        Move objects to new status with one conditional UPDATE, objects
+        in statuses new status can't be reached from are left untouched.
+        Other fields can be updated by the same statement.
+        Return number of objects in new status.
+        """
+        if new_status not in cls.STATUS_TRANSITIONS:
             raise ValueError(f"Invalid status: {new_status}")
-        self.status = new_status
-        self.save()
+        # queryset update skips auto_now fields
+        if issubclass(cls, TimestampedModel):
+            fields.setdefault("updated_at", timezone.now())
+        return cls.objects.filter(
+            id__in=ids, status__in=cls.STATUS_TRANSITIONS[new_status]
+        ).update(status=new_status, **fields)
+
+    def set_status(self, new_status):
+        """
+        Return whether status was changed, object is not saved.
+        """
+        changed = type(self).transition_status([self.pk], new_status)
+        if changed:
+            self.status = new_status
+        return bool(changed)
 
     class Meta:
         abstract = True
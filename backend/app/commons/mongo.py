@@ -1,20 +1,161 @@
+import asyncio
 import os
+import threading
+import weakref
 
-from dotenv import load_dotenv
-from pymongo import MongoClient
+from django.conf import settings
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, monitoring
+
+
+class MongoConnectionPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Track usage of MongoClient connection pool in current process.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # lock is recreated, it could be held by another thread while forking
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.open = 0
+        self.check_out_failures = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checked_out": self.checked_out,
+                "open": self.open,
+                "check_out_failures": self.check_out_failures,
+                "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+            }
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.check_out_failures += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+pool_metrics = MongoConnectionPoolMetrics()
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+# motor clients by event loop they are used in, a client can't be shared by loops
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _get_client_options():
+    return {
+        "host": settings.MONGO_HOST,
+        "port": settings.MONGO_PORT,
+        "username": settings.MONGO_USER,
+        "password": settings.MONGO_PASSWORD,
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "event_listeners": [pool_metrics],
+    }
+
+
+def _create_mongo_db_client():
+    return MongoClient(**_get_client_options())
 
 
 def get_mongo_db_client():
-    load_dotenv()
-    MONGO_HOST = os.environ.get("MONGO_HOST")
-    MONGO_PORT = os.environ.get("MONGO_PORT")
-    MONGO_USER = os.environ.get("MONGO_USER")
-    MONGO_PASSWORD = os.environ.get("MONGO_PASSWORD")
-
-    client = MongoClient(
-        host=MONGO_HOST,
-        port=int(MONGO_PORT),
-        username=MONGO_USER,
-        password=MONGO_PASSWORD,
-    )
+    """
+    Return MongoClient shared by the whole process.
+    Client is created lazily and rebuilt when process was forked,
+    MongoClient is not fork-safe. Do not close returned client.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                pool_metrics.reset()
+                _client = _create_mongo_db_client()
+                _client_pid = pid
+    return _client
+
+
+def get_async_mongo_db_client():
+    """
+    Return motor client shared by coroutines of the running event loop,
+    e.g. of ASGI server process. Do not close returned client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncIOMotorClient(
+            io_loop=loop, **_get_client_options()
+        )
     return client
+
+
+def reset_mongo_db_client():
+    """
+    Forget client inherited from parent process without closing it,
+    closing would affect sockets still used by the parent.
+    """
+    global _client, _client_pid, _client_lock
+
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    _async_clients.clear()
+    pool_metrics.reset()
+
+
+def close_mongo_db_client():
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+os.register_at_fork(after_in_child=reset_mongo_db_client)
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from kombu import Connection, Exchange, Queue
+from kombu.mixins import ConsumerMixin
+from kombu.pools import producers
+
+from celery import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Messages of subscribed channels, consumed in event loop of subscriber.
+    Messages can be put from any thread. When subscriber falls behind
+    by `max_size` messages, new ones are dropped.
+    """
+
+    def __init__(self, pubsub, channels, max_size):
+        self.pubsub = pubsub
+        self.channels = frozenset(channels)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(max_size)
+
+    def _put_nowait(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning(f"Subscriber of {len(self.channels)} channels is full")
+
+    def put(self, message):
+        self._loop.call_soon_threadsafe(self._put_nowait, message)
+
+    async def get(self, timeout=None):
+        """
+        Return next message, None when none came in `timeout` seconds.
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.pubsub.unsubscribe(self)
+
+
+class LocalPubSub:
+    """
+    Fan out messages to subscribers of channels in the same process,
+    e.g. from views and eagerly run tasks to streaming views.
+    """
+
+    subscription_max_size = 1000
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def subscribe(self, channels):
+        """
+        Return subscription of channels, must be called from event loop
+        which consumes it. Subscription is closed by its consumer.
+        """
+        subscription = Subscription(self, channels, self.subscription_max_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[channel]
+
+
+class _BrokerRelay(ConsumerMixin):
+    """
+    Consume messages of fanout exchange and deliver them locally.
+    ConsumerMixin reconnects on connection errors, messages sent
+    while disconnected are lost.
+    """
+
+    def __init__(self, connection, queue, deliver):
+        self.connection = connection
+        self.queue = queue
+        self.deliver = deliver
+        # set once queue is declared and consumed
+        self.ready = threading.Event()
+
+    def get_consumers(self, Consumer, channel):
+        return [
+            Consumer(queues=[self.queue], callbacks=[self.on_message], accept=["json"])
+        ]
+
+    def on_consume_ready(self, connection, channel, consumers, **kwargs):
+        self.ready.set()
+
+    def on_message(self, body, message):
+        self.deliver(body["channel"], body["message"])
+        message.ack()
+
+
+class KombuPubSub(LocalPubSub):
+    """
+    Fan out messages to subscribers in every process, through fanout
+    exchange of celery broker, so messages published by workers reach
+    streaming views. Every subscribing process consumes its own exclusive
+    queue in a daemon thread, started with its first subscription.
+    """
+
+    exchange = Exchange("pubsub", type="fanout", durable=False)
+
+    def __init__(self, broker_url=None):
+        super().__init__()
+        self.broker_url = broker_url
+        self._relay = None
+
+    def _get_connection(self):
+        if self.broker_url:
+            return Connection(self.broker_url)
+        return current_app.connection_for_write()
+
+    def publish(self, channel, message):
+        # producers and their connections are pooled per broker
+        with producers[self._get_connection()].acquire(block=True) as producer:
+            producer.publish(
+                {"channel": channel, "message": message},
+                exchange=self.exchange,
+                serializer="json",
+                declare=[self.exchange],
+                retry=True,
+            )
+
+    def _start_relay(self):
+        with self._lock:
+            if self._relay is not None:
+                return
+            queue = Queue(
+                f"pubsub.{uuid.uuid4()}",
+                self.exchange,
+                exclusive=True,
+                auto_delete=True,
+            )
+            self._relay = _BrokerRelay(self._get_connection(), queue, self._deliver)
+        threading.Thread(target=self._relay.run, name="pubsub", daemon=True).start()
+
+    def subscribe(self, channels):
+        self._start_relay()
+        return super().subscribe(channels)
+
+
+_pubsub = None
+
+
+def get_pubsub():
+    """
+    Return pubsub of the process, of class given by PUBSUB_BACKEND setting.
+    """
+    global _pubsub
+
+    if _pubsub is None:
+        _pubsub = import_string(settings.PUBSUB_BACKEND)()
+    return _pubsub
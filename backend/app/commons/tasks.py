@@ -0,0 +1,59 @@
+import logging
+
+from celery import Task
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_QUEUE = "dead_letter"
+
+
+class RetryingTask(Task):
+    """
+    Task retried on exceptions listed in its `autoretry_for`,
+    with exponential backoff and full jitter, at most `max_retries` times.
+    Task still failing on a retried error after the last retry is sent
+    to DEAD_LETTER_QUEUE with its arguments, chain and errbacks, other
+    errors are not. No worker consumes that queue, a worker started
+    with `-Q dead_letter` replays the jobs once the cause is fixed.
+    Replayed task failing again is not sent back.
+    """
+
+    autoretry_for = ()
+    dont_autoretry_for = ()
+    retry_backoff = 2
+    retry_backoff_max = 10 * 60
+    retry_jitter = True
+    max_retries = 5
+    dead_letter_queue = DEAD_LETTER_QUEUE
+
+    def _is_replayed(self, request):
+        delivery_info = request.delivery_info or {}
+        return delivery_info.get("routing_key") == self.dead_letter_queue
+
+    def is_dead_lettered(self, exc, request):
+        """
+        Return whether failure of task with given request is sent to
+        DEAD_LETTER_QUEUE, i.e. it failed on a retried error after
+        the last retry. Errbacks can leave such jobs unfinished.
+        """
+        if request.called_directly or self._is_replayed(request):
+            return False
+        return (
+            isinstance(exc, self.autoretry_for)
+            and not isinstance(exc, self.dont_autoretry_for)
+            and self.max_retries is not None
+            and request.retries >= self.max_retries
+        )
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        if self._is_replayed(self.request):
+            logger.error(f"Replayed task {self.name} {task_id} failed again: {exc}")
+            return
+        if not self.is_dead_lettered(exc, self.request):
+            return
+
+        logger.error(f"Task {self.name} {task_id} sent to dead letter queue: {exc}")
+        signature = self.signature_from_request(
+            args=args, kwargs=kwargs, queue=self.dead_letter_queue, retries=0
+        )
+        signature.apply_async()
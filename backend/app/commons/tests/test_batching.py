@@ -0,0 +1,35 @@
+from unittest import mock
+
+from commons.batching import TimedBatchBuffer
+from django.test import SimpleTestCase
+
+
+class TestTimedBatchBuffer(SimpleTestCase):
+    def test_flushed_when_max_size_is_reached(self):
+        callback = mock.Mock()
+        buffer = TimedBatchBuffer(callback, max_size=3, max_age=60)
+
+        buffer.add(1)
+        buffer.add(2)
+        callback.assert_not_called()
+
+        buffer.add(3)
+        callback.assert_called_once_with([1, 2, 3])
+        self.assertEqual(len(buffer), 0)
+
+    def test_flushed_when_max_age_is_reached(self):
+        callback = mock.Mock()
+        buffer = TimedBatchBuffer(callback, max_size=100, max_age=0.01)
+
+        buffer.add(1)
+        buffer._timer.join()
+
+        callback.assert_called_once_with([1])
+
+    def test_flush_of_empty_buffer_does_nothing(self):
+        callback = mock.Mock()
+        buffer = TimedBatchBuffer(callback, max_size=3, max_age=60)
+
+        buffer.flush()
+
+        callback.assert_not_called()
@@ -0,0 +1,29 @@
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from commons.mail import PooledMailConnection
+from django.test import SimpleTestCase
+
+
+@mock.patch("commons.mail.get_connection")
+class TestPooledMailConnection(SimpleTestCase):
+    def test_connection_is_opened_once(self, mock_get_connection):
+        connection = PooledMailConnection()
+
+        connection.send_messages(["first"])
+        connection.send_messages(["second"])
+
+        mock_get_connection.assert_called_once()
+        mock_get_connection.return_value.open.assert_called_once()
+        self.assertEqual(mock_get_connection.return_value.send_messages.call_count, 2)
+
+    def test_broken_connection_is_reopened(self, mock_get_connection):
+        broken, working = mock.Mock(), mock.Mock()
+        broken.send_messages.side_effect = SMTPServerDisconnected()
+        mock_get_connection.side_effect = [broken, working]
+        connection = PooledMailConnection()
+
+        connection.send_messages(["message"])
+
+        broken.close.assert_called_once()
+        working.send_messages.assert_called_once_with(["message"])
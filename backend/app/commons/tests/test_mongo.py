@@ -0,0 +1,53 @@
+from unittest import mock
+
+from commons import mongo
+from django.test import SimpleTestCase, override_settings
+
+
+@mock.patch("commons.mongo.MongoClient")
+class TestGetMongoDbClient(SimpleTestCase):
+    def setUp(self):
+        mongo.reset_mongo_db_client()
+
+    def tearDown(self):
+        mongo.reset_mongo_db_client()
+
+    def test_client_is_reused_in_process(self, mock_client):
+        first = mongo.get_mongo_db_client()
+        second = mongo.get_mongo_db_client()
+
+        self.assertIs(first, second)
+        mock_client.assert_called_once()
+
+    @override_settings(MONGO_MAX_POOL_SIZE=7, MONGO_READ_PREFERENCE="secondary")
+    def test_client_is_configured_from_settings(self, mock_client):
+        mongo.get_mongo_db_client()
+
+        kwargs = mock_client.call_args.kwargs
+        self.assertEqual(kwargs["maxPoolSize"], 7)
+        self.assertEqual(kwargs["readPreference"], "secondary")
+        self.assertEqual(kwargs["event_listeners"], [mongo.pool_metrics])
+
+    def test_client_is_rebuilt_after_fork(self, mock_client):
+        mock_client.side_effect = [mock.Mock(), mock.Mock()]
+        parent_client = mongo.get_mongo_db_client()
+
+        with mock.patch("commons.mongo.os.getpid", return_value=-1):
+            child_client = mongo.get_mongo_db_client()
+
+        self.assertIsNot(parent_client, child_client)
+        parent_client.close.assert_not_called()
+
+
+class TestMongoConnectionPoolMetrics(SimpleTestCase):
+    def test_checked_out_connections_are_counted(self):
+        metrics = mongo.MongoConnectionPoolMetrics()
+
+        metrics.connection_created(None)
+        metrics.connection_checked_out(None)
+        metrics.connection_checked_out(None)
+        metrics.connection_checked_in(None)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["checked_out"], 1)
+        self.assertEqual(snapshot["open"], 1)
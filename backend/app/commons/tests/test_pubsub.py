@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+from commons.pubsub import KombuPubSub, LocalPubSub
+from django.test import SimpleTestCase
+
+
+class TestLocalPubSub(SimpleTestCase):
+    async def test_messages_are_fanned_out_to_subscribers_of_channel(self):
+        pubsub = LocalPubSub()
+        first = pubsub.subscribe(["a", "b"])
+        second = pubsub.subscribe(["a"])
+
+        pubsub.publish("a", {"value": 1})
+        pubsub.publish("b", {"value": 2})
+        pubsub.publish("c", {"value": 3})
+
+        self.assertEqual(await first.get(1), {"value": 1})
+        self.assertEqual(await first.get(1), {"value": 2})
+        self.assertEqual(await second.get(1), {"value": 1})
+        self.assertIsNone(await second.get(0.01))
+
+    async def test_messages_are_published_from_other_threads(self):
+        pubsub = LocalPubSub()
+        subscription = pubsub.subscribe(["a"])
+
+        thread = threading.Thread(target=pubsub.publish, args=("a", {"value": 1}))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await subscription.get(1), {"value": 1})
+
+    async def test_closed_subscription_gets_nothing(self):
+        pubsub = LocalPubSub()
+        subscription = pubsub.subscribe(["a"])
+
+        subscription.close()
+        pubsub.publish("a", {"value": 1})
+
+        self.assertIsNone(await subscription.get(0.01))
+        self.assertEqual(pubsub._subscriptions, {})
+
+    async def test_full_subscription_drops_new_messages(self):
+        pubsub = LocalPubSub()
+        pubsub.subscription_max_size = 1
+        subscription = pubsub.subscribe(["a"])
+
+        with self.assertLogs("commons.pubsub", "WARNING"):
+            pubsub.publish("a", {"value": 1})
+            pubsub.publish("a", {"value": 2})
+            await asyncio.sleep(0)
+
+        self.assertEqual(await subscription.get(1), {"value": 1})
+        self.assertIsNone(await subscription.get(0.01))
+
+
+class TestKombuPubSub(SimpleTestCase):
+    async def test_messages_are_relayed_through_broker(self):
+        # in-memory transport stands in for the broker
+        publisher = KombuPubSub("memory://")
+        subscriber = KombuPubSub("memory://")
+        subscription = subscriber.subscribe(["a"])
+        # relay declares its queue in background thread
+        await asyncio.to_thread(subscriber._relay.ready.wait, 5)
+        self.addCleanup(setattr, subscriber._relay, "should_stop", True)
+
+        publisher.publish("a", {"value": 1})
+
+        self.assertEqual(await subscription.get(5), {"value": 1})
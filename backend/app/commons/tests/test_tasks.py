@@ -0,0 +1,71 @@
+from unittest import mock
+
+from commons.tasks import DEAD_LETTER_QUEUE, RetryingTask
+from django.test import SimpleTestCase
+
+from celery import shared_task
+
+
+@shared_task(base=RetryingTask, autoretry_for=(ConnectionError,), max_retries=2)
+def flaky_task(value):
+    raise ConnectionError(value)
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=(OSError,),
+    dont_autoretry_for=(FileNotFoundError,),
+    max_retries=2,
+)
+def failing_task(exc):
+    raise exc
+
+
+@mock.patch("celery.canvas.Signature.apply_async", autospec=True)
+class TestRetryingTask(SimpleTestCase):
+    def test_task_failing_after_retries_is_dead_lettered(self, mock_apply_async):
+        result = flaky_task.apply(args=("down",), task_id="task-id")
+
+        self.assertIsInstance(result.result, ConnectionError)
+        mock_apply_async.assert_called_once()
+        signature = mock_apply_async.call_args.args[0]
+        self.assertEqual(signature.task, flaky_task.name)
+        self.assertEqual(signature.args, ("down",))
+        self.assertEqual(signature.options["queue"], DEAD_LETTER_QUEUE)
+        self.assertEqual(signature.options["task_id"], "task-id")
+        self.assertEqual(signature.options["retries"], 0)
+
+    def test_replayed_task_is_not_dead_lettered_again(self, mock_apply_async):
+        flaky_task.apply(
+            args=("down",),
+            retries=flaky_task.max_retries,
+            routing_key=DEAD_LETTER_QUEUE,
+        )
+
+        mock_apply_async.assert_not_called()
+
+    def test_called_directly_is_not_dead_lettered(self, mock_apply_async):
+        with self.assertRaises(ConnectionError):
+            flaky_task("down")
+
+        mock_apply_async.assert_not_called()
+
+    def test_not_retried_errors_are_not_dead_lettered(self, mock_apply_async):
+        for exc in [FileNotFoundError("missing"), ValueError("broken")]:
+            with self.subTest(exc=exc):
+                result = failing_task.apply(args=(exc,))
+
+                self.assertIs(result.result, exc)
+                mock_apply_async.assert_not_called()
+
+    def test_is_dead_lettered(self, mock_apply_async):
+        request = mock.Mock(
+            called_directly=False,
+            delivery_info={"routing_key": "default"},
+            retries=failing_task.max_retries,
+        )
+
+        self.assertTrue(failing_task.is_dead_lettered(OSError(), request))
+        self.assertFalse(failing_task.is_dead_lettered(FileNotFoundError(), request))
+        request.retries -= 1
+        self.assertFalse(failing_task.is_dead_lettered(OSError(), request))
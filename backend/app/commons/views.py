@@ -0,0 +1,16 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .metrics import collect_metrics
+
+
+class MetricsView(APIView):
+    """
+    Expose process metrics of Django worker serving the request.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(collect_metrics())
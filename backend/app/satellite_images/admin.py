@@ -1,24 +1,106 @@
+from functools import partial
+
+from commons.models import StatusEnum
+from django import forms
 from django.contrib import admin
 from django.db import transaction
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
 
-from .models import SatelliteImage
+from .caches import list_cache
+from .events import publish_status
+from .hashing import get_content_hash
+from .models import SatelliteImage, SatelliteImageBatch
+from .scheduling import fair_share_scheduler
 from .services import SatelliteImageService
+from .uploadhandlers import (
+    StoredUploadedFile,
+    StreamingImageUploadHandler,
+    delete_stored_uploads,
+    get_stored_uploads,
+    validate_image_format,
+)
+
+
+class SatelliteImageAdminForm(forms.ModelForm):
+    def clean_image(self):
+        image = self.cleaned_data["image"]
+        if "image" in self.changed_data:
+            validate_image_format(image)
+        return image
 
 
 @admin.register(SatelliteImage)
 class SatelliteImageAdmin(admin.ModelAdmin):
-    readonly_fields = ["image", "title", "uploader", "status"]
-    list_display = ("id", "title", "uploader", "created_at", "status")
+    form = SatelliteImageAdminForm
+    readonly_fields = [
+        "image",
+        "title",
+        "uploader",
+        "status",
+        "content_hash",
+        "priority",
+    ]
+    list_display = ("id", "title", "uploader", "created_at", "status", "priority")
     search_fields = [
         "uploader__username",
         "title",
     ]
     ordering = ["-created_at"]
+    actions = ["mark_as_failed"]
+
+    @admin.action(description="Mark selected images as failed")
+    def mark_as_failed(self, request, queryset):
+        """
+        Give up on selected images in one UPDATE, completed ones are skipped.
+        Streams of changed images get their final status.
+        """
+        failed = StatusEnum.FAILED.value
+        ids = list(
+            queryset.filter(
+                status__in=SatelliteImage.STATUS_TRANSITIONS[failed]
+            ).values_list("id", flat=True)
+        )
+        changed = SatelliteImage.transition_status(
+            ids, failed, finalized_at=timezone.now()
+        )
+        if changed:
+            list_cache.invalidate()
+            # images completed since ids were selected are not failed
+            for satellite_image_id in SatelliteImage.objects.filter(
+                id__in=ids, status=failed
+            ).values_list("id", flat=True):
+                transaction.on_commit(
+                    partial(publish_status, satellite_image_id, failed)
+                )
+        self.message_user(request, f"{changed} images marked as failed.")
+
+    @csrf_exempt
+    def add_view(self, request, form_url="", extra_context=None):
+        """
+        Stream uploaded image to storage only for users allowed to add images,
+        CSRF is still checked by changeform_view once handler is installed.
+        Streamed files are deleted when the image is not created.
+        """
+        if request.method != "POST" or not self.has_add_permission(request):
+            return super().add_view(request, form_url, extra_context)
+
+        request.upload_handlers.insert(0, StreamingImageUploadHandler(request))
+        try:
+            return super().add_view(request, form_url, extra_context)
+        finally:
+            stored_names = [
+                upload.stored_name for upload in get_stored_uploads(request.FILES)
+            ]
+            saved = SatelliteImage.objects.filter(image__in=stored_names)
+            delete_stored_uploads(
+                request.FILES, keep=set(saved.values_list("image", flat=True))
+            )
 
     def get_readonly_fields(self, request, obj=None):
         if obj:
             return self.readonly_fields
-        return ["title", "uploader", "status"]
+        return ["title", "uploader", "status", "content_hash"]
 
     def save_model(self, request, obj, form, change):
         """
@@ -27,11 +109,31 @@ class SatelliteImageAdmin(admin.ModelAdmin):
         if not change:
             obj.title = form.files["image"].name
             obj.uploader = request.user
+            obj.content_hash = get_content_hash(form.files["image"])
+            if isinstance(form.files["image"], StoredUploadedFile):
+                # file was streamed to storage during upload, do not copy it
+                obj.image = form.files["image"].stored_name
 
         super().save_model(request, obj, form, change)
         if not change:
             image_path = obj.image.path
+            [priority] = fair_share_scheduler.get_priorities(
+                obj.uploader.id, 1, obj.priority
+            )
             service = SatelliteImageService(
-                obj.id, image_path, obj.title, obj.uploader.email
+                obj.id,
+                image_path,
+                obj.title,
+                obj.uploader.email,
+                obj.content_hash,
+                priority,
             )
             transaction.on_commit(service.handle_service)
+
+
+@admin.register(SatelliteImageBatch)
+class SatelliteImageBatchAdmin(admin.ModelAdmin):
+    readonly_fields = ["uploader"]
+    list_display = ("id", "uploader", "created_at")
+    search_fields = ["uploader__username"]
+    ordering = ["-created_at"]
@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class SatelliteImagesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "satellite_images"
+
+    def ready(self):
+        from commons.metrics import register_metric
+        from PIL import Image
+
+        # satellite frames are over ~179M px limit of Pillow, which rejects
+        # them as decompression bombs already on open. Uploads come from
+        # authenticated users, metadata is read from headers only and
+        # decoding previews is limited by SATELLITE_IMAGES_PREVIEW_MAX_PIXELS.
+        Image.MAX_IMAGE_PIXELS = None
+
+        from . import checks  # noqa: F401
+        from .caches import metadata_cache
+        from .scheduling import fair_share_scheduler
+
+        register_metric("satellite_image_metadata_cache", metadata_cache.get_stats)
+        register_metric(
+            "satellite_image_queue_depth", fair_share_scheduler.get_queue_depths
+        )
@@ -0,0 +1,70 @@
+import os
+import tarfile
+import zipfile
+
+ALLOWED_IMAGE_EXTENSIONS = ("jpg", "png", "jpeg", "tif", "tiff")
+
+
+def is_allowed_image_name(name):
+    extension = os.path.splitext(name)[1].lstrip(".").lower()
+    return extension in ALLOWED_IMAGE_EXTENSIONS
+
+
+def get_archive_size(archive, max_members):
+    """
+    Return number and total uncompressed size of images inside zip or tar
+    archive, read from member headers without extracting them.
+    Counting stops once there are more than `max_members` images.
+    """
+    members = 0
+    size = 0
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zip_file:
+            for member in zip_file.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not is_allowed_image_name(name):
+                    continue
+                members += 1
+                # zip extraction never reads past declared file_size
+                size += member.file_size
+                if members > max_members:
+                    break
+        return members, size
+
+    archive.seek(0)
+    with tarfile.open(fileobj=archive, mode="r:*") as tar_file:
+        for member in tar_file:
+            name = os.path.basename(member.name)
+            if not member.isfile() or not is_allowed_image_name(name):
+                continue
+            members += 1
+            size += member.size
+            if members > max_members:
+                break
+    return members, size
+
+
+def iter_archive_images(archive):
+    """
+    Yield (name, file object) of every image inside zip or tar archive.
+    Members are read one by one, directories in names are dropped.
+    """
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zip_file:
+            for member in zip_file.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not is_allowed_image_name(name):
+                    continue
+                with zip_file.open(member) as content:
+                    yield name, content
+        return
+
+    archive.seek(0)
+    with tarfile.open(fileobj=archive, mode="r:*") as tar_file:
+        for member in tar_file:
+            name = os.path.basename(member.name)
+            if not member.isfile() or not is_allowed_image_name(name):
+                continue
+            yield name, tar_file.extractfile(member)
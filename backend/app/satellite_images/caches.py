@@ -0,0 +1,142 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.http import quote_etag
+
+from .models import SatelliteImage
+from .mongo import get_details_collection
+
+
+class SatelliteImageMetadataCache:
+    """
+    Map content hash of an image to metadata extracted from it.
+    On cache miss falls back to mongo details of an already processed
+    image with the same content hash. Hits and misses are counted,
+    counters are approximate, increments are not atomic on file cache
+    and counters are culled with other entries.
+    """
+
+    KEY_PREFIX = "satellite_images:metadata"
+    HITS_KEY = f"{KEY_PREFIX}:hits"
+    MISSES_KEY = f"{KEY_PREFIX}:misses"
+    # keys stored next to metadata in mongo details, not a part of metadata
+    DETAILS_ONLY_KEYS = ("_id", "satellite_image_id", "content_hash")
+
+    @property
+    def cache(self):
+        return caches[settings.SATELLITE_IMAGES_METADATA_CACHE]
+
+    def _get_key(self, content_hash):
+        return f"{self.KEY_PREFIX}:{content_hash}"
+
+    def _increment(self, key):
+        self.cache.add(key, 0, timeout=None)
+        self.cache.incr(key)
+
+    def _get_from_mongo(self, content_hash):
+        return get_details_collection().find_one(
+            {"content_hash": content_hash},
+            {key: False for key in self.DETAILS_ONLY_KEYS},
+        )
+
+    def get(self, content_hash):
+        if not content_hash:
+            return None
+
+        data = self.cache.get(self._get_key(content_hash))
+        if data is None:
+            data = self._get_from_mongo(content_hash)
+            if data is not None:
+                self.set(content_hash, data)
+
+        self._increment(self.MISSES_KEY if data is None else self.HITS_KEY)
+        return data
+
+    def set(self, content_hash, data):
+        if content_hash:
+            self.cache.set(
+                self._get_key(content_hash),
+                data,
+                timeout=settings.SATELLITE_IMAGES_METADATA_CACHE_TIMEOUT,
+            )
+
+    def get_stats(self):
+        stats = self.cache.get_many([self.HITS_KEY, self.MISSES_KEY])
+        return {
+            "hits": stats.get(self.HITS_KEY, 0),
+            "misses": stats.get(self.MISSES_KEY, 0),
+        }
+
+
+metadata_cache = SatelliteImageMetadataCache()
+
+
+class SatelliteImageListCache:
+    """
+    Serialized pages of SatelliteImage list, keyed by version of the list
+    and URL of the page. Any change of images or their mongo details
+    replaces the version, which makes every cached page stale at once.
+    Version is a random token, not a counter, so concurrent changes can't
+    end up with the same version. ETag of a page only depends on version
+    and URL, so unchanged page is revalidated without querying databases.
+    """
+
+    KEY_PREFIX = "satellite_images:list"
+    VERSION_KEY = f"{KEY_PREFIX}:version"
+
+    @property
+    def cache(self):
+        return caches[settings.SATELLITE_IMAGES_LIST_CACHE]
+
+    def invalidate(self):
+        """
+        Replace version, changes made in a transaction must be committed
+        first, so pages can't be cached again from uncommitted state.
+        """
+        self.cache.set(self.VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+    def get_version(self):
+        version = self.cache.get(self.VERSION_KEY)
+        if version is None:
+            self.cache.add(self.VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(self.VERSION_KEY)
+        return version
+
+    def _get_page_hash(self, request):
+        # responses differ per renderer, e.g. JSON and browsable API
+        page = f"{request.build_absolute_uri()} {request.accepted_media_type}"
+        return hashlib.sha1(page.encode()).hexdigest()
+
+    def get_etag(self, version, request):
+        return quote_etag(f"{version}-{self._get_page_hash(request)}")
+
+    def _get_key(self, version, request):
+        return f"{self.KEY_PREFIX}:{version}:{self._get_page_hash(request)}"
+
+    def get(self, version, request):
+        return self.cache.get(self._get_key(version, request))
+
+    def set(self, version, request, data):
+        self.cache.set(
+            self._get_key(version, request),
+            data,
+            timeout=settings.SATELLITE_IMAGES_LIST_CACHE_TIMEOUT,
+        )
+
+
+list_cache = SatelliteImageListCache()
+
+
+@receiver(post_save, sender=SatelliteImage)
+@receiver(post_delete, sender=SatelliteImage)
+def invalidate_list_cache(**kwargs):
+    """
+    Saved and deleted images change the list, queryset updates and bulk
+    creates don't send signals, their callers invalidate it themselves.
+    """
+    transaction.on_commit(list_cache.invalidate)
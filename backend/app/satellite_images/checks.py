@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register()
+def check_pipeline_settings(app_configs, **kwargs):
+    """
+    Fused pipeline saves details of its image to mongo itself,
+    mongo batches are only made by "split" pipeline.
+    """
+    if (
+        settings.SATELLITE_IMAGES_PIPELINE_MODE == "fused"
+        and settings.SATELLITE_IMAGES_MONGO_BATCH_SIZE > 1
+    ):
+        return [
+            checks.Error(
+                "SATELLITE_IMAGES_MONGO_BATCH_SIZE > 1 has no effect "
+                'with SATELLITE_IMAGES_PIPELINE_MODE = "fused".',
+                hint="Use split pipeline mode or set batch size to 1.",
+                id="satellite_images.E001",
+            )
+        ]
+    return []
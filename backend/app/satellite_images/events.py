@@ -0,0 +1,32 @@
+import json
+import logging
+
+from commons.pubsub import get_pubsub
+
+logger = logging.getLogger(__name__)
+
+
+def get_status_channel(satellite_image_id):
+    return f"satellite_images.status.{satellite_image_id}"
+
+
+def publish_status(satellite_image_id, status):
+    """
+    Push status change of SatelliteImage to its subscribers.
+    Status is already persisted, failing to publish only delays clients
+    until they reconnect, so it does not fail the caller.
+    """
+    try:
+        get_pubsub().publish(
+            get_status_channel(satellite_image_id),
+            {"id": str(satellite_image_id), "status": status},
+        )
+    except Exception as exc:
+        logger.warning(f"Publishing {satellite_image_id} status failed: {exc}")
+
+
+def format_event(event, data):
+    """
+    Return Server-Sent Event with JSON data.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,233 @@
+import math
+
+from PIL import ExifTags
+from PIL.TiffImagePlugin import IFDRational
+
+# tags pointing to sub IFDs, their values are file offsets
+EXIF_IFD_TAG = ExifTags.IFD.Exif.value
+GPS_IFD_TAG = ExifTags.IFD.GPSInfo.value
+POINTER_TAGS = frozenset(
+    [EXIF_IFD_TAG, GPS_IFD_TAG, ExifTags.IFD.Interop.value, ExifTags.IFD.IFD1.value]
+)
+# vendor specific binary blobs, not decoded
+SKIPPED_TAGS = frozenset([ExifTags.Base.MakerNote.value])
+
+# GeoTIFF tags georeferencing raster of an image, read raw, not decoded
+MODEL_PIXEL_SCALE_TAG = 33550
+MODEL_TIEPOINT_TAG = 33922
+GEO_KEY_DIRECTORY_TAG = 34735
+GT_MODEL_TYPE_GEO_KEY = 1024
+MODEL_TYPE_GEOGRAPHIC = 2
+
+
+def build_tag_names(tag_names):
+    """
+    Return table of names of decoded tags by their id.
+    """
+    return {
+        tag_id: name
+        for tag_id, name in tag_names.items()
+        if tag_id not in POINTER_TAGS and tag_id not in SKIPPED_TAGS
+    }
+
+
+# tag names are looked up in tables built once, per IFD
+IFD0_TAG_NAMES = build_tag_names(ExifTags.TAGS)
+GPS_TAG_NAMES = build_tag_names(ExifTags.GPSTAGS)
+
+# undefined type values longer than that are skipped instead of hex encoded
+MAX_BINARY_LENGTH = 64
+
+
+def _decode_int(value):
+    return int(value)
+
+
+def _decode_float(value):
+    return value if math.isfinite(value) else None
+
+
+def _decode_rational(value):
+    denominator = value.denominator
+    # numerator and denominator are 32 bit ints, their ratio is finite
+    return value.numerator / denominator if denominator else None
+
+
+def _decode_str(value):
+    return value.strip("\x00 ")
+
+
+def _decode_bytes(value):
+    """
+    Decode UNDEFINED and BYTE tag values, single byte is returned as int,
+    text as str, short binary data as hex, padding only as None.
+    """
+    if len(value) == 1:
+        return value[0]
+    text = value.rstrip(b"\x00")
+    if not text:
+        return None
+    if text.isascii():
+        text = text.decode("ascii")
+        if text.isprintable():
+            return text.strip()
+    if len(value) > MAX_BINARY_LENGTH:
+        return None
+    return value.hex()
+
+
+def _decode_array(value):
+    decoders = DECODERS
+    return [
+        decoders[type(item)](item) if type(item) in decoders else None for item in value
+    ]
+
+
+# decoders by python type of values parsed by Pillow from TIFF types:
+# SHORT/LONG as int, RATIONAL as IFDRational, ASCII as str,
+# BYTE/UNDEFINED as bytes, DOUBLE/FLOAT as float, arrays as tuple
+DECODERS = {
+    int: _decode_int,
+    bool: _decode_int,
+    float: _decode_float,
+    IFDRational: _decode_rational,
+    str: _decode_str,
+    bytes: _decode_bytes,
+    tuple: _decode_array,
+    list: _decode_array,
+}
+
+
+def decode_value(value):
+    """
+    Return JSON and BSON friendly value of a tag, None if it can't be decoded.
+    """
+    decoder = DECODERS.get(type(value))
+    if decoder is None:
+        return None
+    return decoder(value)
+
+
+def decode_tags(tags, tag_names):
+    """
+    Decode tags of one IFD. Tags missing in `tag_names` table
+    and values which can't be decoded are left out.
+    """
+    result = {}
+    for tag_id, value in tags.items():
+        name = tag_names.get(tag_id)
+        if name is None:
+            continue
+        decoder = DECODERS.get(type(value))
+        if decoder is None:
+            continue
+        value = decoder(value)
+        if value is not None and value != "":
+            result[name] = value
+    return result
+
+
+def decode_exif(exif):
+    """
+    Return tags of IFD0 and Exif IFD flattened into one dict,
+    tags of GPS IFD are nested under "GPSInfo" key.
+    Sub IFDs are read only when their pointer tags are present.
+    """
+    result = decode_tags(exif, IFD0_TAG_NAMES)
+    if EXIF_IFD_TAG in exif:
+        result.update(decode_tags(exif.get_ifd(EXIF_IFD_TAG), IFD0_TAG_NAMES))
+    if GPS_IFD_TAG in exif:
+        gps = decode_tags(exif.get_ifd(GPS_IFD_TAG), GPS_TAG_NAMES)
+        if gps:
+            result["GPSInfo"] = gps
+    return result
+
+
+def _to_degrees(dms, ref):
+    """
+    Convert degrees, minutes, seconds of GPS coordinate to signed degrees.
+    """
+    if not isinstance(dms, list) or len(dms) != 3 or None in dms:
+        return None
+    degrees = dms[0] + dms[1] / 60 + dms[2] / 3600
+    return -degrees if ref in ("S", "W") else degrees
+
+
+def get_gps_coordinates(gps):
+    """
+    Return (longitude, latitude) in degrees from decoded GPSInfo,
+    None when coordinates are missing or invalid.
+    """
+    longitude = _to_degrees(gps.get("GPSLongitude"), gps.get("GPSLongitudeRef"))
+    latitude = _to_degrees(gps.get("GPSLatitude"), gps.get("GPSLatitudeRef"))
+    if longitude is None or latitude is None:
+        return None
+    if not (-180 <= longitude <= 180 and -90 <= latitude <= 90):
+        return None
+    return longitude, latitude
+
+
+def get_point(gps):
+    """
+    Return GeoJSON Point of decoded GPSInfo, None without valid coordinates.
+    """
+    coordinates = get_gps_coordinates(gps)
+    if coordinates is None:
+        return None
+    return {"type": "Point", "coordinates": list(coordinates)}
+
+
+def _get_geo_keys(directory):
+    """
+    Return values of GeoKeyDirectory keys stored inline in the directory.
+    """
+    if not isinstance(directory, tuple) or len(directory) < 4:
+        return {}
+    keys = {}
+    for offset in range(4, min(len(directory), 4 + directory[3] * 4) - 3, 4):
+        key_id, location, _, value = directory[offset : offset + 4]
+        if location == 0:
+            keys[key_id] = value
+    return keys
+
+
+def get_footprint(exif, size):
+    """
+    Return GeoJSON Polygon covered by a GeoTIFF image in geographic coordinates,
+    computed from its tiepoint and pixel scale. None for images without them
+    or in projected coordinate systems, which would need reprojection.
+    """
+    keys = _get_geo_keys(exif.get(GEO_KEY_DIRECTORY_TAG))
+    if keys.get(GT_MODEL_TYPE_GEO_KEY) != MODEL_TYPE_GEOGRAPHIC:
+        return None
+    tiepoint = exif.get(MODEL_TIEPOINT_TAG)
+    scale = exif.get(MODEL_PIXEL_SCALE_TAG)
+    if not isinstance(tiepoint, tuple) or len(tiepoint) < 6:
+        return None
+    if not isinstance(scale, tuple) or len(scale) < 2:
+        return None
+
+    column, row, _, longitude, latitude, _ = tiepoint[:6]
+    scale_x, scale_y = scale[:2]
+    if not (scale_x > 0 and scale_y > 0):
+        return None
+    west = longitude - column * scale_x
+    north = latitude + row * scale_y
+    east = west + size[0] * scale_x
+    south = north - size[1] * scale_y
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        return None
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[west, south], [east, south], [east, north], [west, north], [west, south]]
+        ],
+    }
+
+
+def get_location(exif, decoded, size):
+    """
+    Return GeoJSON geometry of an image, its footprint when it is georeferenced,
+    otherwise point where it was taken, None when location is unknown.
+    """
+    return get_footprint(exif, size) or get_point(decoded.get("GPSInfo", {}))
@@ -0,0 +1,216 @@
+import math
+import re
+from itertools import islice
+
+from django.db.models import QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .mongo import get_details_collection
+
+
+def _parse_numbers(params, name, count):
+    """
+    Parse query param of `count` comma separated numbers.
+    """
+    try:
+        numbers = [float(number) for number in params[name].split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or not all(map(math.isfinite, numbers)):
+        raise ValidationError({name: f"Expected {count} comma separated numbers."})
+    return numbers
+
+
+# dotted paths of details keys, no operators or empty path parts
+FIELD_PATTERN = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+MAX_FIELDS = 50
+# projected anyway, to match details with images, not a part of metadata
+RESERVED_FIELDS = ("_id", "satellite_image_id")
+
+
+def get_details_projection(params):
+    """
+    Return mongo projection of `?fields=` comma separated details keys,
+    None to fetch whole details. Keys nested in requested ones are dropped,
+    mongo rejects such path collisions. Reserved keys can't be requested.
+    """
+    if not params.get("fields"):
+        return None
+    fields = sorted(set(params["fields"].split(",")))
+    if len(fields) > MAX_FIELDS or not all(map(FIELD_PATTERN.match, fields)):
+        raise ValidationError(
+            {"fields": f"Expected at most {MAX_FIELDS} comma separated keys."}
+        )
+    if any(field.split(".")[0] in RESERVED_FIELDS for field in fields):
+        raise ValidationError(
+            {"fields": f"Keys {', '.join(RESERVED_FIELDS)} can't be requested."}
+        )
+    # sorted parents come right before their nested keys
+    projected = []
+    for field in fields:
+        if not projected or not field.startswith(f"{projected[-1]}."):
+            projected.append(field)
+    return {
+        "_id": False,
+        "satellite_image_id": True,
+        **{field: True for field in projected},
+    }
+
+
+class DetailsMatchingQuerySet(QuerySet):
+    """
+    SatelliteImages matching mongo `details_query`, checked in chunks
+    of ordered rows when a slice is evaluated, e.g. a page. Used for filters
+    matching too many images to load all their ids at once, cost of a page
+    depends on how many rows are scanned to fill it.
+    """
+
+    chunk_size = 1000
+    details_query = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.details_query = self.details_query
+        return clone
+
+    def _get_matching_ids(self, satellite_images):
+        matching = get_details_collection().find(
+            {
+                **self.details_query,
+                "satellite_image_id": {
+                    "$in": [
+                        str(satellite_image.id) for satellite_image in satellite_images
+                    ]
+                },
+            },
+            {"satellite_image_id": True, "_id": False},
+        )
+        return {details["satellite_image_id"] for details in matching}
+
+    def _get_matching(self, stop):
+        matches = []
+        iterator = super().iterator(chunk_size=self.chunk_size)
+        while len(matches) < stop and (
+            chunk := list(islice(iterator, self.chunk_size))
+        ):
+            matching_ids = self._get_matching_ids(chunk)
+            matches += [item for item in chunk if str(item.id) in matching_ids]
+        return matches
+
+    def __getitem__(self, k):
+        if self.details_query is None or not isinstance(k, slice) or k.stop is None:
+            return super().__getitem__(k)
+        return self._get_matching(k.stop)[k]
+
+
+class SatelliteImageDetailsFilter(BaseFilterBackend):
+    """
+    Filter SatelliteImages by their mongo details, all filters make one
+    mongo query backed by indexes of details collection, which returns
+    ids of matching images used to filter PG queryset.
+    `?bbox=min_lon,min_lat,max_lon,max_lat` matches images intersecting
+    the box, `?near=lon,lat&max_distance=<meters>` images within distance.
+    `?make=`, `?model=`, `?image_format=` match exact values and `?min_width=`,
+    `?max_width=`, `?min_height=`, `?max_height=` inclusive size ranges.
+    Images of filters matching over `max_matches` images are found page
+    by page, see DetailsMatchingQuerySet. Matching images keep ordering
+    of the list, not distance.
+    """
+
+    default_max_distance = 10_000
+    # bounds ids loaded from mongo and IN clause of PG query
+    max_matches = 10_000
+    # query param: details key
+    exact_filters = {"make": "Make", "model": "Model", "image_format": "format"}
+    range_filters = {
+        "min_width": ("width", "$gte"),
+        "max_width": ("width", "$lte"),
+        "min_height": ("height", "$gte"),
+        "max_height": ("height", "$lte"),
+    }
+
+    def _get_bbox_query(self, params):
+        min_lon, min_lat, max_lon, max_lat = _parse_numbers(params, "bbox", 4)
+        if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise ValidationError({"bbox": "Invalid bounding box."})
+        # mongo rejects polygons bigger than a hemisphere
+        if max_lon - min_lon >= 180:
+            raise ValidationError({"bbox": "Bounding box must be under 180 wide."})
+        box = {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [min_lon, min_lat],
+                    [max_lon, min_lat],
+                    [max_lon, max_lat],
+                    [min_lon, max_lat],
+                    [min_lon, min_lat],
+                ]
+            ],
+        }
+        return {"location": {"$geoIntersects": {"$geometry": box}}}
+
+    def _get_near_query(self, params):
+        lon, lat = _parse_numbers(params, "near", 2)
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ValidationError({"near": "Invalid coordinates."})
+        max_distance = self.default_max_distance
+        if "max_distance" in params:
+            (max_distance,) = _parse_numbers(params, "max_distance", 1)
+            if max_distance <= 0:
+                raise ValidationError({"max_distance": "Must be positive."})
+        point = {"type": "Point", "coordinates": [lon, lat]}
+        return {
+            "location": {
+                "$nearSphere": {"$geometry": point, "$maxDistance": max_distance}
+            }
+        }
+
+    def _get_geo_query(self, params):
+        if "bbox" in params and "near" in params:
+            raise ValidationError("Filter by either bbox or near.")
+        if "bbox" in params:
+            return self._get_bbox_query(params)
+        if "near" in params:
+            return self._get_near_query(params)
+        return {}
+
+    def _get_metadata_query(self, params):
+        query = {}
+        for param, key in self.exact_filters.items():
+            if param in params:
+                query[key] = params[param]
+        for param, (key, operator) in self.range_filters.items():
+            if param not in params:
+                continue
+            try:
+                value = int(params[param])
+            except ValueError:
+                raise ValidationError({param: "Expected an integer."})
+            query.setdefault(key, {})[operator] = value
+        return query
+
+    def get_details_query(self, params):
+        """
+        Return mongo query of details filters, empty when none is given.
+        """
+        return {**self._get_geo_query(params), **self._get_metadata_query(params)}
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_details_query(request.query_params)
+        if not query:
+            return queryset
+        matching = (
+            get_details_collection()
+            .find(query, {"satellite_image_id": True, "_id": False})
+            .limit(self.max_matches + 1)
+        )
+        ids = [details["satellite_image_id"] for details in matching]
+        if len(ids) > self.max_matches:
+            queryset = DetailsMatchingQuerySet(
+                queryset.model, queryset.query.chain(), queryset.db
+            )
+            queryset.details_query = query
+            return queryset
+        return queryset.filter(id__in=ids)
@@ -0,0 +1,33 @@
+import hashlib
+
+
+class HashingReader:
+    """
+    Compute sha256 of a file while it is read, e.g. by storage saving it.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.hasher = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hasher.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def get_content_hash(file):
+    """
+    Return sha256 of uploaded file, computed during upload when possible.
+    """
+    checksum = getattr(file, "checksum", None)
+    if checksum:
+        return checksum
+
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
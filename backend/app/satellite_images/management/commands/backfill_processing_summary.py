@@ -0,0 +1,86 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from satellite_images.caches import list_cache
+from satellite_images.models import SatelliteImage
+from satellite_images.mongo import get_details_collection
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill processing summary of SatelliteImages without it from their mongo "
+        "details, or refresh summaries of all images with --all. "
+        "Images without details are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of images loaded, looked up in mongo and updated at once.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Refresh summaries of all images, e.g. after details changed.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count images to backfill.",
+        )
+
+    def _iter_chunks(self, satellite_images, chunk_size):
+        iterator = satellite_images.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield chunk
+
+    def _get_summaries(self, satellite_image_ids):
+        projection = {key: True for key in SatelliteImage.SUMMARY_KEYS}
+        details = get_details_collection().find(
+            {"satellite_image_id": {"$in": satellite_image_ids}},
+            {**projection, "satellite_image_id": True, "_id": False},
+        )
+        return {
+            item["satellite_image_id"]: SatelliteImage.get_processing_summary(item)
+            for item in details
+        }
+
+    def _backfill_chunk(self, satellite_image_ids):
+        """
+        Update images of the chunk with one statement, return number of updated.
+        """
+        summaries = self._get_summaries(satellite_image_ids)
+        SatelliteImage.objects.bulk_update(
+            [
+                SatelliteImage(id=satellite_image_id, processing_summary=summary)
+                for satellite_image_id, summary in summaries.items()
+            ],
+            ["processing_summary"],
+        )
+        return len(summaries)
+
+    def handle(self, *args, **options):
+        satellite_images = SatelliteImage.objects.values_list("id", flat=True)
+        if not options["all"]:
+            satellite_images = satellite_images.filter(processing_summary__isnull=True)
+        satellite_images = satellite_images.order_by("created_at", "id")
+        total = satellite_images.count()
+        if options["dry_run"] or not total:
+            self.stdout.write(f"{total} images to backfill")
+            return
+
+        updated = 0
+        for chunk in self._iter_chunks(satellite_images, options["chunk_size"]):
+            updated += self._backfill_chunk([str(image_id) for image_id in chunk])
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{updated}/{total} images updated")
+        if updated:
+            list_cache.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{updated} images backfilled, {total - updated} skipped without details"
+            )
+        )
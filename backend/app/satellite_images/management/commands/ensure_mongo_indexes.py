@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from satellite_images.mongo import ensure_details_indexes
+
+
+class Command(BaseCommand):
+    help = "Create indexes of SatelliteImage details in mongo."
+
+    def handle(self, *args, **options):
+        for index_name in ensure_details_indexes():
+            self.stdout.write(f"Index {index_name} is ready")
@@ -0,0 +1,180 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+
+from commons.models import StatusEnum
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from pymongo import ReplaceOne
+from satellite_images.caches import list_cache, metadata_cache
+from satellite_images.models import SatelliteImage
+from satellite_images.mongo import get_details_collection
+from satellite_images.tasks import SatelliteImageProcessor
+
+
+def extract_satellite_image_data(image_path):
+    """
+    Run in pool worker process, return extracted data and error of an image.
+    Cached metadata is skipped, so new fields of extraction are filled in.
+    """
+    try:
+        processor = SatelliteImageProcessor(image_path, remove_after_processing=False)
+        return processor.get_processed_satellite_image_data(), None
+    except Exception as exc:
+        return None, str(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract metadata of existing SatelliteImages again and save it to mongo, "
+        "e.g. to backfill new fields. Images which files were removed are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            nargs="+",
+            choices=[status.value for status in StatusEnum],
+            default=[StatusEnum.COMPLETED.value],
+        )
+        parser.add_argument(
+            "--created-after", type=self._parse_datetime, help="ISO date or datetime."
+        )
+        parser.add_argument(
+            "--created-before", type=self._parse_datetime, help="ISO date or datetime."
+        )
+        parser.add_argument("--uploader", nargs="+", help="Usernames of uploaders.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes extracting metadata.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of images loaded, extracted and saved at once.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count images matching filters.",
+        )
+
+    def _parse_datetime(self, value):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def _get_satellite_images(self, options):
+        satellite_images = SatelliteImage.objects.filter(status__in=options["status"])
+        if options["created_after"]:
+            satellite_images = satellite_images.filter(
+                created_at__gte=options["created_after"]
+            )
+        if options["created_before"]:
+            satellite_images = satellite_images.filter(
+                created_at__lt=options["created_before"]
+            )
+        if options["uploader"]:
+            satellite_images = satellite_images.filter(
+                uploader__username__in=options["uploader"]
+            )
+        return satellite_images.only("id", "image", "content_hash").order_by(
+            "created_at", "id"
+        )
+
+    def _iter_chunks(self, satellite_images, chunk_size):
+        iterator = satellite_images.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield chunk
+
+    def _save_chunk(self, satellite_images, results):
+        """
+        Save extracted data with one bulk write, return number of failures.
+        Processing summaries, when enabled, are refreshed with one update.
+        """
+        requests = []
+        saved = []
+        failed = 0
+        for satellite_image, (data, error) in zip(satellite_images, results):
+            if error is not None:
+                failed += 1
+                if self.verbosity > 1:
+                    self.stderr.write(f"{satellite_image.id} failed: {error}")
+                continue
+
+            metadata_cache.set(satellite_image.content_hash, data)
+            document = {**data, "satellite_image_id": str(satellite_image.id)}
+            if satellite_image.content_hash:
+                document["content_hash"] = satellite_image.content_hash
+            requests.append(
+                ReplaceOne(
+                    {"satellite_image_id": document["satellite_image_id"]},
+                    document,
+                    upsert=True,
+                )
+            )
+            satellite_image.processing_summary = SatelliteImage.get_processing_summary(
+                data
+            )
+            saved.append(satellite_image)
+        if requests:
+            get_details_collection().bulk_write(requests, ordered=False)
+            if settings.SATELLITE_IMAGES_PROCESSING_SUMMARY:
+                SatelliteImage.objects.bulk_update(saved, ["processing_summary"])
+            list_cache.invalidate()
+        return failed
+
+    def _report_progress(self, done, total, started_at):
+        elapsed = time.monotonic() - started_at
+        rate = done / elapsed if elapsed else 0
+        eta = timedelta(seconds=round((total - done) / rate)) if rate else "unknown"
+        self.stdout.write(
+            f"{done}/{total} images ({done * 100 / total:.1f}%), "
+            f"{rate:.1f} images/s, ETA {eta}"
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        satellite_images = self._get_satellite_images(options)
+        total = satellite_images.count()
+        if options["dry_run"] or not total:
+            self.stdout.write(f"{total} images to reprocess")
+            return
+
+        done = skipped = failed = 0
+        started_at = time.monotonic()
+        # at most one chunk is in flight, workers get images in small pieces
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            for chunk in self._iter_chunks(satellite_images, options["chunk_size"]):
+                existing = [
+                    satellite_image
+                    for satellite_image in chunk
+                    if satellite_image.image
+                    and os.path.exists(satellite_image.image.path)
+                ]
+                results = executor.map(
+                    extract_satellite_image_data,
+                    [satellite_image.image.path for satellite_image in existing],
+                    chunksize=max(1, len(existing) // (options["workers"] * 4)),
+                )
+                failed += self._save_chunk(existing, results)
+                skipped += len(chunk) - len(existing)
+                done += len(chunk)
+                self._report_progress(done, total, started_at)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{done - skipped - failed} images reprocessed, "
+                f"{skipped} skipped without file, {failed} failed"
+            )
+        )
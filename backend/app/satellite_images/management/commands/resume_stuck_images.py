@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from satellite_images.models import SatelliteImage
+from satellite_images.services import SatelliteImageService
+
+from celery import group
+
+
+class Command(BaseCommand):
+    help = (
+        "Resume processing of SatelliteImages stuck in PENDING or PROCESSING "
+        "longer than timeout, from their last completed stage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=60,
+            help="Minutes since last progress of an image to consider it stuck.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of images loaded and dispatched at once.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report stuck images and their last completed stage.",
+        )
+
+    def _get_stuck_images(self, timeout):
+        return (
+            SatelliteImage.objects.filter(
+                status__in=SatelliteImage.ACTIVE_STATUSES,
+                updated_at__lt=timezone.now() - timedelta(minutes=timeout),
+            )
+            .select_related("uploader")
+            .order_by("updated_at")
+        )
+
+    def _resume(self, satellite_images):
+        # resumed images are not stuck anymore until timeout passes again
+        SatelliteImage.objects.filter(
+            id__in=[satellite_image.id for satellite_image in satellite_images]
+        ).update(updated_at=timezone.now())
+        group(
+            SatelliteImageService.from_satellite_image(satellite_image).get_signature()
+            for satellite_image in satellite_images
+        ).apply_async()
+
+    def handle(self, *args, **options):
+        satellite_images = self._get_stuck_images(options["timeout"])
+        chunk = []
+        found = 0
+        for satellite_image in satellite_images.iterator(
+            chunk_size=options["chunk_size"]
+        ):
+            if options["verbosity"] > 1:
+                checkpoints = satellite_image.get_completed_checkpoints()
+                self.stdout.write(
+                    f"{satellite_image.id} last completed stage: "
+                    f"{checkpoints[-1] if checkpoints else None}"
+                )
+            found += 1
+            chunk.append(satellite_image)
+            if len(chunk) == options["chunk_size"]:
+                if not options["dry_run"]:
+                    self._resume(chunk)
+                chunk = []
+
+        if chunk and not options["dry_run"]:
+            self._resume(chunk)
+        action = "found" if options["dry_run"] else "resumed"
+        self.stdout.write(self.style.SUCCESS(f"{found} stuck images {action}"))
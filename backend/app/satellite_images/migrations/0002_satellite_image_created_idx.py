@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("satellite_images", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="satelliteimage",
+            index=models.Index(
+                fields=["created_at", "id"], name="satellite_image_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("satellite_images", "0003_satellite_image_batch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
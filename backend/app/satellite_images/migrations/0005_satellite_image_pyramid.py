@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("satellite_images", "0004_satellite_image_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="pyramid",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("satellite_images", "0005_satellite_image_pyramid"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="priority",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "LOW"), (5, "NORMAL"), (9, "HIGH")], default=5
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="satelliteimage",
+            index=models.Index(
+                fields=["status", "uploader"], name="satellite_image_status_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-18 17:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("satellite_images", "0006_satellite_image_priority"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="extracted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="finalized_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="notified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="persisted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="satelliteimage",
+            index=models.Index(
+                fields=["status", "updated_at"], name="satellite_image_stuck_idx"
+            ),
+        ),
+    ]
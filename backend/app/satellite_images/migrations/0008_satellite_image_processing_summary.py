@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("satellite_images", "0007_satellite_image_checkpoints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="satelliteimage",
+            name="processing_summary",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
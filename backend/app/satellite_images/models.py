@@ -1,7 +1,28 @@
-from commons.models import ProcessedModel, TimestampedModel, UUIDModel
+from enum import Enum
+
+from commons.models import ProcessedModel, StatusEnum, TimestampedModel, UUIDModel
 from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.utils import timezone
+
+
+class PriorityEnum(Enum):
+    # broker priority of processing, higher runs first
+    LOW = 0
+    NORMAL = 5
+    HIGH = 9
+
+
+class SatelliteImageBatch(UUIDModel, TimestampedModel):
+    uploader = models.ForeignKey(
+        User,
+        related_name="image_batches",
+        on_delete=models.CASCADE,
+    )
+
+    def __str__(self):
+        return str(self.id)
 
 
 class SatelliteImage(UUIDModel, TimestampedModel, ProcessedModel):
@@ -16,6 +37,67 @@ class SatelliteImage(UUIDModel, TimestampedModel, ProcessedModel):
         validators=[FileExtensionValidator(["jpg", "png", "jpeg"])],
     )
     image = models.ImageField(upload_to="images/")
+    # sha256 of image content, used to skip processing of duplicates
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # storage names of downscaled previews, by their max side in px
+    pyramid = models.JSONField(default=dict, blank=True)
+    batch = models.ForeignKey(
+        SatelliteImageBatch,
+        related_name="images",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    priority = models.PositiveSmallIntegerField(
+        choices=[(priority.value, priority.name) for priority in PriorityEnum],
+        default=PriorityEnum.NORMAL.value,
+    )
+    # checkpoints of processing pipeline, set when a stage is completed
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    persisted_at = models.DateTimeField(null=True, blank=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    finalized_at = models.DateTimeField(null=True, blank=True)
+    # compact copy of mongo details, see SATELLITE_IMAGES_PROCESSING_SUMMARY
+    processing_summary = models.JSONField(null=True, blank=True)
+
+    CHECKPOINTS = ["extracted_at", "persisted_at", "notified_at", "finalized_at"]
+    ACTIVE_STATUSES = [StatusEnum.PENDING.value, StatusEnum.PROCESSING.value]
+    FINAL_STATUSES = [StatusEnum.COMPLETED.value, StatusEnum.FAILED.value]
+    # keys of mongo details copied to processing_summary
+    SUMMARY_KEYS = ["width", "height", "format", "DateTimeOriginal", "location"]
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="satellite_image_created_idx"
+            ),
+            models.Index(
+                fields=["status", "uploader"], name="satellite_image_status_idx"
+            ),
+            models.Index(
+                fields=["status", "updated_at"], name="satellite_image_stuck_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def get_completed_checkpoints(self):
+        return [
+            checkpoint for checkpoint in self.CHECKPOINTS if getattr(self, checkpoint)
+        ]
+
+    @classmethod
+    def get_processing_summary(cls, data):
+        return {key: data[key] for key in cls.SUMMARY_KEYS if key in data}
+
+    @classmethod
+    def set_checkpoint(cls, satellite_image_ids, checkpoint, **fields):
+        """
+        Mark stage of processing as completed, without loading images.
+        Other fields can be updated by the same statement.
+        """
+        now = timezone.now()
+        cls.objects.filter(id__in=satellite_image_ids).update(
+            **{checkpoint: now, "updated_at": now, **fields}
+        )
@@ -0,0 +1,79 @@
+from commons.mongo import get_async_mongo_db_client, get_mongo_db_client
+from pymongo import ASCENDING, GEOSPHERE
+
+from .models import SatelliteImage
+
+
+def get_details_collection():
+    client = get_mongo_db_client()
+    dbname = client[SatelliteImage.MONGO_DB_NAME]
+    return dbname[SatelliteImage.MONGO_COLLECTION_NAME]
+
+
+def get_async_details_collection():
+    client = get_async_mongo_db_client()
+    dbname = client[SatelliteImage.MONGO_DB_NAME]
+    return dbname[SatelliteImage.MONGO_COLLECTION_NAME]
+
+
+async def aget_details(satellite_image_ids, projection=None):
+    """
+    Return details of SatelliteImages mapped to their ids, fetched with motor.
+    """
+    if not satellite_image_ids:
+        return {}
+    # index seek on unique satellite_image_id index
+    cursor = get_async_details_collection().find(
+        {"satellite_image_id": {"$in": satellite_image_ids}},
+        projection or {"_id": False},
+    )
+    return {
+        details["satellite_image_id"]: details
+        async for details in cursor
+        if details.get("satellite_image_id")
+    }
+
+
+def ensure_details_indexes():
+    """
+    Create indexes of SatelliteImage details collection.
+    Creating already existing index is a no-op, it is safe to run on each start.
+    """
+    collection = get_details_collection()
+    return [
+        collection.create_index(
+            [("satellite_image_id", ASCENDING)],
+            name="satellite_image_id_unique",
+            unique=True,
+        ),
+        collection.create_index(
+            [("content_hash", ASCENDING)],
+            name="content_hash",
+            sparse=True,
+        ),
+        # indexes of metadata filters of SatelliteImage list
+        collection.create_index(
+            [("Make", ASCENDING), ("Model", ASCENDING)],
+            name="make_model",
+            sparse=True,
+        ),
+        # ?model= alone, Model is not a prefix of make_model
+        collection.create_index(
+            [("Model", ASCENDING)],
+            name="model",
+            sparse=True,
+        ),
+        collection.create_index(
+            [("format", ASCENDING), ("width", ASCENDING), ("height", ASCENDING)],
+            name="format_width_height",
+        ),
+        collection.create_index(
+            [("width", ASCENDING), ("height", ASCENDING)],
+            name="width_height",
+        ),
+        # 2dsphere index skips documents without location
+        collection.create_index(
+            [("location", GEOSPHERE)],
+            name="location_2dsphere",
+        ),
+    ]
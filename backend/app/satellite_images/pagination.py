@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SatelliteImageCursorPagination(CursorPagination):
+    """
+    Keyset pagination, cost of a page does not depend on size of the table.
+    Ordering is backed by (created_at, id) index of SatelliteImage.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("created_at", "id")
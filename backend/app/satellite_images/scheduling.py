@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from .models import PriorityEnum, SatelliteImage
+
+
+class UploaderFairShareScheduler:
+    """
+    Decide broker priority of uploaded images with a token bucket per uploader.
+    Bucket holds BURST tokens and is refilled with RATE tokens per second,
+    RATE of 0 never refills it.
+    Images covered by tokens keep their requested priority, the rest
+    of them is demoted, so uploads of other uploaders jump ahead of
+    a big batch. Demoted images are not delayed, they run whenever
+    workers have nothing else to do.
+    Buckets live in the shared cache, updates of one bucket from many
+    processes are not atomic, which may only let an uploader over its share.
+    """
+
+    KEY_PREFIX = "satellite_images:fair_share"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.SATELLITE_IMAGES_FAIR_SHARE_CACHE]
+
+    def _get_key(self, uploader_id):
+        return f"{self.KEY_PREFIX}:{uploader_id}"
+
+    def _take_tokens(self, uploader_id, count):
+        """
+        Take up to `count` tokens from uploader bucket, return number of taken.
+        """
+        rate = settings.SATELLITE_IMAGES_FAIR_SHARE_RATE
+        burst = settings.SATELLITE_IMAGES_FAIR_SHARE_BURST
+        key = self._get_key(uploader_id)
+        with self._lock:
+            now = time.time()
+            tokens, updated_at = self.cache.get(key, (burst, now))
+            tokens = min(burst, tokens + max(rate, 0) * (now - updated_at))
+            taken = min(count, int(tokens))
+            # bucket is full again after it expires, never refilled without rate
+            timeout = (burst - tokens + taken) / rate if rate > 0 else None
+            self.cache.set(key, (tokens - taken, now), timeout=timeout)
+        return taken
+
+    def get_priorities(self, uploader_id, count, priority=PriorityEnum.NORMAL.value):
+        """
+        Return broker priorities of `count` images uploaded together.
+        """
+        taken = self._take_tokens(uploader_id, count)
+        demoted = max(priority - PriorityEnum.NORMAL.value, PriorityEnum.LOW.value)
+        return [priority] * taken + [demoted] * (count - taken)
+
+    def get_queue_depths(self):
+        """
+        Return number of not yet processed images per uploader.
+        """
+        depths = (
+            SatelliteImage.objects.filter(status__in=SatelliteImage.ACTIVE_STATUSES)
+            .values_list("uploader__username")
+            .annotate(depth=Count("id"))
+            .order_by()
+        )
+        return dict(depths)
+
+
+fair_share_scheduler = UploaderFairShareScheduler()
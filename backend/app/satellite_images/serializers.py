@@ -1,15 +1,120 @@
+import tarfile
+import zipfile
+
+from commons.models import StatusEnum
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.validators import FileExtensionValidator
+from django.db.models import Count
 from rest_framework import serializers
 
-from .models import SatelliteImage
+from .archives import ALLOWED_IMAGE_EXTENSIONS, get_archive_size
+from .models import PriorityEnum, SatelliteImage, SatelliteImageBatch
+from .uploadhandlers import validate_image_format
 
 
 class SatelliteImageSerializer(serializers.ModelSerializer):
     processing_data = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
 
     class Meta:
         model = SatelliteImage
-        fields = ["id", "title", "created_at", "status", "processing_data"]
+        fields = ["id", "title", "created_at", "status", "processing_data", "previews"]
 
     def get_processing_data(self, obj):
+        """
+        Mongo details fetched for the page, or processing summary
+        of images which details were not fetched.
+        """
         details = self.context.get("details") or {}
-        return details.get(str(obj.id))
+        if str(obj.id) in details:
+            return details[str(obj.id)]
+        if obj.processing_summary is not None:
+            return {**obj.processing_summary, "satellite_image_id": str(obj.id)}
+        return None
+
+    def get_previews(self, obj):
+        request = self.context.get("request")
+        previews = {}
+        for size, name in obj.pyramid.items():
+            url = default_storage.url(name)
+            previews[size] = request.build_absolute_uri(url) if request else url
+        return previews
+
+
+class SatelliteImageBatchCreateSerializer(serializers.Serializer):
+    images = serializers.ListField(
+        child=serializers.FileField(
+            validators=[
+                FileExtensionValidator(ALLOWED_IMAGE_EXTENSIONS),
+                validate_image_format,
+            ]
+        ),
+        required=False,
+    )
+    archive = serializers.FileField(required=False)
+    priority = serializers.ChoiceField(
+        choices=[(priority.value, priority.name) for priority in PriorityEnum],
+        default=PriorityEnum.NORMAL.value,
+    )
+
+    def validate_archive(self, archive):
+        is_archive = zipfile.is_zipfile(archive)
+        if not is_archive:
+            archive.seek(0)
+            is_archive = tarfile.is_tarfile(archive)
+        archive.seek(0)
+        if not is_archive:
+            raise serializers.ValidationError("Archive must be a zip or tar file.")
+        return archive
+
+    def validate(self, attrs):
+        """
+        Limit number of images and uncompressed size of archive,
+        checked from archive headers before anything is extracted.
+        """
+        images = attrs.get("images") or []
+        archive = attrs.get("archive")
+        if not images and not archive:
+            raise serializers.ValidationError("Provide images or archive.")
+
+        max_images = settings.SATELLITE_IMAGES_BATCH_MAX_IMAGES
+        count = len(images)
+        if archive:
+            members, size = get_archive_size(archive, max_images)
+            archive.seek(0)
+            max_size = settings.SATELLITE_IMAGES_ARCHIVE_MAX_SIZE
+            if size > max_size:
+                raise serializers.ValidationError(
+                    {"archive": f"Images must be at most {max_size} bytes unpacked."}
+                )
+            count += members
+        if count > max_images:
+            raise serializers.ValidationError(
+                f"Batch must have at most {max_images} images."
+            )
+        return attrs
+
+
+class SatelliteImageBatchSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SatelliteImageBatch
+        fields = ["id", "created_at", "progress"]
+
+    def get_progress(self, obj):
+        counts = dict(
+            obj.images.order_by()
+            .values("status")
+            .annotate(count=Count("id"))
+            .values_list("status", "count")
+        )
+        progress = {status.value: counts.get(status.value, 0) for status in StatusEnum}
+        total = sum(progress.values())
+        done = progress[StatusEnum.COMPLETED.value] + progress[StatusEnum.FAILED.value]
+        return {
+            **progress,
+            "total": total,
+            "done_percent": round(done * 100 / total, 2) if total else 100.0,
+        }
@@ -1,11 +1,19 @@
 import logging
 
-from celery.exceptions import CeleryError
 from commons.models import StatusEnum
-from pymongo.errors import PyMongoError
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
 from satellite_images import tasks
 
-from celery import chain
+from celery import chain, group
+
+from .caches import list_cache
+from .hashing import HashingReader
+from .models import PriorityEnum, SatelliteImage, SatelliteImageBatch
+from .scheduling import fair_share_scheduler
+from .uploadhandlers import StoredUploadedFile
 
 logger = logging.getLogger(__name__)
 
@@ -16,44 +24,253 @@ class SatelliteImageService:
     It processes image, save data to mongo.
     Then send notification via email.
     Then sets status of SatelliteImage in PGSQL.
+
+    Pipeline is fire-and-forget, steps are retried on transient errors,
+    failures of any step are handled
+    by the `handle_satellite_image_processing_failure` errback.
+    SATELLITE_IMAGES_PIPELINE_MODE chooses between a chain of tasks ("split")
+    and a single task running every step ("fused").
+    Every task of the pipeline is sent with given broker priority.
+    Pipeline of an image with completed checkpoints is resumed
+    after the last of them, as a chain of tasks.
     """
 
-    def __init__(self, satellite_image_id, image_path, image_name, uploader_email):
+    def __init__(
+        self,
+        satellite_image_id,
+        image_path,
+        image_name,
+        uploader_email,
+        content_hash=None,
+        priority=PriorityEnum.NORMAL.value,
+        checkpoints=(),
+    ):
         self.satellite_image_id = satellite_image_id
         self.image_path = image_path
         self.image_name = image_name
         self.uploader_email = uploader_email
+        self.content_hash = content_hash
+        self.priority = priority
+        self.checkpoints = checkpoints
+
+    @classmethod
+    def from_satellite_image(cls, satellite_image):
+        """
+        Return service resuming pipeline of already created SatelliteImage.
+        """
+        return cls(
+            satellite_image.id,
+            satellite_image.image.path,
+            satellite_image.title,
+            satellite_image.uploader.email,
+            satellite_image.content_hash,
+            satellite_image.priority,
+            satellite_image.get_completed_checkpoints(),
+        )
 
-    def _handle_processing_satellite_image_service(
+    def _get_fused_signature(
         self,
         satellite_image_id,
         image_path,
         image_name,
         uploader_email,
+        content_hash,
+        priority,
+        checkpoints,
     ):
-        try:
-            handler = chain(
-                tasks.process_satellite_image.s(image_path)
-                | tasks.save_satellite_image_data_to_mongo.s(satellite_image_id)
-                | tasks.send_email_notification.s(uploader_email, image_name)
-                | tasks.set_satellite_image_status.s(satellite_image_id)
+        return tasks.run_satellite_image_pipeline.si(
+            image_path, satellite_image_id, uploader_email, image_name, content_hash
+        ).set(priority=priority)
+
+    def _get_split_signature(
+        self,
+        satellite_image_id,
+        image_path,
+        image_name,
+        uploader_email,
+        content_hash,
+        priority,
+        checkpoints,
+    ):
+        steps = []
+        if "persisted_at" not in checkpoints:
+            if (
+                settings.SATELLITE_IMAGES_PYRAMID_SIZES
+                and "extracted_at" not in checkpoints
+            ):
+                # original is removed at the end, still pyramid is generated first
+                steps.append(
+                    tasks.generate_satellite_image_pyramid.si(
+                        image_path, satellite_image_id, content_hash
+                    )
+                )
+            steps.append(
+                tasks.process_satellite_image.si(
+                    image_path, content_hash, satellite_image_id
+                )
             )
-            result = handler.apply_async()
-            result.get()
-        except (CeleryError, PyMongoError) as exc:
-            logger.error(f"Error during task execution: {exc}")
-            handler = chain(
-                tasks.send_email_notification.s(
-                    StatusEnum.FAILED.value, uploader_email, image_name
+            if settings.SATELLITE_IMAGES_MONGO_BATCH_SIZE > 1 and not checkpoints:
+                steps.append(
+                    tasks.buffer_satellite_image_data_to_mongo.s(
+                        satellite_image_id, uploader_email, image_name, image_path
+                    )
                 )
-                | tasks.set_satellite_image_status.s(satellite_image_id)
+                return chain(*(step.set(priority=priority) for step in steps))
+            steps.append(tasks.save_satellite_image_data_to_mongo.s(satellite_image_id))
+
+        remaining_steps = [
+            (
+                "notified_at",
+                tasks.send_email_notification,
+                (uploader_email, image_name, satellite_image_id),
+            ),
+            ("finalized_at", tasks.set_satellite_image_status, (satellite_image_id,)),
+            # image is kept until everything else succeeded, for retries
+            (None, tasks.remove_satellite_image_file, (image_path,)),
+        ]
+        for checkpoint, task, args in remaining_steps:
+            if checkpoint in checkpoints:
+                continue
+            # first step of resumed pipeline gets status of persisted details
+            steps.append(
+                task.s(*args) if steps else task.si(StatusEnum.COMPLETED.value, *args)
             )
-            result = handler.apply_async()
+        return chain(*(step.set(priority=priority) for step in steps))
 
-    def handle_service(self):
-        self._handle_processing_satellite_image_service(
+    def _get_processing_satellite_image_signature(
+        self,
+        satellite_image_id,
+        image_path,
+        image_name,
+        uploader_email,
+        content_hash,
+        priority,
+        checkpoints,
+    ):
+        get_signature = (
+            self._get_fused_signature
+            if settings.SATELLITE_IMAGES_PIPELINE_MODE == "fused" and not checkpoints
+            else self._get_split_signature
+        )
+        handler = get_signature(
+            satellite_image_id,
+            image_path,
+            image_name,
+            uploader_email,
+            content_hash,
+            priority,
+            checkpoints,
+        )
+        handler.link_error(
+            tasks.handle_satellite_image_processing_failure.s(
+                satellite_image_id, uploader_email, image_name
+            )
+        )
+        return handler
+
+    def get_signature(self):
+        """
+        Return signature of processing pipeline, e.g. to dispatch it in a group.
+        """
+        return self._get_processing_satellite_image_signature(
             self.satellite_image_id,
             self.image_path,
             self.image_name,
             self.uploader_email,
+            self.content_hash,
+            self.priority,
+            self.checkpoints,
+        )
+
+    def handle_service(self):
+        return self.get_signature().apply_async()
+
+
+class SatelliteImageBatchService:
+    """
+    Create all SatelliteImages of a batch with one bulk INSERT
+    and dispatch their processing as one celery group.
+    `files` is an iterable of (name, file object) pairs.
+    Broker priorities of images are given by uploader fair share.
+    Stored files are removed when the batch is not created.
+    """
+
+    def __init__(self, uploader, files, priority=PriorityEnum.NORMAL.value):
+        self.uploader = uploader
+        self.files = files
+        self.priority = priority
+        self.batch = None
+        self.satellite_images = []
+        self.stored_names = []
+
+    def _store_file(self, name, content):
+        """
+        Return stored name and content hash of the file.
+        """
+        if isinstance(content, StoredUploadedFile):
+            return content.stored_name, content.checksum
+
+        field = SatelliteImage._meta.get_field("image")
+        reader = HashingReader(content)
+        stored_name = default_storage.save(
+            field.generate_filename(None, name), File(reader)
+        )
+        return stored_name, reader.hexdigest()
+
+    def _build_satellite_images(self):
+        satellite_images = []
+        for name, content in self.files:
+            stored_name, content_hash = self._store_file(name, content)
+            self.stored_names.append(stored_name)
+            satellite_images.append(
+                SatelliteImage(
+                    title=name,
+                    uploader=self.uploader,
+                    image=stored_name,
+                    content_hash=content_hash,
+                    batch=self.batch,
+                    priority=self.priority,
+                )
+            )
+        return satellite_images
+
+    def _dispatch(self):
+        priorities = fair_share_scheduler.get_priorities(
+            self.uploader.id, len(self.satellite_images), self.priority
+        )
+        handler = group(
+            SatelliteImageService(
+                satellite_image.id,
+                satellite_image.image.path,
+                satellite_image.title,
+                self.uploader.email,
+                satellite_image.content_hash,
+                priority,
+            ).get_signature()
+            for satellite_image, priority in zip(self.satellite_images, priorities)
         )
+        handler.apply_async()
+
+    def _remove_stored_files(self):
+        for stored_name in self.stored_names:
+            default_storage.delete(stored_name)
+
+    @transaction.atomic
+    def _create_batch(self):
+        self.batch = SatelliteImageBatch.objects.create(uploader=self.uploader)
+        self.satellite_images = SatelliteImage.objects.bulk_create(
+            self._build_satellite_images()
+        )
+        transaction.on_commit(list_cache.invalidate)
+        logger.info(
+            f"Batch {self.batch.id} created with {len(self.satellite_images)} images"
+        )
+        transaction.on_commit(self._dispatch)
+        return self.batch
+
+    def handle_service(self):
+        try:
+            return self._create_batch()
+        except Exception:
+            self._remove_stored_files()
+            raise
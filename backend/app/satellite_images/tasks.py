@@ -1,62 +1,165 @@
+import io
 import logging
+import mmap
 import os
+from collections import defaultdict
 
+from commons.batching import TimedBatchBuffer
+from commons.mail import get_cached_template, mail_connection
 from commons.models import StatusEnum
 from commons.mongo import get_mongo_db_client
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from commons.tasks import RetryingTask
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage
+from django.db import DatabaseError
 from django.utils import timezone
-from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL import Image, UnidentifiedImageError
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
-from celery import shared_task
+from celery import chain, current_app, shared_task
+from celery.signals import worker_process_shutdown, worker_ready, worker_shutdown
 
+from .caches import list_cache, metadata_cache
+from .events import publish_status
+from .exif import decode_exif, get_location
 from .models import SatelliteImage
+from .mongo import ensure_details_indexes, get_details_collection
 
 logger = logging.getLogger(__name__)
 
+# errors which may be gone on retry: storage, smtp, mongo and database outages,
+# broken or missing images are not retried
+RETRIED_ERRORS = (OSError, PyMongoError, DatabaseError)
+NOT_RETRIED_ERRORS = (UnidentifiedImageError, FileNotFoundError)
+
+
+@worker_ready.connect
+def ensure_mongo_indexes(**kwargs):
+    try:
+        ensure_details_indexes()
+    except PyMongoError as exc:
+        logger.error(f"Could not ensure mongo indexes: {exc}")
+
 
 class SatelliteImageProcessStatusNotificationStrategy:
-    def send_notification(self, image_name, recipient_email):
-        raise NotImplementedError("Method needs to be implemented!")
+    subject = "Task Completed"
+    template_name = "emails/processing_image_result.html"
+    from_email = "your_email@example.com"
+    mood = None
+    status = None
 
+    def build_message(self, image_name, recipient_email):
+        if self.status is None:
+            raise NotImplementedError("Status needs to be set!")
 
-class StatusFailedStrategy(SatelliteImageProcessStatusNotificationStrategy):
-    def send_notification(self, image_name, recipient_email):
-        subject = "Task Completed"
-        message = render_to_string(
-            "emails/processing_image_result.html",
+        message = get_cached_template(self.template_name).render(
             {
-                "mood": "troubled",
+                "mood": self.mood,
                 "recipient": recipient_email,
                 "image_name": image_name,
-                "status": "unsuccessfully",
+                "status": self.status,
                 "completed_at": timezone.now().strftime("%d/%m/%Y, %H:%M:%S"),
-            },
+            }
         )
-        from_email = "your_email@example.com"
-        recipient_list = [recipient_email]
+        return EmailMessage(self.subject, message, self.from_email, [recipient_email])
 
-        send_mail(subject, message, from_email, recipient_list)
+    def send_notification(self, image_name, recipient_email):
+        mail_connection.send_messages([self.build_message(image_name, recipient_email)])
+
+
+class StatusFailedStrategy(SatelliteImageProcessStatusNotificationStrategy):
+    mood = "troubled"
+    status = "unsuccessfully"
 
 
 class StatusSuccessfulStrategy(SatelliteImageProcessStatusNotificationStrategy):
-    def send_notification(self, image_name, recipient_email):
-        subject = "Task Completed"
-        message = render_to_string(
-            "emails/processing_image_result.html",
+    mood = "happy"
+    status = "successfully"
+
+
+def get_notification_strategy(status):
+    return (
+        StatusSuccessfulStrategy()
+        if status == StatusEnum.COMPLETED.value
+        else StatusFailedStrategy()
+    )
+
+
+class SatelliteImageNotificationDigest:
+    """
+    Collect notifications in worker process memory for a time window
+    and send one digest email per recipient, all through one connection.
+    Recipient with a single notification gets the regular email.
+    Collected notifications are sent by `send_email_notification_digest`
+    task, so sending is retried. Not yet flushed notifications are lost
+    if worker process is killed, their images are not marked notified.
+    """
+
+    subject = "Tasks Completed"
+    template_name = "emails/processing_images_digest.html"
+    from_email = SatelliteImageProcessStatusNotificationStrategy.from_email
+
+    def __init__(self, max_size, window):
+        self.buffer = TimedBatchBuffer(self._enqueue_digests, max_size, window)
+
+    def add(self, status, recipient_email, image_name, satellite_image_id=None):
+        self.buffer.add((status, recipient_email, image_name, satellite_image_id))
+
+    def flush(self):
+        self.buffer.flush()
+
+    def _build_digest(self, recipient_email, notifications):
+        message = get_cached_template(self.template_name).render(
             {
-                "mood": "happy",
                 "recipient": recipient_email,
-                "image_name": image_name,
-                "status": "successfully",
+                "images": [
+                    {
+                        "image_name": image_name,
+                        "successful": status == StatusEnum.COMPLETED.value,
+                    }
+                    for status, image_name in notifications
+                ],
                 "completed_at": timezone.now().strftime("%d/%m/%Y, %H:%M:%S"),
-            },
+            }
         )
-        from_email = "your_email@example.com"
-        recipient_list = [recipient_email]
+        return EmailMessage(self.subject, message, self.from_email, [recipient_email])
+
+    def _enqueue_digests(self, batch):
+        send_email_notification_digest.delay(batch)
+
+    def send_digests(self, batch):
+        notifications_by_recipient = defaultdict(list)
+        for status, recipient_email, image_name, _ in batch:
+            notifications_by_recipient[recipient_email].append((status, image_name))
+
+        messages = []
+        for recipient_email, notifications in notifications_by_recipient.items():
+            if len(notifications) == 1:
+                status, image_name = notifications[0]
+                strategy = get_notification_strategy(status)
+                messages.append(strategy.build_message(image_name, recipient_email))
+            else:
+                messages.append(self._build_digest(recipient_email, notifications))
 
-        send_mail(subject, message, from_email, recipient_list)
+        logger.info(f"Sending {len(messages)} notifications of {len(batch)} images")
+        mail_connection.send_messages(messages)
+
+
+_notification_digest = None
+
+
+def get_notification_digest():
+    global _notification_digest
+
+    if _notification_digest is None:
+        _notification_digest = SatelliteImageNotificationDigest(
+            settings.SATELLITE_IMAGES_NOTIFICATION_DIGEST_MAX_SIZE,
+            settings.SATELLITE_IMAGES_NOTIFICATION_DIGEST_WINDOW,
+        )
+    return _notification_digest
 
 
 class SatelliteImageProcessStatusEmailSender:
@@ -93,50 +196,214 @@ class SatelliteImageDataToMongoSaver:
         dbname = self.client[SatelliteImage.MONGO_DB_NAME]
         satellite_images = dbname[SatelliteImage.MONGO_COLLECTION_NAME]
 
-        # make sure only one document with satellite_image_id exists
-        satellite_images.delete_many(
-            {"satellite_image_id": self.data["satellite_image_id"]}
+        # unique index on satellite_image_id keeps one document per image
+        satellite_images.replace_one(
+            {"satellite_image_id": self.data["satellite_image_id"]},
+            self.data,
+            upsert=True,
         )
-        satellite_images.insert_one(self.data)
 
     def save_satellite_image_data(self):
         self.client = get_mongo_db_client()
         self._put_data_into_mongo()
-        self.client.close()
+        list_cache.invalidate()
+
+
+class SatelliteImageDataBatchMongoSaver:
+    """
+    Buffer SatelliteImage details in worker process memory and save them
+    to mongodb with one bulk_write when batch size or max age is reached.
+    Every image of the batch gets its own notification and status.
+    Images which were not saved are retried one by one
+    by `save_satellite_image_data_to_mongo`.
+    Buffered, not yet flushed details are lost if worker process is killed.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.buffer = TimedBatchBuffer(self._save_batch, max_size, max_age)
+
+    def add(self, data, satellite_image_id, uploader_email, image_name, image_path):
+        data["satellite_image_id"] = str(satellite_image_id)
+        self.buffer.add(
+            {
+                "data": data,
+                "satellite_image_id": str(satellite_image_id),
+                "uploader_email": uploader_email,
+                "image_name": image_name,
+                "image_path": image_path,
+            }
+        )
+
+    def flush(self):
+        self.buffer.flush()
+
+    def _put_batch_into_mongo(self, batch):
+        """
+        Return indexes of batch items which were not saved.
+        """
+        requests = [
+            ReplaceOne(
+                {"satellite_image_id": item["satellite_image_id"]},
+                item["data"],
+                upsert=True,
+            )
+            for item in batch
+        ]
+        try:
+            get_details_collection().bulk_write(requests, ordered=False)
+        except BulkWriteError as exc:
+            logger.error(f"Saving batch of details failed partially: {exc}")
+            return {error["index"] for error in exc.details["writeErrors"]}
+        except PyMongoError as exc:
+            logger.error(f"Saving batch of details failed: {exc}")
+            return set(range(len(batch)))
+        return set()
+
+    def _set_persisted(self, saved):
+        """
+        Mark saved images persisted, with their processing summaries
+        when enabled, in one statement.
+        """
+        if not settings.SATELLITE_IMAGES_PROCESSING_SUMMARY:
+            SatelliteImage.set_checkpoint(
+                [item["satellite_image_id"] for item in saved], "persisted_at"
+            )
+            return
+
+        now = timezone.now()
+        SatelliteImage.objects.bulk_update(
+            [
+                SatelliteImage(
+                    id=item["satellite_image_id"],
+                    persisted_at=now,
+                    updated_at=now,
+                    processing_summary=SatelliteImage.get_processing_summary(
+                        item["data"]
+                    ),
+                )
+                for item in saved
+            ],
+            ["persisted_at", "updated_at", "processing_summary"],
+        )
+
+    def _save_batch(self, batch):
+        logger.info(f"Saving batch of {len(batch)} details to mongo")
+        failed_indexes = self._put_batch_into_mongo(batch)
+        saved = [
+            item for index, item in enumerate(batch) if index not in failed_indexes
+        ]
+        self._set_persisted(saved)
+        if saved:
+            list_cache.invalidate()
+
+        for index, item in enumerate(batch):
+            if index in failed_indexes:
+                steps = [
+                    save_satellite_image_data_to_mongo.si(
+                        item["data"], item["satellite_image_id"]
+                    ),
+                    send_email_notification.s(
+                        item["uploader_email"],
+                        item["image_name"],
+                        item["satellite_image_id"],
+                    ),
+                ]
+            else:
+                steps = [
+                    send_email_notification.si(
+                        StatusEnum.COMPLETED.value,
+                        item["uploader_email"],
+                        item["image_name"],
+                        item["satellite_image_id"],
+                    ),
+                ]
+            handler = chain(
+                *steps,
+                set_satellite_image_status.s(item["satellite_image_id"]),
+                remove_satellite_image_file.s(item["image_path"]),
+            )
+            handler.link_error(
+                handle_satellite_image_processing_failure.s(
+                    item["satellite_image_id"],
+                    item["uploader_email"],
+                    item["image_name"],
+                )
+            )
+            handler.apply_async()
+
+
+_batch_mongo_saver = None
+
+
+def get_batch_mongo_saver():
+    global _batch_mongo_saver
+
+    if _batch_mongo_saver is None:
+        _batch_mongo_saver = SatelliteImageDataBatchMongoSaver(
+            settings.SATELLITE_IMAGES_MONGO_BATCH_SIZE,
+            settings.SATELLITE_IMAGES_MONGO_BATCH_MAX_AGE,
+        )
+    return _batch_mongo_saver
+
+
+# thread pool workers have no child processes, flush on worker shutdown too
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_worker_process_buffers(**kwargs):
+    if _batch_mongo_saver is not None:
+        _batch_mongo_saver.flush()
+    if _notification_digest is not None:
+        _notification_digest.flush()
+    mail_connection.close()
 
 
 class SatelliteImageProcessor:
-    def __init__(self, image_path, remove_after_processing=True) -> None:
+    """
+    Extract SatelliteImage metadata from its header only.
+    Pixel data is never decoded, file is memory mapped so only pages
+    of the header are read, without copying the file. File is closed
+    as soon as header is parsed. Images of any pixel count are accepted,
+    decompression bomb check of Pillow is disabled, see apps.py.
+    """
+
+    def __init__(
+        self, image_path, remove_after_processing=True, content_hash=None
+    ) -> None:
         self.image_path = image_path
         self.data = None
         self.remove_after_processing = remove_after_processing
+        self.content_hash = content_hash
 
     def _process_exifdata(self, exifdata):
         """
         Exif is ugly and not human readable. It needs to be processed.
         """
-        result = {}
-        for tag_id in exifdata:
-            # get the tag name, instead of human unreadable tag id
-            tag = TAGS.get(tag_id, tag_id)
-
-            data = exifdata.get(tag_id)
-            # decode bytes
-            if isinstance(data, bytes):
-                data = data.decode()
-            result[tag] = str(data)
-        return result
+        return decode_exif(exifdata)
+
+    def _read_exifdata(self, image):
+        # PngImageFile.getexif decodes the whole image when exif is not
+        # in the header, base implementation only parses the header
+        return Image.Image.getexif(image)
 
     def _process_satellite_image(self):
-        image = Image.open(self.image_path)
-        exif_data = self._process_exifdata(image.getexif())
-
-        data = {
-            "width": image.size[0],
-            "height": image.size[1],
-            "format": image.format,
-            **exif_data,
-        }
+        with (
+            open(self.image_path, "rb") as fp,
+            mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file,
+        ):
+            with Image.open(mapped_file) as image:
+                exifdata = self._read_exifdata(image)
+                exif_data = self._process_exifdata(exifdata)
+
+                data = {
+                    "width": image.size[0],
+                    "height": image.size[1],
+                    "format": image.format,
+                    **exif_data,
+                }
+                location = get_location(exifdata, exif_data, image.size)
+                if location is not None:
+                    # GeoJSON indexed by 2dsphere index of details collection
+                    data["location"] = location
         return data
 
     def _remove_image(self):
@@ -144,47 +411,325 @@ class SatelliteImageProcessor:
 
     def get_processed_satellite_image_data(self):
         if not self.data:
-            self.data = self._process_satellite_image()
+            # identical image was already processed, skip extraction
+            self.data = metadata_cache.get(self.content_hash)
+            if self.data is None:
+                self.data = self._process_satellite_image()
+                metadata_cache.set(self.content_hash, self.data)
             if self.remove_after_processing:
                 self._remove_image()
         return self.data
 
 
-@shared_task
-def send_email_notification(status, recipient_email, image_name):
+class SatelliteImagePyramidGenerator:
+    """
+    Generate downscaled previews of SatelliteImage, one per pyramid level.
+    Image is decoded once, JPEG at reduced scale using draft mode,
+    and converted to RGB, which every reduce() fast path of thumbnail()
+    supports. Smaller levels are downscaled from the previous one.
+    Images which would decode to over SATELLITE_IMAGES_PREVIEW_MAX_PIXELS
+    get no previews.
+    """
+
+    PREVIEW_FORMAT = "JPEG"
+    PREVIEW_QUALITY = 85
+    REDUCING_GAP = 2.0
+
+    def __init__(self, image_path, satellite_image_id, sizes):
+        self.image_path = image_path
+        self.satellite_image_id = satellite_image_id
+        self.sizes = sizes
+
+    def _get_preview_name(self, size):
+        return f"pyramids/{self.satellite_image_id}/{size}.jpg"
+
+    def _save_preview(self, image, size):
+        name = self._get_preview_name(size)
+        buffer = io.BytesIO()
+        image.save(buffer, self.PREVIEW_FORMAT, quality=self.PREVIEW_QUALITY)
+        # preview of previous, failed attempt is overwritten
+        default_storage.delete(name)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def generate(self):
+        """
+        Return storage names of previews by size.
+        Levels not smaller than the original image are skipped.
+        """
+        pyramid = {}
+        with Image.open(self.image_path) as image:
+            sizes = sorted(
+                (size for size in self.sizes if size < max(image.size)), reverse=True
+            )
+            if not sizes:
+                return pyramid
+
+            # JPEG is decoded at reduced scale, other formats at full size
+            draft_size = round(sizes[0] * self.REDUCING_GAP)
+            image.draft(None, (draft_size, draft_size))
+            max_pixels = settings.SATELLITE_IMAGES_PREVIEW_MAX_PIXELS
+            if image.width * image.height > max_pixels:
+                logger.warning(
+                    f"Skipping previews of {self.satellite_image_id}, "
+                    f"{image.width}x{image.height} is over {max_pixels} pixels"
+                )
+                return pyramid
+
+            level = image.convert("RGB")
+
+        for size in sizes:
+            level.thumbnail((size, size), reducing_gap=self.REDUCING_GAP)
+            pyramid[str(size)] = self._save_preview(level, size)
+        return pyramid
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=(OSError,),
+)
+def send_email_notification(
+    status, recipient_email, image_name, satellite_image_id=None
+):
     logger.info("Sending notification")
-    strategy = (
-        StatusSuccessfulStrategy()
-        if status == StatusEnum.COMPLETED.value
-        else StatusFailedStrategy()
-    )
+    if settings.SATELLITE_IMAGES_NOTIFICATION_DIGEST_WINDOW > 0:
+        # image is marked notified once its digest is sent
+        get_notification_digest().add(
+            status, recipient_email, image_name, satellite_image_id
+        )
+        return status
+
+    strategy = get_notification_strategy(status)
     sender = SatelliteImageProcessStatusEmailSender(
         strategy, recipient_email, image_name
     )
     sender.send_notification()
+    if satellite_image_id:
+        SatelliteImage.set_checkpoint([satellite_image_id], "notified_at")
     return status
 
 
-@shared_task
-def process_satellite_image(image_path):
-    logger.info("Processing image {image_path}")
-    processor = SatelliteImageProcessor(image_path)
-    return processor.get_processed_satellite_image_data()
-
-
-@shared_task
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=(OSError,),
+)
+def send_email_notification_digest(notifications):
+    """
+    Send notifications collected by SatelliteImageNotificationDigest,
+    as (status, recipient email, image name, satellite image id) items.
+    """
+    logger.info(f"Sending digest of {len(notifications)} notifications")
+
+    get_notification_digest().send_digests(notifications)
+    satellite_image_ids = [
+        satellite_image_id
+        for *_, satellite_image_id in notifications
+        if satellite_image_id
+    ]
+    if satellite_image_ids:
+        SatelliteImage.set_checkpoint(satellite_image_ids, "notified_at")
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=RETRIED_ERRORS,
+    dont_autoretry_for=NOT_RETRIED_ERRORS,
+)
+def generate_satellite_image_pyramid(image_path, satellite_image_id, content_hash=None):
+    """
+    Previews are optional, image without them is still processed.
+    Identical image, which was already processed, shares its previews.
+    """
+    pyramid = None
+    if content_hash:
+        pyramid = (
+            SatelliteImage.objects.filter(
+                content_hash=content_hash, extracted_at__isnull=False
+            )
+            .exclude(id=satellite_image_id)
+            .values_list("pyramid", flat=True)
+            .first()
+        )
+    if pyramid is not None:
+        logger.info(f"Reusing pyramid of identical image for {satellite_image_id}")
+    else:
+        logger.info(f"Generating pyramid of {satellite_image_id}")
+        generator = SatelliteImagePyramidGenerator(
+            image_path, satellite_image_id, settings.SATELLITE_IMAGES_PYRAMID_SIZES
+        )
+        try:
+            pyramid = generator.generate()
+        except Exception:
+            logger.exception(f"Could not generate pyramid of {satellite_image_id}")
+            pyramid = {}
+
+    SatelliteImage.objects.filter(id=satellite_image_id).update(pyramid=pyramid)
+    list_cache.invalidate()
+    return pyramid
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=RETRIED_ERRORS,
+    dont_autoretry_for=NOT_RETRIED_ERRORS,
+)
+def process_satellite_image(image_path, content_hash=None, satellite_image_id=None):
+    """
+    Image is kept, it is removed by the last step of pipeline,
+    so every step can be retried until its result is persisted.
+    Extracted data is cached by content hash, so resumed pipeline
+    does not extract it again.
+    """
+    logger.info(f"Processing image {image_path}")
+    if satellite_image_id and SatelliteImage.transition_status(
+        [satellite_image_id], StatusEnum.PROCESSING.value
+    ):
+        list_cache.invalidate()
+        publish_status(satellite_image_id, StatusEnum.PROCESSING.value)
+    processor = SatelliteImageProcessor(
+        image_path, remove_after_processing=False, content_hash=content_hash
+    )
+    data = processor.get_processed_satellite_image_data()
+    if content_hash:
+        data = {**data, "content_hash": content_hash}
+    if satellite_image_id:
+        SatelliteImage.set_checkpoint([satellite_image_id], "extracted_at")
+    return data
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=(PyMongoError,),
+)
 def save_satellite_image_data_to_mongo(data, satellite_image_id):
     logger.info(f"Saving data to mongo {satellite_image_id}")
 
     data["satellite_image_id"] = str(satellite_image_id)
     saver = SatelliteImageDataToMongoSaver(data)
     saver.save_satellite_image_data()
+    fields = {}
+    if settings.SATELLITE_IMAGES_PROCESSING_SUMMARY:
+        fields["processing_summary"] = SatelliteImage.get_processing_summary(data)
+    SatelliteImage.set_checkpoint([satellite_image_id], "persisted_at", **fields)
     return StatusEnum.COMPLETED.value
 
 
 @shared_task
+def buffer_satellite_image_data_to_mongo(
+    data, satellite_image_id, uploader_email, image_name, image_path
+):
+    """
+    Last task of batched pipeline, notification, status
+    and removal of image are dispatched when batch is saved.
+    """
+    logger.info(f"Buffering data to mongo {satellite_image_id}")
+
+    saver = get_batch_mongo_saver()
+    saver.add(data, satellite_image_id, uploader_email, image_name, image_path)
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=(DatabaseError,),
+)
 def set_satellite_image_status(status, satellite_image_id):
     logger.info(f"Changing {satellite_image_id} status to {status}")
 
-    obj = SatelliteImage.objects.get(id=satellite_image_id)
-    obj.set_status(status)
+    fields = {}
+    if status in SatelliteImage.FINAL_STATUSES:
+        fields["finalized_at"] = timezone.now()
+    if SatelliteImage.transition_status([satellite_image_id], status, **fields):
+        list_cache.invalidate()
+        publish_status(satellite_image_id, status)
+    else:
+        # e.g. failure of a step after image was completed
+        logger.warning(f"{satellite_image_id} can't be changed to {status}")
+    return status
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=(OSError,),
+)
+def remove_satellite_image_file(status, image_path):
+    """
+    Remove processed image, once its details and status are persisted.
+    Image removed by previous attempt is skipped.
+    """
+    if settings.SATELLITE_IMAGES_KEEP_ORIGINALS:
+        return status
+
+    logger.info(f"Removing image {image_path}")
+    try:
+        os.remove(image_path)
+    except FileNotFoundError:
+        pass
+    return status
+
+
+@shared_task(
+    base=RetryingTask,
+    autoretry_for=RETRIED_ERRORS,
+    dont_autoretry_for=NOT_RETRIED_ERRORS,
+)
+def run_satellite_image_pipeline(
+    image_path, satellite_image_id, uploader_email, image_name, content_hash=None
+):
+    """
+    Fused pipeline, runs every step in one task to avoid broker round trips.
+    Only notification is sent asynchronously, status does not wait for it.
+    Every step is idempotent, failed task is retried from the start.
+    """
+    if settings.SATELLITE_IMAGES_PYRAMID_SIZES:
+        generate_satellite_image_pyramid(image_path, satellite_image_id, content_hash)
+    data = process_satellite_image(image_path, content_hash, satellite_image_id)
+    status = save_satellite_image_data_to_mongo(data, satellite_image_id)
+    set_satellite_image_status(status, satellite_image_id)
+    send_email_notification.delay(
+        status, uploader_email, image_name, satellite_image_id
+    )
+    remove_satellite_image_file(status, image_path)
+    return status
+
+
+@shared_task
+def handle_satellite_image_processing_failure(
+    request, exc, traceback, satellite_image_id, uploader_email, image_name
+):
+    """
+    Errback linked to every task of the processing chain, called
+    by the worker of the failed task, it is not sent through broker.
+    Marks SatelliteImage as FAILED, notifies uploader and removes
+    its image, which is not processed again. Jobs sent to dead letter
+    queue are left unfinished, their replay continues the chain and
+    calls the errback again if it fails.
+    """
+    task = current_app.tasks.get(request.task)
+    if isinstance(task, RetryingTask) and task.is_dead_lettered(exc, request):
+        logger.error(
+            f"Processing {satellite_image_id} dead lettered (task {request.id}): {exc}"
+        )
+        return
+
+    logger.error(f"Processing {satellite_image_id} failed (task {request.id}): {exc}")
+
+    # errback runs in the failing worker, status is set before anything
+    # which may fail, email is sent by a retried task
+    failed = StatusEnum.FAILED.value
+    if not SatelliteImage.transition_status(
+        [satellite_image_id], failed, finalized_at=timezone.now()
+    ):
+        # e.g. failure of a step after image was completed
+        logger.warning(f"{satellite_image_id} can't be changed to {failed}")
+        return
+    list_cache.invalidate()
+    publish_status(satellite_image_id, failed)
+    send_email_notification.delay(
+        failed, uploader_email, image_name, satellite_image_id
+    )
+    image = (
+        SatelliteImage.objects.filter(id=satellite_image_id)
+        .values_list("image", flat=True)
+        .first()
+    )
+    if image:
+        remove_satellite_image_file.delay(failed, default_storage.path(image))
@@ -0,0 +1,99 @@
+import os
+import tempfile
+from unittest import mock
+
+from commons.models import StatusEnum
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from satellite_images.models import SatelliteImage
+from satellite_images.tests.test_caches import LOCMEM_CACHES
+from tests.factories.satellite_image import SatelliteImageFactory
+from tests.factories.user import UserFactory
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CACHES=LOCMEM_CACHES)
+@mock.patch("satellite_images.admin.SatelliteImageService")
+class TestSatelliteImageAdmin(TestCase):
+    def setUp(self):
+        self.user = UserFactory(is_staff=True, is_superuser=True)
+        self.client.force_login(self.user)
+        self.url = reverse("admin:satellite_images_satelliteimage_add")
+        os.makedirs(default_storage.path("images"), exist_ok=True)
+
+    def _stored_images(self):
+        return set(os.listdir(default_storage.path("images")))
+
+    def _image_file(self, name):
+        with open(os.path.join(FIXTURES_DIR, "img.png"), "rb") as image:
+            return SimpleUploadedFile(name, image.read())
+
+    def test_streamed_image_is_used_by_created_image(self, mock_service):
+        stored_files = self._stored_images()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, {"image": self._image_file("a.png"), "priority": 5}
+            )
+
+        self.assertEqual(response.status_code, 302)
+        image = SatelliteImage.objects.get()
+        self.assertEqual(
+            self._stored_images() - stored_files, {os.path.basename(image.image.name)}
+        )
+        mock_service.return_value.handle_service.assert_called_once()
+
+    def test_streamed_image_of_rejected_form_is_removed(self, mock_service):
+        stored_files = self._stored_images()
+
+        response = self.client.post(
+            self.url, {"image": self._image_file("a.jpg"), "priority": 5}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(SatelliteImage.objects.exists())
+        self.assertEqual(self._stored_images(), stored_files)
+
+    def test_anonymous_upload_is_not_stored(self, mock_service):
+        self.client.logout()
+        stored_files = self._stored_images()
+
+        response = self.client.post(self.url, {"image": self._image_file("a.png")})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self._stored_images(), stored_files)
+
+    def test_csrf_is_checked(self, mock_service):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        stored_files = self._stored_images()
+
+        response = client.post(self.url, {"image": self._image_file("a.png")})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self._stored_images(), stored_files)
+
+    @mock.patch("satellite_images.admin.publish_status")
+    def test_mark_as_failed_publishes_changed_statuses(
+        self, mock_publish_status, mock_service
+    ):
+        pending = SatelliteImageFactory()
+        completed = SatelliteImageFactory(status=StatusEnum.COMPLETED.value)
+        url = reverse("admin:satellite_images_satelliteimage_changelist")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url,
+                {
+                    "action": "mark_as_failed",
+                    "_selected_action": [pending.id, completed.id],
+                },
+            )
+
+        self.assertEqual(response.status_code, 302)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, StatusEnum.FAILED.value)
+        mock_publish_status.assert_called_once_with(pending.id, StatusEnum.FAILED.value)
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from satellite_images.caches import list_cache, metadata_cache
+from tests.factories.satellite_image import SatelliteImageFactory
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    **{
+        alias: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"satellite_images_tests_{alias}",
+        }
+        for alias in ["metadata", "fair_share", "list"]
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("satellite_images.caches.get_details_collection")
+class TestSatelliteImageMetadataCache(SimpleTestCase):
+    def setUp(self):
+        metadata_cache.cache.clear()
+
+    def test_miss(self, mock_collection):
+        mock_collection.return_value.find_one.return_value = None
+
+        self.assertIsNone(metadata_cache.get("hash"))
+        self.assertEqual(metadata_cache.get_stats(), {"hits": 0, "misses": 1})
+
+    def test_hit(self, mock_collection):
+        metadata_cache.set("hash", {"width": 1})
+
+        self.assertEqual(metadata_cache.get("hash"), {"width": 1})
+        self.assertEqual(metadata_cache.get_stats(), {"hits": 1, "misses": 0})
+        mock_collection.assert_not_called()
+
+    def test_hit_from_mongo_details_of_duplicate(self, mock_collection):
+        mock_collection.return_value.find_one.return_value = {"width": 1}
+
+        self.assertEqual(metadata_cache.get("hash"), {"width": 1})
+        self.assertEqual(metadata_cache.get("hash"), {"width": 1})
+
+        mock_collection.return_value.find_one.assert_called_once_with(
+            {"content_hash": "hash"},
+            {"_id": False, "satellite_image_id": False, "content_hash": False},
+        )
+        self.assertEqual(metadata_cache.get_stats(), {"hits": 2, "misses": 0})
+
+    def test_without_content_hash(self, mock_collection):
+        self.assertIsNone(metadata_cache.get(""))
+        self.assertEqual(metadata_cache.get_stats(), {"hits": 0, "misses": 0})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestSatelliteImageListCache(TestCase):
+    def setUp(self):
+        list_cache.cache.clear()
+
+    def test_version_is_kept_until_invalidated(self):
+        version = list_cache.get_version()
+
+        self.assertEqual(list_cache.get_version(), version)
+        list_cache.invalidate()
+        self.assertNotEqual(list_cache.get_version(), version)
+
+    def test_saved_and_deleted_images_invalidate_on_commit(self):
+        version = list_cache.get_version()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            image = SatelliteImageFactory()
+        self.assertEqual(list_cache.get_version(), version)
+
+        for callback in callbacks:
+            callback()
+        saved_version = list_cache.get_version()
+        self.assertNotEqual(saved_version, version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertNotEqual(list_cache.get_version(), saved_version)
@@ -0,0 +1,18 @@
+from django.test import SimpleTestCase, override_settings
+from satellite_images.checks import check_pipeline_settings
+
+
+class TestCheckPipelineSettings(SimpleTestCase):
+    @override_settings(
+        SATELLITE_IMAGES_PIPELINE_MODE="fused", SATELLITE_IMAGES_MONGO_BATCH_SIZE=10
+    )
+    def test_fused_mode_with_mongo_batches(self):
+        [error] = check_pipeline_settings(None)
+
+        self.assertEqual(error.id, "satellite_images.E001")
+
+    @override_settings(
+        SATELLITE_IMAGES_PIPELINE_MODE="split", SATELLITE_IMAGES_MONGO_BATCH_SIZE=10
+    )
+    def test_split_mode_with_mongo_batches(self):
+        self.assertEqual(check_pipeline_settings(None), [])
@@ -0,0 +1,172 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from commons.models import StatusEnum
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from satellite_images.caches import list_cache, metadata_cache
+from satellite_images.models import SatelliteImage
+from satellite_images.tests.test_caches import LOCMEM_CACHES
+from tests.factories.satellite_image import SatelliteImageFactory
+from tests.factories.user import UserFactory
+
+
+@mock.patch("satellite_images.management.commands.resume_stuck_images.group")
+class TestResumeStuckImages(TestCase):
+    def _create_image(self, minutes_ago, **kwargs):
+        image = SatelliteImageFactory(image="images/img.png", **kwargs)
+        SatelliteImage.objects.filter(id=image.id).update(
+            updated_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+        return image
+
+    def test_stuck_images_are_resumed(self, mock_group):
+        stuck = self._create_image(120, persisted_at=timezone.now())
+        self._create_image(5)
+        self._create_image(120, status=StatusEnum.COMPLETED.value)
+
+        out = StringIO()
+        call_command("resume_stuck_images", "--timeout=60", stdout=out)
+
+        self.assertIn("1 stuck images resumed", out.getvalue())
+        [signature] = list(mock_group.call_args.args[0])
+        self.assertEqual(signature.tasks[0].args[-1], stuck.id)
+        mock_group.return_value.apply_async.assert_called_once()
+        stuck.refresh_from_db()
+        self.assertGreater(stuck.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_dry_run(self, mock_group):
+        self._create_image(120)
+
+        out = StringIO()
+        call_command("resume_stuck_images", "--dry-run", "--verbosity=2", stdout=out)
+
+        self.assertIn("last completed stage: None", out.getvalue())
+        self.assertIn("1 stuck images found", out.getvalue())
+        mock_group.assert_not_called()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CACHES=LOCMEM_CACHES)
+@mock.patch(
+    "satellite_images.management.commands.reprocess_images.get_details_collection"
+)
+class TestReprocessImages(TestCase):
+    def _create_image(self, name, status=StatusEnum.COMPLETED.value, **kwargs):
+        image = SatelliteImageFactory(image=f"images/{name}", status=status, **kwargs)
+        os.makedirs(os.path.dirname(image.image.path), exist_ok=True)
+        Image.new("RGB", (4, 2), color="white").save(image.image.path, "PNG")
+        return image
+
+    def test_images_are_reprocessed_in_bulk(self, mock_collection):
+        image = self._create_image("a.png", content_hash="hash")
+        self._create_image("b.png")
+        SatelliteImageFactory(
+            image="images/removed.png", status=StatusEnum.COMPLETED.value
+        )
+        self._create_image("pending.png", status=StatusEnum.PENDING.value)
+
+        out = StringIO()
+        call_command("reprocess_images", "--workers=2", stdout=out)
+
+        self.assertIn("3/3 images (100.0%)", out.getvalue())
+        self.assertIn(
+            "2 images reprocessed, 1 skipped without file, 0 failed", out.getvalue()
+        )
+        requests = mock_collection.return_value.bulk_write.call_args.args[0]
+        self.assertEqual(
+            requests[0]._doc,
+            {
+                "width": 4,
+                "height": 2,
+                "format": "PNG",
+                "satellite_image_id": str(image.id),
+                "content_hash": "hash",
+            },
+        )
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(metadata_cache.get("hash")["width"], 4)
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    def test_processing_summaries_are_refreshed(self, mock_collection):
+        image = self._create_image("a.png", processing_summary={"width": 1})
+
+        call_command("reprocess_images", "--workers=1", stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(
+            image.processing_summary, {"width": 4, "height": 2, "format": "PNG"}
+        )
+
+    def test_filters(self, mock_collection):
+        uploader = UserFactory(username="uploader")
+        self._create_image("a.png", uploader=uploader)
+        self._create_image("b.png")
+
+        out = StringIO()
+        call_command(
+            "reprocess_images",
+            "--dry-run",
+            "--uploader=uploader",
+            "--created-after=2000-01-01",
+            stdout=out,
+        )
+
+        self.assertIn("1 images to reprocess", out.getvalue())
+        mock_collection.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch(
+    "satellite_images.management.commands.backfill_processing_summary"
+    ".get_details_collection"
+)
+class TestBackfillProcessingSummary(TestCase):
+    def test_summaries_are_backfilled(self, mock_collection):
+        image = SatelliteImageFactory()
+        SatelliteImageFactory()
+        summarized = SatelliteImageFactory(processing_summary={"width": 1})
+        details = {"satellite_image_id": str(image.id), "width": 4, "format": "PNG"}
+        mock_collection.return_value.find.side_effect = lambda query, projection: [
+            details
+            for satellite_image_id in query["satellite_image_id"]["$in"]
+            if satellite_image_id == details["satellite_image_id"]
+        ]
+        version = list_cache.get_version()
+
+        out = StringIO()
+        call_command("backfill_processing_summary", "--chunk-size=1", stdout=out)
+
+        self.assertIn("1 images backfilled, 1 skipped without details", out.getvalue())
+        image.refresh_from_db()
+        self.assertEqual(image.processing_summary, {"width": 4, "format": "PNG"})
+        summarized.refresh_from_db()
+        self.assertEqual(summarized.processing_summary, {"width": 1})
+        self.assertEqual(mock_collection.return_value.find.call_count, 2)
+        self.assertNotEqual(list_cache.get_version(), version)
+
+    def test_dry_run(self, mock_collection):
+        SatelliteImageFactory()
+
+        out = StringIO()
+        call_command("backfill_processing_summary", "--dry-run", stdout=out)
+
+        self.assertIn("1 images to backfill", out.getvalue())
+        mock_collection.assert_not_called()
+
+    def test_all_summaries_are_refreshed(self, mock_collection):
+        image = SatelliteImageFactory(processing_summary={"width": 4})
+        mock_collection.return_value.find.return_value = [
+            {"satellite_image_id": str(image.id), "width": 4, "location": "point"}
+        ]
+
+        out = StringIO()
+        call_command("backfill_processing_summary", "--all", stdout=out)
+
+        self.assertIn("1 images backfilled", out.getvalue())
+        image.refresh_from_db()
+        self.assertEqual(image.processing_summary, {"width": 4, "location": "point"})
@@ -0,0 +1,149 @@
+import io
+
+from django.test import SimpleTestCase
+from parameterized import parameterized
+from PIL import ExifTags, Image
+from PIL.TiffImagePlugin import IFDRational
+from satellite_images.exif import (
+    decode_exif,
+    decode_value,
+    get_footprint,
+    get_gps_coordinates,
+    get_location,
+)
+
+
+class TestDecodeValue(SimpleTestCase):
+    @parameterized.expand(
+        [
+            (7, 7),
+            (IFDRational(3, 2), 1.5),
+            (IFDRational(1, 0), None),
+            (float("nan"), None),
+            ("text\x00 ", "text"),
+            (b"0220", "0220"),
+            (b"\x01", 1),
+            (b"\x00\x00\x00\x00", None),
+            (b"\x01\x02\x03\x00", "01020300"),
+            (b"\xc3\x28" * 100, None),
+            ((IFDRational(1, 2), IFDRational(3, 1)), [0.5, 3.0]),
+            (object(), None),
+        ]
+    )
+    def test_decode_value(self, value, expected):
+        self.assertEqual(decode_value(value), expected)
+
+
+class TestDecodeExif(SimpleTestCase):
+    def _read_exif(self, exif):
+        buffer = io.BytesIO()
+        Image.new("RGB", (2, 2)).save(buffer, "JPEG", exif=exif)
+        buffer.seek(0)
+        return Image.open(buffer).getexif()
+
+    def test_sub_ifds_are_decoded(self):
+        exif = Image.Exif()
+        exif[ExifTags.Base.Make] = "maker"
+        exif[ExifTags.IFD.Exif] = {
+            ExifTags.Base.ExposureTime: IFDRational(1, 30),
+            ExifTags.Base.MakerNote: b"\xff\xfe" * 100,
+            ExifTags.Base.UserComment: b"\xc3\x28 binary",
+        }
+        exif[ExifTags.IFD.GPSInfo] = {
+            ExifTags.GPS.GPSLatitudeRef: "N",
+            ExifTags.GPS.GPSLatitude: (
+                IFDRational(50),
+                IFDRational(3),
+                IFDRational(36),
+            ),
+            ExifTags.GPS.GPSLongitudeRef: "W",
+            ExifTags.GPS.GPSLongitude: (
+                IFDRational(19),
+                IFDRational(30),
+                IFDRational(0),
+            ),
+        }
+
+        result = decode_exif(self._read_exif(exif))
+
+        self.assertEqual(
+            result,
+            {
+                "Make": "maker",
+                "ExposureTime": 1 / 30,
+                "UserComment": "c3282062696e617279",
+                "GPSInfo": {
+                    "GPSLatitudeRef": "N",
+                    "GPSLatitude": [50.0, 3.0, 36.0],
+                    "GPSLongitudeRef": "W",
+                    "GPSLongitude": [19.0, 30.0, 0.0],
+                },
+            },
+        )
+        longitude, latitude = get_gps_coordinates(result["GPSInfo"])
+        self.assertAlmostEqual(longitude, -19.5)
+        self.assertAlmostEqual(latitude, 50.06)
+
+    @parameterized.expand(
+        [
+            ({},),
+            ({"GPSLatitude": [50.0, 0.0, 0.0], "GPSLongitude": [None, 0.0, 0.0]},),
+            ({"GPSLatitude": [91.0, 0.0, 0.0], "GPSLongitude": [1.0, 0.0, 0.0]},),
+        ]
+    )
+    def test_invalid_gps_coordinates(self, gps):
+        self.assertIsNone(get_gps_coordinates(gps))
+
+
+GEOTIFF_TAGS = {
+    33550: (0.01, 0.02, 0.0),
+    33922: (0.0, 0.0, 0.0, 20.0, 50.0, 0.0),
+    34735: (1, 1, 0, 1, 1024, 0, 1, 2),
+}
+
+
+class TestGetLocation(SimpleTestCase):
+    def test_footprint_of_geographic_geotiff(self):
+        self.assertEqual(
+            get_footprint(GEOTIFF_TAGS, (200, 100)),
+            {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [20.0, 48.0],
+                        [22.0, 48.0],
+                        [22.0, 50.0],
+                        [20.0, 50.0],
+                        [20.0, 48.0],
+                    ]
+                ],
+            },
+        )
+
+    @parameterized.expand(
+        [
+            # projected coordinate system
+            ({34735: (1, 1, 0, 1, 1024, 0, 1, 1)},),
+            ({34735: None},),
+            ({33922: None},),
+            ({33550: (0.0, 0.02, 0.0)},),
+            # out of valid longitudes
+            ({33922: (0.0, 0.0, 0.0, 179.0, 50.0, 0.0)},),
+        ]
+    )
+    def test_no_footprint(self, tags):
+        self.assertIsNone(get_footprint({**GEOTIFF_TAGS, **tags}, (200, 100)))
+
+    def test_gps_point_without_footprint(self):
+        gps = {
+            "GPSLatitudeRef": "S",
+            "GPSLatitude": [10.0, 30.0, 0.0],
+            "GPSLongitudeRef": "E",
+            "GPSLongitude": [20.0, 0.0, 0.0],
+        }
+
+        self.assertEqual(
+            get_location({}, {"GPSInfo": gps}, (10, 10)),
+            {"type": "Point", "coordinates": [20.0, -10.5]},
+        )
+        self.assertIsNone(get_location({}, {}, (10, 10)))
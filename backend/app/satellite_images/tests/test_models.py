@@ -0,0 +1,43 @@
+from commons.models import StatusEnum
+from django.test import TestCase
+from satellite_images.models import SatelliteImage
+from tests.factories.satellite_image import SatelliteImageFactory
+
+
+class TestTransitionStatus(TestCase):
+    def test_many_images_are_moved_in_one_statement(self):
+        pending = [SatelliteImageFactory() for _ in range(3)]
+        completed = SatelliteImageFactory(status=StatusEnum.COMPLETED.value)
+
+        with self.assertNumQueries(1):
+            changed = SatelliteImage.transition_status(
+                [image.id for image in [*pending, completed]],
+                StatusEnum.FAILED.value,
+            )
+
+        self.assertEqual(changed, 3)
+        self.assertEqual(
+            SatelliteImage.objects.filter(status=StatusEnum.FAILED.value).count(), 3
+        )
+        completed.refresh_from_db()
+        self.assertEqual(completed.status, StatusEnum.COMPLETED.value)
+
+    def test_updated_at_is_bumped(self):
+        image = SatelliteImageFactory()
+        updated_at = image.updated_at
+
+        SatelliteImage.transition_status([image.id], StatusEnum.PROCESSING.value)
+
+        image.refresh_from_db()
+        self.assertGreater(image.updated_at, updated_at)
+
+    def test_set_status_reports_refused_transition(self):
+        image = SatelliteImageFactory(status=StatusEnum.COMPLETED.value)
+
+        self.assertFalse(image.set_status(StatusEnum.PROCESSING.value))
+        self.assertEqual(image.status, StatusEnum.COMPLETED.value)
+        self.assertTrue(image.set_status(StatusEnum.COMPLETED.value))
+
+    def test_invalid_status(self):
+        with self.assertRaises(ValueError):
+            SatelliteImage.transition_status([], "UNKNOWN")
@@ -0,0 +1,201 @@
+from unittest import mock
+
+from commons.models import StatusEnum
+from django.test import SimpleTestCase, override_settings
+from pymongo.errors import AutoReconnect, BulkWriteError
+from satellite_images.mongo import aget_details, ensure_details_indexes
+from satellite_images.tasks import (
+    SatelliteImageDataBatchMongoSaver,
+    SatelliteImageDataToMongoSaver,
+    remove_satellite_image_file,
+    save_satellite_image_data_to_mongo,
+    send_email_notification,
+    set_satellite_image_status,
+)
+
+
+class TestEnsureDetailsIndexes(SimpleTestCase):
+    @mock.patch("satellite_images.mongo.get_details_collection")
+    def test_unique_index_on_satellite_image_id(self, mock_collection):
+        ensure_details_indexes()
+
+        create_index = mock_collection.return_value.create_index
+        create_index.assert_any_call(
+            [("satellite_image_id", 1)],
+            name="satellite_image_id_unique",
+            unique=True,
+        )
+
+    @mock.patch("satellite_images.mongo.get_details_collection")
+    def test_2dsphere_index_on_location(self, mock_collection):
+        ensure_details_indexes()
+
+        create_index = mock_collection.return_value.create_index
+        create_index.assert_any_call(
+            [("location", "2dsphere")], name="location_2dsphere"
+        )
+
+    @mock.patch("satellite_images.mongo.get_details_collection")
+    def test_indexes_of_metadata_filters(self, mock_collection):
+        ensure_details_indexes()
+
+        create_index = mock_collection.return_value.create_index
+        create_index.assert_any_call(
+            [("Make", 1), ("Model", 1)], name="make_model", sparse=True
+        )
+        create_index.assert_any_call([("Model", 1)], name="model", sparse=True)
+        create_index.assert_any_call([("width", 1), ("height", 1)], name="width_height")
+
+
+class TestAgetDetails(SimpleTestCase):
+    @mock.patch("satellite_images.mongo.get_async_details_collection")
+    async def test_details_are_mapped_to_ids(self, mock_collection):
+        async def find(query, projection):
+            for details in [{"satellite_image_id": "id-1", "width": 1}, {"width": 2}]:
+                yield details
+
+        mock_collection.return_value.find = mock.Mock(side_effect=find)
+
+        details = await aget_details(["id-1", "id-2"], {"width": True})
+
+        self.assertEqual(details, {"id-1": {"satellite_image_id": "id-1", "width": 1}})
+        mock_collection.return_value.find.assert_called_once_with(
+            {"satellite_image_id": {"$in": ["id-1", "id-2"]}}, {"width": True}
+        )
+
+
+class TestSatelliteImageDataToMongoSaver(SimpleTestCase):
+    @mock.patch("satellite_images.tasks.get_mongo_db_client")
+    def test_data_is_upserted_in_one_write(self, mock_client):
+        data = {"satellite_image_id": "image-id", "width": 10}
+        collection = mock.MagicMock()
+        mock_client.return_value.__getitem__.return_value.__getitem__.return_value = (
+            collection
+        )
+
+        SatelliteImageDataToMongoSaver(data).save_satellite_image_data()
+
+        collection.replace_one.assert_called_once_with(
+            {"satellite_image_id": "image-id"}, data, upsert=True
+        )
+        collection.delete_many.assert_not_called()
+        collection.insert_one.assert_not_called()
+
+    @mock.patch("satellite_images.tasks.SatelliteImage.set_checkpoint")
+    @mock.patch("commons.tasks.RetryingTask.on_failure")
+    @mock.patch("satellite_images.tasks.get_mongo_db_client")
+    def test_save_task_is_retried_on_mongo_error(
+        self, mock_client, mock_on_failure, mock_set_checkpoint
+    ):
+        collection = mock.MagicMock()
+        collection.replace_one.side_effect = [AutoReconnect("down"), None]
+        mock_client.return_value.__getitem__.return_value.__getitem__.return_value = (
+            collection
+        )
+
+        result = save_satellite_image_data_to_mongo.apply(
+            args=({"width": 10}, "image-id")
+        )
+
+        self.assertEqual(result.get(), StatusEnum.COMPLETED.value)
+        self.assertEqual(collection.replace_one.call_count, 2)
+        mock_on_failure.assert_not_called()
+        mock_set_checkpoint.assert_called_once_with(["image-id"], "persisted_at")
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    @mock.patch("satellite_images.tasks.SatelliteImage.set_checkpoint")
+    @mock.patch("satellite_images.tasks.get_mongo_db_client")
+    def test_processing_summary_is_saved(self, mock_client, mock_set_checkpoint):
+        save_satellite_image_data_to_mongo.apply(
+            args=({"width": 10, "Make": "samsung"}, "image-id")
+        )
+
+        mock_set_checkpoint.assert_called_once_with(
+            ["image-id"], "persisted_at", processing_summary={"width": 10}
+        )
+
+
+@mock.patch("satellite_images.tasks.SatelliteImage.set_checkpoint")
+@mock.patch("satellite_images.tasks.chain")
+@mock.patch("satellite_images.tasks.get_details_collection")
+class TestSatelliteImageDataBatchMongoSaver(SimpleTestCase):
+    def _dispatched_steps(self, mock_chain):
+        return [
+            [(task.task, task.args) for task in call.args]
+            for call in mock_chain.call_args_list
+        ]
+
+    def test_batch_is_saved_with_one_bulk_write(
+        self, mock_collection, mock_chain, mock_set_checkpoint
+    ):
+        saver = SatelliteImageDataBatchMongoSaver(max_size=2, max_age=60)
+
+        saver.add({"width": 1}, "id-1", "a@example.com", "a.png", "/tmp/a.png")
+        mock_collection.return_value.bulk_write.assert_not_called()
+        saver.add({"width": 2}, "id-2", "b@example.com", "b.png", "/tmp/b.png")
+
+        mock_collection.return_value.bulk_write.assert_called_once()
+        requests = mock_collection.return_value.bulk_write.call_args.args[0]
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(
+            self._dispatched_steps(mock_chain)[0],
+            [
+                (
+                    send_email_notification.name,
+                    (StatusEnum.COMPLETED.value, "a@example.com", "a.png", "id-1"),
+                ),
+                (set_satellite_image_status.name, ("id-1",)),
+                (remove_satellite_image_file.name, ("/tmp/a.png",)),
+            ],
+        )
+        self.assertEqual(mock_chain.return_value.apply_async.call_count, 2)
+        mock_set_checkpoint.assert_called_once_with(["id-1", "id-2"], "persisted_at")
+
+    def test_not_saved_images_are_retried_one_by_one(
+        self, mock_collection, mock_chain, mock_set_checkpoint
+    ):
+        mock_collection.return_value.bulk_write.side_effect = BulkWriteError(
+            {"writeErrors": [{"index": 1, "errmsg": "error"}]}
+        )
+        saver = SatelliteImageDataBatchMongoSaver(max_size=10, max_age=60)
+
+        saver.add({"width": 1}, "id-1", "a@example.com", "a.png", "/tmp/a.png")
+        saver.add({"width": 2}, "id-2", "b@example.com", "b.png", "/tmp/b.png")
+        saver.flush()
+
+        saved_steps, retried_steps = self._dispatched_steps(mock_chain)
+        self.assertEqual(saved_steps[0][0], send_email_notification.name)
+        self.assertEqual(
+            retried_steps,
+            [
+                (
+                    save_satellite_image_data_to_mongo.name,
+                    ({"width": 2, "satellite_image_id": "id-2"}, "id-2"),
+                ),
+                (send_email_notification.name, ("b@example.com", "b.png", "id-2")),
+                (set_satellite_image_status.name, ("id-2",)),
+                (remove_satellite_image_file.name, ("/tmp/b.png",)),
+            ],
+        )
+        mock_set_checkpoint.assert_called_once_with(["id-1"], "persisted_at")
+        errback = mock_chain.return_value.link_error.call_args.args[0]
+        self.assertEqual(errback.args, ("id-2", "b@example.com", "b.png"))
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    @mock.patch("satellite_images.tasks.SatelliteImage.objects.bulk_update")
+    def test_processing_summaries_are_saved_in_one_update(
+        self, mock_bulk_update, mock_collection, mock_chain, mock_set_checkpoint
+    ):
+        saver = SatelliteImageDataBatchMongoSaver(max_size=10, max_age=60)
+
+        saver.add({"width": 1, "Make": "a"}, "id-1", "a@example.com", "a.png", None)
+        saver.add({"height": 2}, "id-2", "b@example.com", "b.png", None)
+        saver.flush()
+
+        images, fields = mock_bulk_update.call_args.args
+        self.assertEqual(
+            [(image.id, image.processing_summary) for image in images],
+            [("id-1", {"width": 1}), ("id-2", {"height": 2})],
+        )
+        self.assertEqual(fields, ["persisted_at", "updated_at", "processing_summary"])
+        mock_set_checkpoint.assert_not_called()
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from commons.models import StatusEnum
+from django.test import TestCase, override_settings
+from satellite_images.models import PriorityEnum
+from satellite_images.scheduling import fair_share_scheduler
+from satellite_images.tests.test_caches import LOCMEM_CACHES
+from tests.factories.satellite_image import SatelliteImageFactory
+from tests.factories.user import UserFactory
+
+NORMAL = PriorityEnum.NORMAL.value
+HIGH = PriorityEnum.HIGH.value
+LOW = PriorityEnum.LOW.value
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    SATELLITE_IMAGES_FAIR_SHARE_RATE=1,
+    SATELLITE_IMAGES_FAIR_SHARE_BURST=3,
+)
+@mock.patch("satellite_images.scheduling.time.time", return_value=1000.0)
+class TestUploaderFairShareScheduler(TestCase):
+    def setUp(self):
+        fair_share_scheduler.cache.clear()
+
+    def test_images_over_share_are_demoted(self, mock_time):
+        priorities = fair_share_scheduler.get_priorities("uploader", 5)
+
+        self.assertEqual(priorities, [NORMAL] * 3 + [LOW] * 2)
+
+    def test_high_priority_over_share_is_lower_than_normal(self, mock_time):
+        priorities = fair_share_scheduler.get_priorities("uploader", 4, HIGH)
+
+        self.assertEqual(priorities, [HIGH] * 3 + [HIGH - NORMAL])
+
+    def test_uploaders_have_separate_shares(self, mock_time):
+        fair_share_scheduler.get_priorities("big-uploader", 1000)
+
+        priorities = fair_share_scheduler.get_priorities("other-uploader", 1)
+
+        self.assertEqual(priorities, [NORMAL])
+
+    def test_share_is_refilled_over_time(self, mock_time):
+        fair_share_scheduler.get_priorities("uploader", 3)
+        self.assertEqual(fair_share_scheduler.get_priorities("uploader", 1), [LOW])
+
+        mock_time.return_value += 2.5
+
+        priorities = fair_share_scheduler.get_priorities("uploader", 3)
+        self.assertEqual(priorities, [NORMAL] * 2 + [LOW])
+
+    @override_settings(SATELLITE_IMAGES_FAIR_SHARE_RATE=0)
+    def test_share_without_rate_is_not_refilled(self, mock_time):
+        fair_share_scheduler.get_priorities("uploader", 3)
+
+        mock_time.return_value += 1000
+
+        priorities = fair_share_scheduler.get_priorities("uploader", 1)
+        self.assertEqual(priorities, [LOW])
+
+    def test_get_queue_depths(self, mock_time):
+        uploader = UserFactory(username="uploader")
+        SatelliteImageFactory.create_batch(2, uploader=uploader)
+        SatelliteImageFactory(uploader=uploader, status=StatusEnum.PROCESSING.value)
+        SatelliteImageFactory(uploader=uploader, status=StatusEnum.COMPLETED.value)
+        SatelliteImageFactory(
+            uploader=UserFactory(username="other"), status=StatusEnum.FAILED.value
+        )
+
+        self.assertEqual(fair_share_scheduler.get_queue_depths(), {"uploader": 3})
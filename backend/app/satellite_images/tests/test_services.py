@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from parameterized import parameterized
+from satellite_images import tasks
+from satellite_images.models import PriorityEnum
+from satellite_images.services import SatelliteImageService
+
+
+class TestSatelliteImageService(SimpleTestCase):
+    @mock.patch("satellite_images.services.chain")
+    def test_handle_service_does_not_wait_for_result(self, mock_chain):
+        service = SatelliteImageService(
+            "image-id", "/tmp/image.png", "image.png", "recipient@example.com"
+        )
+
+        service.handle_service()
+
+        handler = mock_chain.return_value
+        handler.apply_async.assert_called_once()
+        handler.apply_async.return_value.get.assert_not_called()
+
+        errback = handler.link_error.call_args.args[0]
+        self.assertEqual(
+            errback.task, tasks.handle_satellite_image_processing_failure.name
+        )
+        self.assertEqual(
+            errback.args, ("image-id", "recipient@example.com", "image.png")
+        )
+
+    @override_settings(SATELLITE_IMAGES_PYRAMID_SIZES=[])
+    @mock.patch("satellite_images.services.chain")
+    def test_handle_service_without_pyramid(self, mock_chain):
+        service = SatelliteImageService(
+            "image-id", "/tmp/image.png", "image.png", "recipient@example.com"
+        )
+
+        service.handle_service()
+
+        self.assertEqual(
+            [task.task for task in mock_chain.call_args.args],
+            [
+                tasks.process_satellite_image.name,
+                tasks.save_satellite_image_data_to_mongo.name,
+                tasks.send_email_notification.name,
+                tasks.set_satellite_image_status.name,
+                tasks.remove_satellite_image_file.name,
+            ],
+        )
+
+    @override_settings(SATELLITE_IMAGES_MONGO_BATCH_SIZE=100)
+    @mock.patch("satellite_images.services.chain")
+    def test_handle_service_in_batch_mode(self, mock_chain):
+        service = SatelliteImageService(
+            "image-id", "/tmp/image.png", "image.png", "recipient@example.com"
+        )
+
+        service.handle_service()
+
+        self.assertEqual(
+            [task.task for task in mock_chain.call_args.args],
+            [
+                tasks.generate_satellite_image_pyramid.name,
+                tasks.process_satellite_image.name,
+                tasks.buffer_satellite_image_data_to_mongo.name,
+            ],
+        )
+
+    @override_settings(SATELLITE_IMAGES_PIPELINE_MODE="fused")
+    def test_handle_service_in_fused_mode(self):
+        service = SatelliteImageService(
+            "image-id", "/tmp/image.png", "image.png", "recipient@example.com", "hash"
+        )
+
+        handler = service.get_signature()
+
+        self.assertEqual(handler.task, tasks.run_satellite_image_pipeline.name)
+        self.assertEqual(
+            handler.args,
+            (
+                "/tmp/image.png",
+                "image-id",
+                "recipient@example.com",
+                "image.png",
+                "hash",
+            ),
+        )
+        self.assertEqual(
+            handler.options["link_error"][0].task,
+            tasks.handle_satellite_image_processing_failure.name,
+        )
+
+    @mock.patch("satellite_images.services.chain")
+    def test_handle_service_sends_steps_with_priority(self, mock_chain):
+        service = SatelliteImageService(
+            "image-id",
+            "/tmp/image.png",
+            "image.png",
+            "recipient@example.com",
+            priority=PriorityEnum.HIGH.value,
+        )
+
+        service.handle_service()
+
+        self.assertEqual(
+            {task.options["priority"] for task in mock_chain.call_args.args},
+            {PriorityEnum.HIGH.value},
+        )
+
+    @parameterized.expand(
+        [
+            (
+                ["extracted_at"],
+                [
+                    (tasks.process_satellite_image.name, 3),
+                    (tasks.save_satellite_image_data_to_mongo.name, 1),
+                    (tasks.send_email_notification.name, 3),
+                    (tasks.set_satellite_image_status.name, 1),
+                    (tasks.remove_satellite_image_file.name, 1),
+                ],
+            ),
+            (
+                ["extracted_at", "persisted_at"],
+                [
+                    (tasks.send_email_notification.name, 4),
+                    (tasks.set_satellite_image_status.name, 1),
+                    (tasks.remove_satellite_image_file.name, 1),
+                ],
+            ),
+            (
+                ["extracted_at", "persisted_at", "notified_at", "finalized_at"],
+                [(tasks.remove_satellite_image_file.name, 2)],
+            ),
+        ]
+    )
+    @override_settings(
+        SATELLITE_IMAGES_PIPELINE_MODE="fused", SATELLITE_IMAGES_MONGO_BATCH_SIZE=100
+    )
+    @mock.patch("satellite_images.services.chain")
+    def test_resumed_pipeline_skips_completed_stages(
+        self, checkpoints, expected_steps, mock_chain
+    ):
+        service = SatelliteImageService(
+            "image-id",
+            "/tmp/image.png",
+            "image.png",
+            "recipient@example.com",
+            checkpoints=checkpoints,
+        )
+
+        service.handle_service()
+
+        steps = mock_chain.call_args.args
+        self.assertEqual(
+            [(step.task, len(step.args)) for step in steps], expected_steps
+        )
+        self.assertTrue(steps[0].immutable)
+        self.assertEqual(steps[0].args[0] == "COMPLETED", len(checkpoints) > 1)
@@ -1,18 +1,57 @@
 import os
+import struct
+import tempfile
+import zlib
+from unittest import mock
 
+from app.celery import app as celery_app
+from commons.mail import PooledMailConnection
 from commons.models import StatusEnum
 from django.core import mail
-from django.test import SimpleTestCase, TestCase
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 from parameterized import parameterized
-from PIL import Image
+from PIL import Image, ImageFile, UnidentifiedImageError
+from pymongo.errors import AutoReconnect
+from satellite_images.caches import metadata_cache
 from satellite_images.tasks import (
+    SatelliteImageNotificationDigest,
     SatelliteImageProcessor,
+    SatelliteImagePyramidGenerator,
+    generate_satellite_image_pyramid,
+    handle_satellite_image_processing_failure,
+    process_satellite_image,
+    remove_satellite_image_file,
+    run_satellite_image_pipeline,
+    save_satellite_image_data_to_mongo,
     send_email_notification,
+    send_email_notification_digest,
     set_satellite_image_status,
 )
+from satellite_images.tests.test_caches import LOCMEM_CACHES
 from tests.factories.satellite_image import SatelliteImageFactory
 
 
+def write_png_header(path, width, height):
+    """
+    Write PNG of given size with one row of pixel data only, it can be
+    opened but not decoded.
+    """
+
+    def chunk(chunk_type, data):
+        crc = zlib.crc32(chunk_type + data)
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        )
+        file.write(chunk(b"IDAT", zlib.compress(bytes(width + 1))))
+        file.write(chunk(b"IEND", b""))
+
+
 class TestSatelliteImageProcessor(SimpleTestCase):
     def test_success_jpg(self):
         image_path = os.path.join(os.path.dirname(__file__), "fixtures/pic.jpg")
@@ -26,16 +65,44 @@ class TestSatelliteImageProcessor(SimpleTestCase):
                 "width": 584,
                 "height": 560,
                 "format": "JPEG",
-                "ResolutionUnit": "2",
-                "ExifOffset": "202",
+                "ResolutionUnit": 2,
                 "Make": "samsung",
                 "Model": "SM-G930F",
                 "Software": "G930FXXS4ESAH",
-                "Orientation": "1",
+                "Orientation": 1,
                 "DateTime": "2019:03:10 09:39:36",
-                "YCbCrPositioning": "1",
-                "XResolution": "72.0",
-                "YResolution": "72.0",
+                "YCbCrPositioning": 1,
+                "XResolution": 72.0,
+                "YResolution": 72.0,
+                # Exif IFD
+                "ExifVersion": "0220",
+                "ComponentsConfiguration": "01020300",
+                "ShutterSpeedValue": 5.06,
+                "DateTimeOriginal": "2019:03:10 09:39:36",
+                "DateTimeDigitized": "2019:03:10 09:39:36",
+                "ApertureValue": 1.531,
+                "BrightnessValue": 1.65,
+                "ExposureBiasValue": 0.0,
+                "MaxApertureValue": 1.531,
+                "MeteringMode": 2,
+                "Flash": 0,
+                "FocalLength": 2.1,
+                "ColorSpace": 1,
+                "ExifImageWidth": 2592,
+                "WhiteBalance": 0,
+                "SubsecTime": "0167",
+                "SubsecTimeOriginal": "0167",
+                "SubsecTimeDigitized": "0167",
+                "ExifImageHeight": 1944,
+                "ExposureTime": 0.030303030303030304,
+                "FocalLengthIn35mmFilm": 21,
+                "FNumber": 1.7,
+                "ImageUniqueID": "I05LLIA00PM",
+                "ExposureProgram": 2,
+                "ISOSpeedRatings": 100,
+                "ExposureMode": 0,
+                "FlashPixVersion": "0100",
+                "SceneCaptureType": 0,
             },
         )
 
@@ -48,6 +115,86 @@ class TestSatelliteImageProcessor(SimpleTestCase):
 
         self.assertEqual(result, {"format": "PNG", "height": 636, "width": 720})
 
+    def test_success_geotiff_has_footprint(self):
+        with tempfile.NamedTemporaryFile(suffix=".tif") as image_file:
+            Image.new("L", (200, 100)).save(
+                image_file,
+                "TIFF",
+                tiffinfo={
+                    33550: (0.01, 0.01, 0.0),
+                    33922: (0.0, 0.0, 0.0, 20.0, 50.0, 0.0),
+                    34735: (1, 1, 0, 1, 1024, 0, 1, 2),
+                },
+            )
+            image_file.flush()
+            processor = SatelliteImageProcessor(
+                image_path=image_file.name, remove_after_processing=False
+            )
+            result = processor.get_processed_satellite_image_data()
+
+        self.assertEqual(result["format"], "TIFF")
+        self.assertEqual(
+            result["location"],
+            {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [20.0, 49.0],
+                        [22.0, 49.0],
+                        [22.0, 50.0],
+                        [20.0, 50.0],
+                        [20.0, 49.0],
+                    ]
+                ],
+            },
+        )
+
+    @parameterized.expand(["fixtures/pic.jpg", "fixtures/img.png"])
+    def test_pixel_data_is_not_loaded(self, fixture):
+        image_path = os.path.join(os.path.dirname(__file__), fixture)
+        processor = SatelliteImageProcessor(
+            image_path=image_path, remove_after_processing=False
+        )
+
+        with mock.patch.object(
+            ImageFile.ImageFile, "load", side_effect=AssertionError("loaded")
+        ):
+            result = processor.get_processed_satellite_image_data()
+
+        self.assertIn("width", result)
+
+    def test_file_is_closed_after_processing(self):
+        image_path = os.path.join(os.path.dirname(__file__), "fixtures/pic.jpg")
+        processor = SatelliteImageProcessor(
+            image_path=image_path, remove_after_processing=False
+        )
+
+        opened_files = []
+
+        def tracked_open(*args, **kwargs):
+            opened_files.append(open(*args, **kwargs))
+            return opened_files[-1]
+
+        with mock.patch("satellite_images.tasks.open", tracked_open, create=True):
+            processor.get_processed_satellite_image_data()
+
+        self.assertEqual(len(opened_files), 1)
+        self.assertTrue(opened_files[0].closed)
+
+    def test_success_over_decompression_bomb_limit(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_big.png"
+        )
+        write_png_header(image_path, 30_000, 20_000)
+        self.addCleanup(os.remove, image_path)
+        processor = SatelliteImageProcessor(
+            image_path=image_path, remove_after_processing=False
+        )
+
+        result = processor.get_processed_satellite_image_data()
+
+        self.assertEqual(result, {"width": 30_000, "height": 20_000, "format": "PNG"})
+
     def test_success_removing_after_processing(self):
         image_path = os.path.join(
             os.path.dirname(__file__), "fixtures/test_img_to_remove.png"
@@ -63,6 +210,131 @@ class TestSatelliteImageProcessor(SimpleTestCase):
         self.assertFalse(os.path.exists(image_path))
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestGenerateSatelliteImagePyramid(TestCase):
+    def test_levels_smaller_than_image_are_generated(self):
+        image = SatelliteImageFactory()
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_pyramid.jpg"
+        )
+        Image.new("RGB", (3000, 1500), color="white").save(image_path, "JPEG")
+
+        with self.settings(SATELLITE_IMAGES_PYRAMID_SIZES=[256, 1024, 4096]):
+            result = generate_satellite_image_pyramid(image_path, str(image.id))
+        os.remove(image_path)
+
+        self.assertEqual(
+            result,
+            {
+                "1024": f"pyramids/{image.id}/1024.jpg",
+                "256": f"pyramids/{image.id}/256.jpg",
+            },
+        )
+        with default_storage.open(result["1024"]) as preview:
+            self.assertEqual(Image.open(preview).size, (1024, 512))
+        with default_storage.open(result["256"]) as preview:
+            self.assertEqual(Image.open(preview).size, (256, 128))
+        image.refresh_from_db()
+        self.assertEqual(image.pyramid, result)
+
+    def test_16_bit_image_is_converted(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_pyramid_16_bit.tif"
+        )
+        Image.new("I;16", (600, 400), color=1000).save(image_path, "TIFF")
+        self.addCleanup(os.remove, image_path)
+        generator = SatelliteImagePyramidGenerator(image_path, "image-id", [256])
+
+        result = generator.generate()
+
+        with default_storage.open(result["256"]) as preview:
+            self.assertEqual(Image.open(preview).size, (256, 171))
+
+    def test_failed_preview_is_logged(self):
+        image = SatelliteImageFactory(pyramid={"256": "pyramids/stale/256.jpg"})
+
+        with (
+            mock.patch.object(
+                SatelliteImagePyramidGenerator, "generate", side_effect=ValueError
+            ),
+            self.assertLogs("satellite_images.tasks", "ERROR"),
+        ):
+            result = generate_satellite_image_pyramid("/tmp/image.png", str(image.id))
+
+        self.assertEqual(result, {})
+        image.refresh_from_db()
+        self.assertEqual(image.pyramid, {})
+
+    def test_pyramid_of_identical_image_is_reused(self):
+        pyramid = {"256": "pyramids/original/256.jpg"}
+        SatelliteImageFactory(
+            content_hash="hash", extracted_at=timezone.now(), pyramid=pyramid
+        )
+        image = SatelliteImageFactory(content_hash="hash")
+
+        with mock.patch.object(
+            SatelliteImagePyramidGenerator, "generate"
+        ) as mock_generate:
+            result = generate_satellite_image_pyramid(
+                "/tmp/image.png", str(image.id), "hash"
+            )
+
+        mock_generate.assert_not_called()
+        self.assertEqual(result, pyramid)
+        image.refresh_from_db()
+        self.assertEqual(image.pyramid, pyramid)
+
+    def test_image_over_preview_max_pixels_is_skipped(self):
+        image = SatelliteImageFactory()
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_pyramid_big.png"
+        )
+        write_png_header(image_path, 30_000, 20_000)
+        self.addCleanup(os.remove, image_path)
+
+        with self.assertLogs("satellite_images.tasks", "WARNING"):
+            result = generate_satellite_image_pyramid(image_path, str(image.id))
+
+        self.assertEqual(result, {})
+        image.refresh_from_db()
+        self.assertEqual(image.pyramid, {})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestProcessSatelliteImage(SimpleTestCase):
+    def setUp(self):
+        metadata_cache.cache.clear()
+
+    def _create_image(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_duplicate.png"
+        )
+        Image.new("RGB", (2, 3), color="white").save(image_path, "PNG")
+        return image_path
+
+    @mock.patch("satellite_images.caches.get_details_collection")
+    def test_duplicate_skips_extraction(self, mock_collection):
+        mock_collection.return_value.find_one.return_value = None
+
+        result = process_satellite_image(self._create_image(), "hash")
+        self.assertEqual(
+            result, {"width": 2, "height": 3, "format": "PNG", "content_hash": "hash"}
+        )
+
+        image_path = self._create_image()
+        with mock.patch.object(
+            SatelliteImageProcessor, "_process_satellite_image"
+        ) as mock_process:
+            duplicate_result = process_satellite_image(image_path, "hash")
+
+        mock_process.assert_not_called()
+        self.assertEqual(duplicate_result, result)
+        # image is removed by the last step of pipeline
+        self.assertTrue(os.path.exists(image_path))
+        os.remove(image_path)
+        self.assertEqual(metadata_cache.get_stats(), {"hits": 1, "misses": 1})
+
+
 class TestSendEmailNotification(SimpleTestCase):
     def test_send_successful_msg(self):
         result = send_email_notification(
@@ -89,6 +361,119 @@ class TestSendEmailNotification(SimpleTestCase):
         self.assertEqual(result, StatusEnum.FAILED.value)
 
 
+@override_settings(SATELLITE_IMAGES_NOTIFICATION_DIGEST_WINDOW=60)
+class TestSendEmailNotificationDigest(SimpleTestCase):
+    def setUp(self):
+        self.digest = SatelliteImageNotificationDigest(max_size=100, window=60)
+        patcher = mock.patch(
+            "satellite_images.tasks.get_notification_digest", return_value=self.digest
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # digest task runs right away
+        patcher = mock.patch.object(
+            send_email_notification_digest,
+            "delay",
+            side_effect=send_email_notification_digest,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_digest_per_recipient(self):
+        send_email_notification(StatusEnum.COMPLETED.value, "a@example.com", "a1.png")
+        send_email_notification(StatusEnum.FAILED.value, "a@example.com", "a2.png")
+        send_email_notification(StatusEnum.COMPLETED.value, "b@example.com", "b1.png")
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.digest.flush()
+
+        self.assertEqual(len(mail.outbox), 2)
+        digest, single = mail.outbox
+        self.assertEqual(digest.to, ["a@example.com"])
+        self.assertEqual(digest.subject, "Tasks Completed")
+        self.assertIn("processing of 2 images", digest.body)
+        self.assertIn("<strong>a1.png:</strong> processed successfully", digest.body)
+        self.assertIn("<strong>a2.png:</strong> processed unsuccessfully", digest.body)
+        self.assertEqual(single.to, ["b@example.com"])
+        self.assertEqual(single.subject, "Task Completed")
+        self.assertIn("happy", single.body)
+
+    @mock.patch("commons.mail.get_connection")
+    def test_notifications_share_one_connection(self, mock_get_connection):
+        with mock.patch(
+            "satellite_images.tasks.mail_connection", PooledMailConnection()
+        ):
+            for index in range(3):
+                send_email_notification(
+                    StatusEnum.COMPLETED.value, f"{index}@example.com", "img.png"
+                )
+            self.digest.flush()
+
+        mock_get_connection.assert_called_once()
+        send_messages = mock_get_connection.return_value.send_messages
+        send_messages.assert_called_once()
+        self.assertEqual(len(send_messages.call_args.args[0]), 3)
+
+
+@override_settings(SATELLITE_IMAGES_NOTIFICATION_DIGEST_WINDOW=60)
+@mock.patch.object(send_email_notification_digest, "delay")
+class TestSendEmailNotificationDigestCheckpoint(TestCase):
+    def setUp(self):
+        self.digest = SatelliteImageNotificationDigest(max_size=100, window=60)
+        patcher = mock.patch(
+            "satellite_images.tasks.get_notification_digest", return_value=self.digest
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _buffer_notification(self, image, mock_delay):
+        send_email_notification(
+            StatusEnum.COMPLETED.value, "a@example.com", image.title, str(image.id)
+        )
+        self.digest.flush()
+        image.refresh_from_db()
+        self.assertIsNone(image.notified_at)
+        return mock_delay.call_args.args[0]
+
+    def test_image_is_notified_once_digest_is_sent(self, mock_delay):
+        image = SatelliteImageFactory()
+        notifications = self._buffer_notification(image, mock_delay)
+
+        send_email_notification_digest(notifications)
+
+        self.assertEqual(len(mail.outbox), 1)
+        image.refresh_from_db()
+        self.assertIsNotNone(image.notified_at)
+
+    def test_failed_digest_is_retried(self, mock_delay):
+        image = SatelliteImageFactory()
+        notifications = self._buffer_notification(image, mock_delay)
+
+        with (
+            mock.patch("satellite_images.tasks.mail_connection") as mock_connection,
+            self.assertRaises(OSError),
+        ):
+            mock_connection.send_messages.side_effect = OSError("smtp down")
+            send_email_notification_digest(notifications)
+
+        image.refresh_from_db()
+        self.assertIsNone(image.notified_at)
+
+
+class TestRemoveSatelliteImageFile(SimpleTestCase):
+    def test_removed_image_is_skipped(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_to_remove_twice.png"
+        )
+        Image.new("RGB", (2, 3), color="white").save(image_path, "PNG")
+
+        for _ in range(2):
+            result = remove_satellite_image_file(StatusEnum.COMPLETED.value, image_path)
+
+            self.assertEqual(result, StatusEnum.COMPLETED.value)
+            self.assertFalse(os.path.exists(image_path))
+
+
 class TestSetSatelliteImageStatus(TestCase):
     @parameterized.expand([StatusEnum.COMPLETED.value, StatusEnum.FAILED.value])
     def test_success_(self, next_status):
@@ -99,3 +484,217 @@ class TestSetSatelliteImageStatus(TestCase):
 
         image.refresh_from_db()
         self.assertEqual(next_status, image.status)
+
+    def test_one_conditional_update(self):
+        image = SatelliteImageFactory()
+
+        with self.assertNumQueries(1):
+            set_satellite_image_status(StatusEnum.COMPLETED.value, str(image.id))
+
+        image.refresh_from_db()
+        self.assertIsNotNone(image.finalized_at)
+
+    def test_completed_image_is_not_failed(self):
+        image = SatelliteImageFactory(status=StatusEnum.COMPLETED.value)
+
+        result = set_satellite_image_status(StatusEnum.FAILED.value, str(image.id))
+
+        self.assertEqual(result, StatusEnum.FAILED.value)
+        image.refresh_from_db()
+        self.assertEqual(image.status, StatusEnum.COMPLETED.value)
+        self.assertIsNone(image.finalized_at)
+
+    def test_processing_is_set_when_extraction_starts(self):
+        image = SatelliteImageFactory()
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_processing.png"
+        )
+        Image.new("RGB", (2, 3), color="white").save(image_path, "PNG")
+        self.addCleanup(os.remove, image_path)
+
+        with mock.patch.object(
+            SatelliteImageProcessor,
+            "get_processed_satellite_image_data",
+            side_effect=UnidentifiedImageError,
+        ):
+            with self.assertRaises(UnidentifiedImageError):
+                process_satellite_image(image_path, None, str(image.id))
+
+        image.refresh_from_db()
+        self.assertEqual(image.status, StatusEnum.PROCESSING.value)
+
+
+@override_settings(SATELLITE_IMAGES_PYRAMID_SIZES=[])
+class TestRunSatelliteImagePipeline(TestCase):
+    @mock.patch("satellite_images.tasks.send_email_notification.delay")
+    @mock.patch("satellite_images.tasks.SatelliteImageDataToMongoSaver")
+    def test_steps_run_in_one_task(self, mock_saver, mock_send_email_notification):
+        image = SatelliteImageFactory()
+        image_path = os.path.join(
+            os.path.dirname(__file__), "fixtures/test_img_fused.png"
+        )
+        Image.new("RGB", (2, 3), color="white").save(image_path, "PNG")
+
+        result = run_satellite_image_pipeline(
+            image_path, str(image.id), "recipient@example.com", image.title
+        )
+
+        self.assertEqual(result, StatusEnum.COMPLETED.value)
+        self.assertEqual(
+            mock_saver.call_args.args[0],
+            {
+                "width": 2,
+                "height": 3,
+                "format": "PNG",
+                "satellite_image_id": str(image.id),
+            },
+        )
+        image.refresh_from_db()
+        self.assertEqual(image.status, StatusEnum.COMPLETED.value)
+        mock_send_email_notification.assert_called_once_with(
+            StatusEnum.COMPLETED.value,
+            "recipient@example.com",
+            image.title,
+            str(image.id),
+        )
+        self.assertIsNotNone(image.extracted_at)
+        self.assertIsNotNone(image.persisted_at)
+        self.assertIsNotNone(image.finalized_at)
+        self.assertFalse(os.path.exists(image_path))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("satellite_images.tasks.send_email_notification.delay")
+class TestHandleSatelliteImageProcessingFailure(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(remove_satellite_image_file, "delay")
+        self.mock_remove_delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _handle_failure(self, image, request=None, exc=None):
+        handle_satellite_image_processing_failure(
+            request or mock.Mock(id="task-id"),
+            exc or ValueError("boom"),
+            None,
+            str(image.id),
+            "recipient@example.com",
+            image.title,
+        )
+
+    def test_sets_failed_status_and_queues_failed_email(self, mock_delay):
+        image = SatelliteImageFactory(status=StatusEnum.PROCESSING.value)
+
+        self._handle_failure(image)
+
+        image.refresh_from_db()
+        self.assertEqual(StatusEnum.FAILED.value, image.status)
+        self.assertIsNotNone(image.finalized_at)
+        mock_delay.assert_called_once_with(
+            StatusEnum.FAILED.value, "recipient@example.com", image.title, str(image.id)
+        )
+
+    def test_image_of_failed_processing_is_removed(self, mock_delay):
+        image = SatelliteImageFactory(
+            status=StatusEnum.PROCESSING.value, image="images/failed.png"
+        )
+
+        self._handle_failure(image)
+
+        self.mock_remove_delay.assert_called_once_with(
+            StatusEnum.FAILED.value, default_storage.path("images/failed.png")
+        )
+
+    def test_status_is_set_when_email_can_not_be_queued(self, mock_delay):
+        mock_delay.side_effect = OSError("broker down")
+        image = SatelliteImageFactory(status=StatusEnum.PROCESSING.value)
+
+        with self.assertRaises(OSError):
+            self._handle_failure(image)
+
+        image.refresh_from_db()
+        self.assertEqual(StatusEnum.FAILED.value, image.status)
+
+    def test_completed_image_is_left_completed(self, mock_delay):
+        image = SatelliteImageFactory(status=StatusEnum.COMPLETED.value)
+
+        self._handle_failure(image)
+
+        image.refresh_from_db()
+        self.assertEqual(StatusEnum.COMPLETED.value, image.status)
+        mock_delay.assert_not_called()
+        self.mock_remove_delay.assert_not_called()
+
+    def test_dead_lettered_job_is_left_unfinished(self, mock_delay):
+        image = SatelliteImageFactory(status=StatusEnum.PROCESSING.value)
+        request = mock.Mock(
+            id="task-id",
+            task=save_satellite_image_data_to_mongo.name,
+            called_directly=False,
+            delivery_info={"routing_key": "satellite_images.io"},
+            retries=save_satellite_image_data_to_mongo.max_retries,
+        )
+
+        self._handle_failure(image, request, AutoReconnect("down"))
+
+        image.refresh_from_db()
+        self.assertEqual(StatusEnum.PROCESSING.value, image.status)
+        mock_delay.assert_not_called()
+        # kept for replay
+        self.mock_remove_delay.assert_not_called()
+
+    @mock.patch("celery.canvas.Signature.apply_async")
+    def test_missing_image_is_not_dead_lettered(self, mock_apply_async, mock_delay):
+        image = SatelliteImageFactory()
+
+        result = process_satellite_image.apply(
+            args=("/nonexistent.png", None, str(image.id))
+        )
+
+        self.assertIsInstance(result.result, FileNotFoundError)
+        mock_apply_async.assert_not_called()
+
+
+class TestTaskRouting(SimpleTestCase):
+    @parameterized.expand(
+        [
+            (process_satellite_image, "satellite_images.cpu", True),
+            (generate_satellite_image_pyramid, "satellite_images.cpu", True),
+            (run_satellite_image_pipeline, "satellite_images.cpu", True),
+            (send_email_notification, "satellite_images.io", True),
+            (send_email_notification_digest, "satellite_images.io", True),
+            (set_satellite_image_status, "satellite_images.db", True),
+        ]
+    )
+    def test_task_queue(self, task, queue, acks_late):
+        route = celery_app.amqp.router.route({}, task.name)
+
+        self.assertEqual(route["queue"].name, queue)
+        self.assertEqual(route["queue"].routing_key, queue)
+        self.assertEqual(task.acks_late, acks_late)
+
+    def _create_worker(self, queues):
+        # worker selects consumed queues of the app, restored after test
+        with mock.patch.object(celery_app.amqp.queues, "_consume_from", None):
+            worker = celery_app.WorkController(
+                queues=queues, pool_cls="solo", prefetch_multiplier=4
+            )
+        return worker
+
+    @parameterized.expand(
+        [
+            ("satellite_images.cpu", 1),
+            (["satellite_images.io", "satellite_images.db"], 16),
+            ("satellite_images.db,celery", 32),
+        ]
+    )
+    def test_worker_prefetch_of_consumed_queues(self, queues, prefetch_multiplier):
+        worker = self._create_worker(queues)
+
+        self.assertEqual(worker.prefetch_multiplier, prefetch_multiplier)
+        self.assertEqual(worker.consumer.prefetch_multiplier, prefetch_multiplier)
+
+    def test_worker_prefetch_of_default_queue_untouched(self):
+        worker = self._create_worker(["celery"])
+
+        self.assertEqual(worker.prefetch_multiplier, 4)
+        self.assertEqual(worker.consumer.prefetch_multiplier, 4)
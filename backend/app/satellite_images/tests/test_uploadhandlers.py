@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from PIL import Image
+from satellite_images.uploadhandlers import (
+    StoredUploadedFile,
+    StreamingImageUploadHandler,
+    validate_image_format,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestStreamingImageUploadHandler(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().post("/")
+        self.request.user = User(username="uploader")
+
+    def _upload(self, handler, file_name, content, chunk_size=1024):
+        try:
+            handler.new_file("image", file_name, "image/png", len(content))
+        except StopFutureHandlers:
+            pass
+
+        returned_chunks = []
+        for start in range(0, len(content), chunk_size):
+            returned_chunks.append(
+                handler.receive_data_chunk(content[start : start + chunk_size], start)
+            )
+        return returned_chunks, handler.file_complete(len(content))
+
+    def test_image_is_streamed_to_final_location(self):
+        with open(os.path.join(FIXTURES_DIR, "img.png"), "rb") as image:
+            content = image.read()
+        handler = StreamingImageUploadHandler(self.request)
+
+        returned_chunks, uploaded_file = self._upload(handler, "img.png", content)
+
+        self.assertTrue(all(chunk is None for chunk in returned_chunks))
+        self.assertIsInstance(uploaded_file, StoredUploadedFile)
+        self.assertTrue(uploaded_file.stored_name.startswith("images/"))
+        self.assertEqual(uploaded_file.checksum, hashlib.sha256(content).hexdigest())
+        self.assertEqual(uploaded_file.sniffed_format, "PNG")
+        with default_storage.open(uploaded_file.stored_name, "rb") as stored:
+            self.assertEqual(stored.read(), content)
+        uploaded_file.close()
+
+    def test_not_image_is_left_to_next_handlers(self):
+        handler = StreamingImageUploadHandler(self.request)
+
+        handler.new_file("file", "notes.txt", "text/plain", 4)
+
+        self.assertEqual(handler.receive_data_chunk(b"text", 0), b"text")
+        self.assertIsNone(handler.file_complete(4))
+
+    def test_interrupted_upload_is_removed(self):
+        handler = StreamingImageUploadHandler(self.request)
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file("image", "img.png", "image/png", 10)
+        handler.receive_data_chunk(b"\x89PNG", 0)
+
+        handler.upload_interrupted()
+
+        self.assertFalse(default_storage.exists(handler.stored_name))
+
+    def test_anonymous_upload_is_left_to_next_handlers(self):
+        self.request.user = AnonymousUser()
+        handler = StreamingImageUploadHandler(self.request)
+
+        handler.new_file("image", "img.png", "image/png", 4)
+
+        self.assertEqual(handler.receive_data_chunk(b"\x89PNG", 0), b"\x89PNG")
+        self.assertIsNone(handler.file_complete(4))
+
+
+class TestValidateImageFormat(SimpleTestCase):
+    def test_image_matching_extension(self):
+        with open(os.path.join(FIXTURES_DIR, "img.png"), "rb") as image:
+            validate_image_format(SimpleUploadedFile("img.png", image.read()))
+
+    def test_geotiff_matching_extension(self):
+        with tempfile.NamedTemporaryFile(suffix=".tif") as image_file:
+            Image.new("I;16", (4, 4)).save(image_file, "TIFF")
+            image_file.seek(0)
+            content = image_file.read()
+
+        for name in ["img.tif", "img.tiff"]:
+            with self.subTest(name=name):
+                validate_image_format(SimpleUploadedFile(name, content))
+
+    def test_image_not_matching_extension(self):
+        with open(os.path.join(FIXTURES_DIR, "img.png"), "rb") as image:
+            content = image.read()
+
+        for name in ["img.jpg", "img.txt"]:
+            with self.subTest(name=name), self.assertRaises(ValidationError):
+                validate_image_format(SimpleUploadedFile(name, content))
@@ -1,14 +1,42 @@
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
 from unittest import mock
 
+from asgiref.sync import sync_to_async
+from commons.models import StatusEnum
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from parameterized import parameterized
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
+from satellite_images.caches import list_cache
+from satellite_images.events import format_event
+from satellite_images.filters import (
+    DetailsMatchingQuerySet,
+    SatelliteImageDetailsFilter,
+)
+from satellite_images.models import PriorityEnum, SatelliteImageBatch
+from satellite_images.scheduling import fair_share_scheduler
+from satellite_images.tasks import set_satellite_image_status
+from satellite_images.tests.test_caches import LOCMEM_CACHES
+from satellite_images.views import SatelliteImageEventsView
 from tests.factories.satellite_image import SatelliteImageFactory
 from tests.factories.user import UserFactory
 
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class TestSatelliteImageViewSet(APITestCase):
     def setUp(self):
+        list_cache.cache.clear()
         self.user = UserFactory()
         self.client.force_login(self.user)
 
@@ -16,7 +44,9 @@ class TestSatelliteImageViewSet(APITestCase):
     def test_menu_list_returns_only_users_data_with_mongo_data(self, mock_get_details):
         not_users_img = SatelliteImageFactory()
         img1 = SatelliteImageFactory(uploader=self.user)
-        img2 = SatelliteImageFactory(uploader=self.user)
+        img2 = SatelliteImageFactory(
+            uploader=self.user, pyramid={"256": "pyramids/img2/256.jpg"}
+        )
 
         mock_get_details.return_value = {
             str(not_users_img.id): {
@@ -38,9 +68,9 @@ class TestSatelliteImageViewSet(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data["results"]), 3)
         self.assertEqual(
-            response.data,
+            response.data["results"],
             [
                 {
                     "id": str(not_users_img.id),
@@ -53,6 +83,7 @@ class TestSatelliteImageViewSet(APITestCase):
                         "some_property": 456,
                         "satellite_image_id": str(not_users_img.id),
                     },
+                    "previews": {},
                 },
                 {
                     "id": str(img1.id),
@@ -63,6 +94,7 @@ class TestSatelliteImageViewSet(APITestCase):
                         "abc": 123,
                         "satellite_image_id": str(img1.id),
                     },
+                    "previews": {},
                 },
                 {
                     "id": str(img2.id),
@@ -75,13 +107,821 @@ class TestSatelliteImageViewSet(APITestCase):
                         "format": "PNG",
                         "satellite_image_id": str(img2.id),
                     },
+                    "previews": {
+                        "256": "http://testserver/media/pyramids/img2/256.jpg",
+                    },
                 },
             ],
         )
 
+    @mock.patch("satellite_images.views.SatelliteImageViewSet._get_details")
+    def test_menu_list_fetches_details_only_for_current_page(self, mock_get_details):
+        mock_get_details.return_value = {}
+        images = [SatelliteImageFactory(uploader=self.user) for _ in range(3)]
+        url = reverse("satellite_images:satellite_images-list")
+
+        response = self.client.get(url, {"page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [str(images[0].id), str(images[1].id)],
+        )
+        mock_get_details.assert_called_once_with([str(images[0].id), str(images[1].id)])
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(images[2].id)]
+        )
+        mock_get_details.assert_called_with([str(images[2].id)])
+
+    @mock.patch("satellite_images.views.get_details_collection")
+    def test_menu_list_fields_are_projected_in_mongo(self, mock_collection):
+        image = SatelliteImageFactory(uploader=self.user)
+        find = mock_collection.return_value.find
+        find.return_value = [{"satellite_image_id": str(image.id), "width": 10}]
+        url = reverse("satellite_images:satellite_images-list")
+
+        response = self.client.get(
+            url, {"fields": "width,GPSInfo.GPSLatitude,GPSInfo,Make"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["processing_data"],
+            {"satellite_image_id": str(image.id), "width": 10},
+        )
+        find.assert_called_once_with(
+            {"satellite_image_id": {"$in": [str(image.id)]}},
+            {
+                "_id": False,
+                "satellite_image_id": True,
+                "GPSInfo": True,
+                "Make": True,
+                "width": True,
+            },
+        )
+
+    @parameterized.expand(
+        [
+            "$where",
+            "width,",
+            "GPSInfo..GPSLatitude",
+            "width,_id",
+            "satellite_image_id.x",
+        ]
+    )
+    @mock.patch("satellite_images.views.get_details_collection")
+    def test_menu_list_invalid_fields(self, fields, mock_collection):
+        SatelliteImageFactory(uploader=self.user)
+        url = reverse("satellite_images:satellite_images-list")
+
+        response = self.client.get(url, {"fields": fields})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_collection.return_value.find.assert_not_called()
+
+    @mock.patch("satellite_images.views.SatelliteImageViewSet._get_details")
+    def test_menu_list_unchanged_page_is_not_modified(self, mock_get_details):
+        mock_get_details.return_value = {}
+        SatelliteImageFactory(uploader=self.user)
+        url = reverse("satellite_images:satellite_images-list")
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(2):
+            # session and user only
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        mock_get_details.assert_called_once()
+
+    @mock.patch("satellite_images.views.SatelliteImageViewSet._get_details")
+    def test_menu_list_page_is_served_from_cache(self, mock_get_details):
+        mock_get_details.return_value = {}
+        image = SatelliteImageFactory(uploader=self.user)
+        url = reverse("satellite_images:satellite_images-list")
+        response = self.client.get(url)
+
+        with self.assertNumQueries(2):
+            cached_response = self.client.get(url)
+
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cached_response["ETag"], response["ETag"])
+        mock_get_details.assert_called_once()
+
+        set_satellite_image_status(StatusEnum.COMPLETED.value, str(image.id))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], cached_response["ETag"])
+        self.assertEqual(response.data["results"][0]["status"], "COMPLETED")
+        self.assertEqual(mock_get_details.call_count, 2)
+
+    @mock.patch("satellite_images.views.SatelliteImageViewSet._get_details")
+    def test_menu_list_pages_are_cached_separately(self, mock_get_details):
+        mock_get_details.return_value = {}
+        SatelliteImageFactory(uploader=self.user)
+        url = reverse("satellite_images:satellite_images-list")
+
+        first = self.client.get(url, {"page_size": 1})
+        second = self.client.get(url, {"page_size": 2})
+
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(mock_get_details.call_count, 2)
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    @mock.patch("satellite_images.views.SatelliteImageViewSet._get_details")
+    def test_menu_list_serves_processing_summary(self, mock_get_details):
+        summarized = SatelliteImageFactory(
+            uploader=self.user, processing_summary={"width": 4, "format": "PNG"}
+        )
+        image = SatelliteImageFactory(uploader=self.user)
+        mock_get_details.return_value = {
+            str(image.id): {"width": 2, "satellite_image_id": str(image.id)}
+        }
+        url = reverse("satellite_images:satellite_images-list")
+
+        response = self.client.get(url)
+
+        self.assertEqual(
+            [item["processing_data"] for item in response.data["results"]],
+            [
+                {"width": 4, "format": "PNG", "satellite_image_id": str(summarized.id)},
+                {"width": 2, "satellite_image_id": str(image.id)},
+            ],
+        )
+        mock_get_details.assert_called_once_with([str(image.id)])
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    @mock.patch("satellite_images.views.get_details_collection")
+    def test_menu_list_fields_skip_processing_summary(self, mock_collection):
+        image = SatelliteImageFactory(
+            uploader=self.user, processing_summary={"width": 4}
+        )
+        mock_collection.return_value.find.return_value = [
+            {"Make": "samsung", "satellite_image_id": str(image.id)}
+        ]
+        url = reverse("satellite_images:satellite_images-list")
+
+        response = self.client.get(url, {"fields": "Make"})
+
+        self.assertEqual(
+            response.data["results"][0]["processing_data"],
+            {"Make": "samsung", "satellite_image_id": str(image.id)},
+        )
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    @mock.patch("satellite_images.views.SatelliteImageViewSet._get_details")
+    def test_retrieve_returns_whole_details(self, mock_get_details):
+        image = SatelliteImageFactory(
+            uploader=self.user, processing_summary={"width": 4}
+        )
+        mock_get_details.return_value = {
+            str(image.id): {
+                "width": 4,
+                "Make": "samsung",
+                "satellite_image_id": str(image.id),
+            }
+        }
+        url = reverse("satellite_images:satellite_images-detail", args=[image.id])
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["processing_data"],
+            {"width": 4, "Make": "samsung", "satellite_image_id": str(image.id)},
+        )
+        mock_get_details.assert_called_once_with([str(image.id)])
+
     def test_menu_list_unauthenticated(self):
         self.client.logout()
         url = reverse("satellite_images:satellite_images-list")
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestSatelliteImageViewSetGeoFilters(APITestCase):
+    def setUp(self):
+        list_cache.cache.clear()
+        self.user = UserFactory()
+        self.client.force_login(self.user)
+        self.url = reverse("satellite_images:satellite_images-list")
+        self.inside = SatelliteImageFactory(uploader=self.user)
+        self.outside = SatelliteImageFactory(uploader=self.user)
+        details_patcher = mock.patch(
+            "satellite_images.views.SatelliteImageViewSet._get_details",
+            return_value={},
+        )
+        details_patcher.start()
+        self.addCleanup(details_patcher.stop)
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_bbox_filters_by_ids_matched_in_mongo(self, mock_collection):
+        find = mock_collection.return_value.find
+        find.return_value.limit.return_value = [
+            {"satellite_image_id": str(self.inside.id)}
+        ]
+
+        response = self.client.get(self.url, {"bbox": "19,49,21,51"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(self.inside.id)]
+        )
+        find.assert_called_once_with(
+            {
+                "location": {
+                    "$geoIntersects": {
+                        "$geometry": {
+                            "type": "Polygon",
+                            "coordinates": [
+                                [
+                                    [19.0, 49.0],
+                                    [21.0, 49.0],
+                                    [21.0, 51.0],
+                                    [19.0, 51.0],
+                                    [19.0, 49.0],
+                                ]
+                            ],
+                        }
+                    }
+                }
+            },
+            {"satellite_image_id": True, "_id": False},
+        )
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_near_filters_by_ids_matched_in_mongo(self, mock_collection):
+        find = mock_collection.return_value.find
+        find.return_value.limit.return_value = [
+            {"satellite_image_id": str(self.inside.id)}
+        ]
+
+        response = self.client.get(self.url, {"near": "20,50", "max_distance": 500})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(self.inside.id)]
+        )
+        query = find.call_args.args[0]
+        self.assertEqual(
+            query["location"]["$nearSphere"],
+            {
+                "$geometry": {"type": "Point", "coordinates": [20.0, 50.0]},
+                "$maxDistance": 500.0,
+            },
+        )
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_metadata_filters_are_one_mongo_query(self, mock_collection):
+        find = mock_collection.return_value.find
+        find.return_value.limit.return_value = [
+            {"satellite_image_id": str(self.inside.id)}
+        ]
+
+        response = self.client.get(
+            self.url,
+            {
+                "make": "samsung",
+                "model": "SM-G930F",
+                "image_format": "JPEG",
+                "min_width": 100,
+                "max_width": 1000,
+                "min_height": 50,
+            },
+        )
+
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(self.inside.id)]
+        )
+        find.assert_called_once_with(
+            {
+                "Make": "samsung",
+                "Model": "SM-G930F",
+                "format": "JPEG",
+                "width": {"$gte": 100, "$lte": 1000},
+                "height": {"$gte": 50},
+            },
+            {"satellite_image_id": True, "_id": False},
+        )
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_metadata_and_geo_filters_are_combined(self, mock_collection):
+        find = mock_collection.return_value.find
+        find.return_value.limit.return_value = []
+
+        response = self.client.get(self.url, {"near": "20,50", "make": "samsung"})
+
+        self.assertEqual(response.data["results"], [])
+        query = find.call_args.args[0]
+        self.assertEqual(set(query), {"location", "Make"})
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_filters_matching_too_many_images_are_paginated(self, mock_collection):
+        matching = SatelliteImageFactory(uploader=self.user)
+        matching_ids = {str(self.inside.id), str(matching.id)}
+
+        def find(query, projection):
+            result = mock.MagicMock()
+            result.limit.return_value = [
+                {"satellite_image_id": satellite_image_id}
+                for satellite_image_id in matching_ids
+            ]
+            # chunk of rows checked in mongo
+            chunk_ids = query.get("satellite_image_id", {}).get("$in", [])
+            result.__iter__.return_value = iter(
+                {"satellite_image_id": satellite_image_id}
+                for satellite_image_id in chunk_ids
+                if satellite_image_id in matching_ids
+            )
+            return result
+
+        mock_collection.return_value.find.side_effect = find
+
+        with (
+            mock.patch.object(SatelliteImageDetailsFilter, "max_matches", 1),
+            mock.patch.object(DetailsMatchingQuerySet, "chunk_size", 1),
+        ):
+            first_page = self.client.get(
+                self.url, {"bbox": "19,49,21,51", "page_size": 1}
+            )
+            second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in first_page.data["results"]], [str(self.inside.id)]
+        )
+        self.assertEqual(
+            [item["id"] for item in second_page.data["results"]], [str(matching.id)]
+        )
+        self.assertIsNone(second_page.data["next"])
+
+    @parameterized.expand(
+        [
+            ({"min_width": "wide"},),
+            ({"bbox": "1,2,3"},),
+            ({"bbox": "a,b,c,d"},),
+            ({"bbox": "21,49,19,51"},),
+            ({"bbox": "-100,0,100,10"},),
+            ({"near": "200,50"},),
+            ({"near": "20,50", "max_distance": "-1"},),
+            ({"near": "20,50", "bbox": "19,49,21,51"},),
+        ]
+    )
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_invalid_geo_filters(self, params, mock_collection):
+        response = self.client.get(self.url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_collection.assert_not_called()
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    def test_no_geo_filters_skip_mongo_query(self, mock_collection):
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data["results"]), 2)
+        mock_collection.assert_not_called()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CACHES=LOCMEM_CACHES)
+@mock.patch("satellite_images.services.group")
+class TestSatelliteImageBatchViewSet(APITestCase):
+    def setUp(self):
+        fair_share_scheduler.cache.clear()
+        self.user = UserFactory()
+        self.client.force_login(self.user)
+        self.url = reverse("satellite_images:satellite_image_batches-list")
+
+    def _image_file(self, name):
+        with open(os.path.join(FIXTURES_DIR, "img.png"), "rb") as image:
+            return SimpleUploadedFile(name, image.read())
+
+    def test_create_batch_from_multipart_images(self, mock_group):
+        os.makedirs(default_storage.path("images"), exist_ok=True)
+        stored_files_count = len(os.listdir(default_storage.path("images")))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {"images": [self._image_file("a.png"), self._image_file("b.png")]},
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        batch = SatelliteImageBatch.objects.get(id=response.data["id"])
+        self.assertEqual(
+            sorted(batch.images.values_list("title", flat=True)), ["a.png", "b.png"]
+        )
+        # files streamed during upload are not copied again
+        self.assertEqual(
+            len(os.listdir(default_storage.path("images"))), stored_files_count + 2
+        )
+        self.assertEqual(response.data["progress"]["total"], 2)
+        self.assertEqual(response.data["progress"][StatusEnum.PENDING.value], 2)
+        self.assertEqual(len(list(mock_group.call_args.args[0])), 2)
+        mock_group.return_value.apply_async.assert_called_once()
+
+    def test_create_batch_from_geotiff(self, mock_group):
+        content = io.BytesIO()
+        Image.new("I;16", (4, 4)).save(content, "TIFF")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {"images": [SimpleUploadedFile("a.tif", content.getvalue())]},
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["progress"]["total"], 1)
+
+    def test_create_batch_from_zip_archive(self, mock_group):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("pass/a.png", self._image_file("a.png").read())
+            zip_file.writestr("pass/notes.txt", "not an image")
+        archive.name = "pass.zip"
+        archive.seek(0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, {"archive": archive}, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        batch = SatelliteImageBatch.objects.get(id=response.data["id"])
+        image = batch.images.get()
+        self.assertEqual(image.title, "a.png")
+        self.assertEqual(
+            image.content_hash,
+            hashlib.sha256(self._image_file("a.png").read()).hexdigest(),
+        )
+
+    @override_settings(SATELLITE_IMAGES_FAIR_SHARE_BURST=1)
+    def test_create_batch_with_priority_over_fair_share(self, mock_group):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {
+                    "images": [self._image_file("a.png"), self._image_file("b.png")],
+                    "priority": PriorityEnum.HIGH.value,
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        batch = SatelliteImageBatch.objects.get(id=response.data["id"])
+        self.assertEqual(
+            set(batch.images.values_list("priority", flat=True)),
+            {PriorityEnum.HIGH.value},
+        )
+        signatures = list(mock_group.call_args.args[0])
+        self.assertEqual(
+            [signature.tasks[0].options["priority"] for signature in signatures],
+            [
+                PriorityEnum.HIGH.value,
+                PriorityEnum.HIGH.value - PriorityEnum.NORMAL.value,
+            ],
+        )
+
+    def test_create_batch_requires_files(self, mock_group):
+        response = self.client.post(self.url, {}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_group.assert_not_called()
+
+    def _stored_images(self):
+        os.makedirs(default_storage.path("images"), exist_ok=True)
+        return set(os.listdir(default_storage.path("images")))
+
+    def test_rejected_batch_uploads_are_removed(self, mock_group):
+        stored_files = self._stored_images()
+        not_png = SimpleUploadedFile("b.png", b"not an image")
+
+        response = self.client.post(
+            self.url,
+            {"images": [self._image_file("a.png"), not_png]},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._stored_images(), stored_files)
+
+    def test_uploads_of_unknown_fields_are_removed(self, mock_group):
+        stored_files = self._stored_images()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {
+                    "images": [self._image_file("a.png")],
+                    "other": self._image_file("b.png"),
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self._stored_images() - stored_files), 1)
+
+    def test_anonymous_uploads_are_not_stored(self, mock_group):
+        self.client.logout()
+        stored_files = self._stored_images()
+
+        response = self.client.post(
+            self.url, {"images": [self._image_file("a.png")]}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self._stored_images(), stored_files)
+
+    def _zip_archive(self, names):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            for name in names:
+                zip_file.writestr(name, self._image_file(name).read())
+        archive.name = "images.zip"
+        archive.seek(0)
+        return archive
+
+    @override_settings(SATELLITE_IMAGES_BATCH_MAX_IMAGES=2)
+    def test_create_batch_with_too_many_images(self, mock_group):
+        response = self.client.post(
+            self.url,
+            {
+                "images": [self._image_file("a.png")],
+                "archive": self._zip_archive(["b.png", "c.png"]),
+            },
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SatelliteImageBatch.objects.exists())
+        mock_group.assert_not_called()
+
+    @override_settings(SATELLITE_IMAGES_ARCHIVE_MAX_SIZE=100)
+    def test_create_batch_with_too_big_archive(self, mock_group):
+        response = self.client.post(
+            self.url, {"archive": self._zip_archive(["a.png"])}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("archive", response.data)
+        mock_group.assert_not_called()
+
+    @mock.patch("satellite_images.services.SatelliteImage.objects.bulk_create")
+    def test_stored_files_are_removed_when_batch_fails(
+        self, mock_bulk_create, mock_group
+    ):
+        mock_bulk_create.side_effect = DatabaseError("down")
+        os.makedirs(default_storage.path("images"), exist_ok=True)
+        stored_files = set(os.listdir(default_storage.path("images")))
+
+        with self.assertRaises(DatabaseError):
+            self.client.post(
+                self.url,
+                {
+                    "images": [self._image_file("a.png")],
+                    "archive": self._zip_archive(["b.png"]),
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(set(os.listdir(default_storage.path("images"))), stored_files)
+        mock_group.assert_not_called()
+
+    def test_retrieve_batch_progress(self, mock_group):
+        batch = SatelliteImageBatch.objects.create(uploader=self.user)
+        SatelliteImageFactory(batch=batch, status=StatusEnum.COMPLETED.value)
+        SatelliteImageFactory(batch=batch, status=StatusEnum.FAILED.value)
+        SatelliteImageFactory(batch=batch)
+        SatelliteImageFactory(batch=batch)
+        url = reverse(
+            "satellite_images:satellite_image_batches-detail", args=[batch.id]
+        )
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["progress"],
+            {
+                StatusEnum.PENDING.value: 2,
+                StatusEnum.PROCESSING.value: 0,
+                StatusEnum.COMPLETED.value: 1,
+                StatusEnum.FAILED.value: 1,
+                "total": 4,
+                "done_percent": 50.0,
+            },
+        )
+
+    def test_retrieve_other_users_batch(self, mock_group):
+        batch = SatelliteImageBatch.objects.create(uploader=UserFactory())
+        url = reverse(
+            "satellite_images:satellite_image_batches-detail", args=[batch.id]
+        )
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestSatelliteImageEventsView(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse("satellite_images:satellite_image_events")
+
+    async def _get_stream(self, params=None):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return response.streaming_content
+
+    async def test_current_statuses_and_changes_are_pushed(self):
+        image = await sync_to_async(SatelliteImageFactory)(uploader=self.user)
+        await sync_to_async(SatelliteImageFactory)(
+            uploader=self.user, status=StatusEnum.COMPLETED.value
+        )
+        await sync_to_async(SatelliteImageFactory)()
+        stream = await self._get_stream()
+
+        self.assertEqual(
+            await anext(stream),
+            format_event("status", {"id": str(image.id), "status": "PENDING"}).encode(),
+        )
+
+        await sync_to_async(set_satellite_image_status)(
+            StatusEnum.COMPLETED.value, str(image.id)
+        )
+
+        self.assertEqual(
+            await anext(stream),
+            format_event(
+                "status", {"id": str(image.id), "status": "COMPLETED"}
+            ).encode(),
+        )
+        # every image reached final status
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+    async def test_images_of_batch_are_streamed(self):
+        batch = await SatelliteImageBatch.objects.acreate(uploader=self.user)
+        image = await sync_to_async(SatelliteImageFactory)(
+            uploader=self.user, batch=batch, status=StatusEnum.FAILED.value
+        )
+        await sync_to_async(SatelliteImageFactory)(uploader=self.user)
+        stream = await self._get_stream({"batch": str(batch.id)})
+
+        events = [event async for event in stream]
+
+        self.assertEqual(
+            events,
+            [
+                format_event(
+                    "status", {"id": str(image.id), "status": "FAILED"}
+                ).encode()
+            ],
+        )
+
+    @mock.patch.object(SatelliteImageEventsView, "keepalive_interval", 0.01)
+    async def test_keepalive_is_sent_while_idle(self):
+        await sync_to_async(SatelliteImageFactory)(uploader=self.user)
+        stream = await self._get_stream()
+        await anext(stream)
+
+        self.assertEqual(await anext(stream), b": keepalive\n\n")
+        await stream.aclose()
+
+    @parameterized.expand(
+        [
+            ("not-uuid", status.HTTP_400_BAD_REQUEST),
+            ("00000000-0000-0000-0000-000000000000", status.HTTP_404_NOT_FOUND),
+        ]
+    )
+    async def test_invalid_batch(self, batch_id, expected_status):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(self.url, {"batch": batch_id})
+
+        self.assertEqual(response.status_code, expected_status)
+
+    async def test_unauthenticated(self):
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestSatelliteImageAsyncListView(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse("satellite_images:satellite_images_async")
+
+    @mock.patch("satellite_images.views.aget_details")
+    async def test_page_rows_and_details_are_joined(self, mock_aget_details):
+        images = [
+            await sync_to_async(SatelliteImageFactory)(
+                uploader=self.user, pyramid={"256": f"pyramids/{i}/256.jpg"}
+            )
+            for i in range(3)
+        ]
+        mock_aget_details.return_value = {
+            str(images[1].id): {"width": 10, "satellite_image_id": str(images[1].id)}
+        }
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(
+            self.url, {"page_size": 2, "fields": "width"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(
+            [item["id"] for item in data["results"]],
+            [str(images[0].id), str(images[1].id)],
+        )
+        self.assertIsNone(data["results"][0]["processing_data"])
+        self.assertEqual(
+            data["results"][1]["processing_data"],
+            {"width": 10, "satellite_image_id": str(images[1].id)},
+        )
+        self.assertEqual(
+            data["results"][0]["previews"],
+            {"256": "http://testserver/media/pyramids/0/256.jpg"},
+        )
+        mock_aget_details.assert_awaited_once_with(
+            [str(images[0].id), str(images[1].id)],
+            {"_id": False, "satellite_image_id": True, "width": True},
+        )
+
+        response = await self.async_client.get(data["next"])
+
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]], [str(images[2].id)]
+        )
+        # next link keeps requested fields
+        mock_aget_details.assert_awaited_with(
+            [str(images[2].id)],
+            {"_id": False, "satellite_image_id": True, "width": True},
+        )
+
+    @override_settings(SATELLITE_IMAGES_PROCESSING_SUMMARY=True)
+    @mock.patch("satellite_images.views.aget_details")
+    async def test_processing_summary_is_served(self, mock_aget_details):
+        summarized = await sync_to_async(SatelliteImageFactory)(
+            uploader=self.user, processing_summary={"width": 4}
+        )
+        image = await sync_to_async(SatelliteImageFactory)(uploader=self.user)
+        mock_aget_details.return_value = {}
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(
+            [item["processing_data"] for item in response.json()["results"]],
+            [{"width": 4, "satellite_image_id": str(summarized.id)}, None],
+        )
+        mock_aget_details.assert_awaited_once_with([str(image.id)], None)
+
+    @mock.patch("satellite_images.filters.get_details_collection")
+    @mock.patch("satellite_images.views.aget_details")
+    async def test_details_filters(self, mock_aget_details, mock_collection):
+        image = await sync_to_async(SatelliteImageFactory)(uploader=self.user)
+        await sync_to_async(SatelliteImageFactory)(uploader=self.user)
+        mock_collection.return_value.find.return_value.limit.return_value = [
+            {"satellite_image_id": str(image.id)}
+        ]
+        mock_aget_details.return_value = {}
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(self.url, {"make": "samsung"})
+
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]], [str(image.id)]
+        )
+
+    @parameterized.expand(
+        [
+            ({"fields": "$where"}, status.HTTP_400_BAD_REQUEST),
+            ({"bbox": "1,2"}, status.HTTP_400_BAD_REQUEST),
+            ({"cursor": "invalid"}, status.HTTP_404_NOT_FOUND),
+        ]
+    )
+    @mock.patch("satellite_images.views.aget_details")
+    async def test_invalid_params(self, params, expected_status, mock_aget_details):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(self.url, params)
+
+        self.assertEqual(response.status_code, expected_status)
+        mock_aget_details.assert_not_called()
+
+    async def test_unauthenticated(self):
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
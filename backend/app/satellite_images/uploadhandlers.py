@@ -0,0 +1,176 @@
+import hashlib
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from .archives import is_allowed_image_name
+from .models import SatelliteImage
+
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"\xff\xd8\xff": "JPEG",
+    # little and big endian TIFF, GeoTIFF included
+    b"II*\x00": "TIFF",
+    b"MM\x00*": "TIFF",
+}
+SNIFF_SIZE = max(len(signature) for signature in IMAGE_SIGNATURES)
+EXTENSION_FORMATS = {
+    "jpg": "JPEG",
+    "jpeg": "JPEG",
+    "png": "PNG",
+    "tif": "TIFF",
+    "tiff": "TIFF",
+}
+
+
+def sniff_image_format(header):
+    for signature, image_format in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    File already written to its final location in storage.
+    Assign `stored_name` to FileField to avoid copying the file again.
+    """
+
+    def __init__(
+        self,
+        stored_name,
+        name,
+        content_type,
+        size,
+        charset,
+        checksum,
+        sniffed_format,
+        content_type_extra=None,
+    ):
+        file = default_storage.open(stored_name, "rb")
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.stored_name = stored_name
+        self.checksum = checksum
+        self.sniffed_format = sniffed_format
+
+    def temporary_file_path(self):
+        # lets form validation read the file from disk instead of memory
+        return default_storage.path(self.stored_name)
+
+
+def validate_image_format(file):
+    """
+    Reject files which content is not an image of format of their extension.
+    """
+    if isinstance(file, StoredUploadedFile):
+        image_format = file.sniffed_format
+    else:
+        file.seek(0)
+        image_format = sniff_image_format(file.read(SNIFF_SIZE))
+        file.seek(0)
+    extension = os.path.splitext(file.name)[1].lstrip(".").lower()
+    if image_format is None or EXTENSION_FORMATS.get(extension) != image_format:
+        raise ValidationError(f"File is not a {extension} image.")
+
+
+def get_stored_uploads(files):
+    """
+    Return files of request streamed to storage by StreamingImageUploadHandler.
+    """
+    return [
+        file
+        for _, field_files in files.lists()
+        for file in field_files
+        if isinstance(file, StoredUploadedFile)
+    ]
+
+
+def delete_stored_uploads(files, keep=()):
+    """
+    Delete files of request streamed to storage, except stored names in `keep`,
+    e.g. when form is rejected or files were sent in unknown fields.
+    """
+    for file in get_stored_uploads(files):
+        if file.stored_name not in keep:
+            file.close()
+            default_storage.delete(file.stored_name)
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """
+    Stream uploaded images chunk by chunk straight to their final location
+    in storage, computing sha256 checksum and sniffing format on the fly.
+    Other files, files of anonymous users, or storages without local paths
+    are left to next handlers.
+    Handler is installed only by upload views, which delete stored files
+    not assigned to images, see `delete_stored_uploads`.
+    """
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.destination = None
+        if (
+            not self.request.user.is_authenticated
+            or not is_allowed_image_name(file_name)
+            or not self._storage_has_path()
+        ):
+            return
+
+        field = SatelliteImage._meta.get_field("image")
+        name = field.generate_filename(None, file_name)
+        self.stored_name, self.destination = self._open_destination(name)
+        self.hasher = hashlib.sha256()
+        self.header = b""
+        raise StopFutureHandlers()
+
+    def _storage_has_path(self):
+        try:
+            default_storage.path("")
+        except NotImplementedError:
+            return False
+        return True
+
+    def _open_destination(self, name):
+        while True:
+            name = default_storage.get_available_name(name)
+            path = default_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                return name, open(path, "xb")
+            except FileExistsError:
+                # file was created since get_available_name, try another name
+                continue
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.destination is None:
+            return raw_data
+
+        if len(self.header) < SNIFF_SIZE:
+            self.header += raw_data[: SNIFF_SIZE - len(self.header)]
+        self.hasher.update(raw_data)
+        self.destination.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.destination is None:
+            return None
+
+        self.destination.close()
+        return StoredUploadedFile(
+            stored_name=self.stored_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            checksum=self.hasher.hexdigest(),
+            sniffed_format=sniff_image_format(self.header),
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if getattr(self, "destination", None) is not None:
+            self.destination.close()
+            default_storage.delete(self.stored_name)
@@ -1,12 +1,30 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import SatelliteImageViewSet
+from .views import (
+    SatelliteImageAsyncListView,
+    SatelliteImageBatchViewSet,
+    SatelliteImageEventsView,
+    SatelliteImageViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"satellite_images", SatelliteImageViewSet, "satellite_images")
+router.register(
+    r"satellite_image_batches", SatelliteImageBatchViewSet, "satellite_image_batches"
+)
 
 app_name = "satellite_images"
 urlpatterns = [
+    path(
+        "satellite_images/async/",
+        SatelliteImageAsyncListView.as_view(),
+        name="satellite_images_async",
+    ),
+    path(
+        "satellite_images/events/",
+        SatelliteImageEventsView.as_view(),
+        name="satellite_image_events",
+    ),
     path("", include(router.urls)),
 ]
@@ -1,46 +1,347 @@
-from commons.mongo import get_mongo_db_client
-from rest_framework import mixins, viewsets
+import asyncio
+import itertools
+import uuid
+
+from asgiref.sync import sync_to_async
+from commons.pubsub import get_pubsub
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views import View
+from rest_framework import mixins, status, viewsets
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .archives import iter_archive_images
+from .caches import list_cache
+from .events import format_event, get_status_channel
+from .filters import SatelliteImageDetailsFilter, get_details_projection
+from .models import SatelliteImage, SatelliteImageBatch
+from .mongo import aget_details, get_details_collection
+from .pagination import SatelliteImageCursorPagination
+from .serializers import (
+    SatelliteImageBatchCreateSerializer,
+    SatelliteImageBatchSerializer,
+    SatelliteImageSerializer,
+)
+from .services import SatelliteImageBatchService
+from .uploadhandlers import StreamingImageUploadHandler, delete_stored_uploads
+
 
-from .models import SatelliteImage
-from .serializers import SatelliteImageSerializer
+def get_ids_without_summary(satellite_images, params):
+    """
+    Return ids of SatelliteImages which details must be fetched from mongo.
+    Images with processing summary are served from it when summaries
+    are enabled, unless other keys are requested with `?fields=`.
+    """
+    use_summary = settings.SATELLITE_IMAGES_PROCESSING_SUMMARY and not params.get(
+        "fields"
+    )
+    return [
+        str(satellite_image.id)
+        for satellite_image in satellite_images
+        if not (use_summary and satellite_image.processing_summary is not None)
+    ]
 
 
 class SatelliteImageViewSet(
     mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
 ):
+    """
+    List of SatelliteImages with their processing data, detail
+    of a SatelliteImage always has whole mongo details.
+    """
+
     permission_classes = [IsAuthenticated]
     queryset = SatelliteImage.objects.all()
     serializer_class = SatelliteImageSerializer
+    pagination_class = SatelliteImageCursorPagination
+    filter_backends = [SatelliteImageDetailsFilter]
+    details = None
 
     def _get_details(self, list_of_ids):
         """
         Get data related with PG SatelliteImage from mongoDB.
-        Map each detail to PG id.
+        Map each detail to PG id. Only keys requested with `?fields=` are fetched.
         """
-        client = get_mongo_db_client()
-        dbname = client[SatelliteImage.MONGO_DB_NAME]
-        satellite_images = dbname[SatelliteImage.MONGO_COLLECTION_NAME]
+        satellite_images = get_details_collection()
+        projection = get_details_projection(self.request.query_params)
 
+        # index seek on unique satellite_image_id index
         all_details = satellite_images.find(
-            {"satellite_image_id": {"$in": list_of_ids}}, {"_id": False}
+            {"satellite_image_id": {"$in": list_of_ids}},
+            projection or {"_id": False},
         )
         details = {
             i["satellite_image_id"]: i
             for i in all_details
             if i.get("satellite_image_id")
         }
-        client.close()
         return details
 
+    def paginate_queryset(self, queryset):
+        """
+        Fetch mongo details only for SatelliteImages on current page.
+        """
+        page = super().paginate_queryset(queryset)
+        list_of_ids = get_ids_without_summary(page, self.request.query_params)
+        self.details = self._get_details(list_of_ids) if list_of_ids else {}
+        return page
+
+    def retrieve(self, request, *args, **kwargs):
+        satellite_image = self.get_object()
+        self.details = self._get_details([str(satellite_image.id)])
+        serializer = self.get_serializer(satellite_image)
+        return Response(serializer.data)
+
     def get_serializer_context(self):
         """
         Put mongo details in context to avoid querying the db each item.
         """
-        queryset = self.get_queryset()
-        list_of_ids = [str(id) for id in queryset.values_list("id", flat=True)]
         context = super().get_serializer_context()
-        details = self._get_details(list_of_ids)
+        return {**context, "details": self.details or {}}
+
+    def list(self, request, *args, **kwargs):
+        """
+        Serve pages from cache until images change, page which client
+        already has is answered with 304 without querying databases.
+        """
+        version = list_cache.get_version()
+        etag = list_cache.get_etag(version, request)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = list_cache.get(version, request)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            list_cache.set(version, request, data)
+        return Response(data, headers=headers)
 
-        return {**context, "details": details}
+
+class SatelliteImageAsyncListView(View):
+    """
+    Async variant of SatelliteImage list, served by ASGI server, with the same
+    pagination, filters and `?fields=` projection.
+    Ids of the page are found by keyset query covered by (created_at, id)
+    index, then rows of the page are loaded from PG while their details
+    are fetched from mongo with motor, so the two run concurrently.
+    """
+
+    pagination_class = SatelliteImageCursorPagination
+    filter_backends = [SatelliteImageDetailsFilter]
+
+    def _get_page_ids(self, request):
+        queryset = SatelliteImage.objects.all()
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        fields = ["id", "created_at"]
+        if settings.SATELLITE_IMAGES_PROCESSING_SUMMARY:
+            fields.append("processing_summary")
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset.only(*fields), request, view=self)
+        return (
+            [satellite_image.id for satellite_image in page],
+            get_ids_without_summary(page, request.query_params),
+            paginator,
+        )
+
+    async def _get_satellite_images(self, satellite_image_ids):
+        satellite_images = {
+            satellite_image.id: satellite_image
+            async for satellite_image in SatelliteImage.objects.filter(
+                id__in=satellite_image_ids
+            )
+        }
+        return [
+            satellite_images[satellite_image_id]
+            for satellite_image_id in satellite_image_ids
+            if satellite_image_id in satellite_images
+        ]
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        request = Request(request)
+        try:
+            projection = get_details_projection(request.query_params)
+            (
+                satellite_image_ids,
+                ids_without_summary,
+                paginator,
+            ) = await sync_to_async(self._get_page_ids)(request)
+        except APIException as exc:
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {"detail": detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+
+        satellite_images, details = await asyncio.gather(
+            self._get_satellite_images(satellite_image_ids),
+            aget_details(ids_without_summary, projection),
+        )
+        serializer = SatelliteImageSerializer(
+            satellite_images,
+            many=True,
+            context={"request": request, "details": details},
+        )
+        return JsonResponse(
+            {
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": serializer.data,
+            }
+        )
+
+
+class SatelliteImageBatchViewSet(
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Upload many SatelliteImages at once, as multipart files or zip/tar archive.
+    Progress of batch processing can be polled with its id.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    serializer_class = SatelliteImageBatchSerializer
+
+    def get_queryset(self):
+        return SatelliteImageBatch.objects.filter(uploader=self.request.user)
+
+    def initial(self, request, *args, **kwargs):
+        if self.action == "create":
+            # installed before authentication, session authentication reads
+            # the body for its CSRF check, handler skips anonymous users
+            request.upload_handlers.insert(
+                0, StreamingImageUploadHandler(request._request)
+            )
+        super().initial(request, *args, **kwargs)
+
+    def create(self, request):
+        serializer = SatelliteImageBatchCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            delete_stored_uploads(request.FILES)
+            raise ValidationError(serializer.errors)
+
+        images = serializer.validated_data.get("images") or []
+        # images streamed in other fields are not used
+        delete_stored_uploads(
+            request.FILES,
+            keep={getattr(image, "stored_name", None) for image in images},
+        )
+        files = ((image.name, image) for image in images)
+        archive = serializer.validated_data.get("archive")
+        if archive:
+            files = itertools.chain(files, iter_archive_images(archive))
+
+        batch = SatelliteImageBatchService(
+            request.user, files, serializer.validated_data["priority"]
+        ).handle_service()
+        return Response(self.get_serializer(batch).data, status=status.HTTP_201_CREATED)
+
+
+class SatelliteImageEventsView(View):
+    """
+    Stream status changes of user's SatelliteImages as Server-Sent Events,
+    pushed by pipeline tasks, instead of polling the list.
+    `?batch=<id>` streams images of a batch, otherwise not yet processed
+    images of the user. Current statuses are sent first, stream ends
+    once every image reached its final status.
+    Served by ASGI server, each stream only holds a subscription.
+    """
+
+    keepalive_interval = 15
+
+    async def _get_satellite_image_ids(self, user, batch_id):
+        satellite_images = SatelliteImage.objects.filter(uploader=user)
+        if batch_id:
+            satellite_images = satellite_images.filter(batch_id=batch_id)
+        else:
+            satellite_images = satellite_images.filter(
+                status__in=SatelliteImage.ACTIVE_STATUSES
+            )
+        return [
+            str(satellite_image_id)
+            async for satellite_image_id in satellite_images.values_list(
+                "id", flat=True
+            )
+        ]
+
+    async def _stream(self, satellite_image_ids):
+        subscription = get_pubsub().subscribe(
+            [
+                get_status_channel(satellite_image_id)
+                for satellite_image_id in satellite_image_ids
+            ]
+        )
+        try:
+            pending = set(satellite_image_ids)
+            # statuses are read after subscribing, so no change is missed
+            async for (
+                satellite_image_id,
+                current_status,
+            ) in SatelliteImage.objects.filter(id__in=satellite_image_ids).values_list(
+                "id", "status"
+            ):
+                yield format_event(
+                    "status", {"id": str(satellite_image_id), "status": current_status}
+                )
+                if current_status in SatelliteImage.FINAL_STATUSES:
+                    pending.discard(str(satellite_image_id))
+
+            while pending:
+                message = await subscription.get(self.keepalive_interval)
+                if message is None:
+                    # comment line keeps proxies from closing idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event("status", message)
+                if message["status"] in SatelliteImage.FINAL_STATUSES:
+                    pending.discard(message["id"])
+        finally:
+            subscription.close()
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        batch_id = request.GET.get("batch")
+        if batch_id:
+            try:
+                uuid.UUID(batch_id)
+            except ValueError:
+                return JsonResponse(
+                    {"batch": "Invalid batch id."}, status=status.HTTP_400_BAD_REQUEST
+                )
+            if not await SatelliteImageBatch.objects.filter(
+                id=batch_id, uploader=user
+            ).aexists():
+                return JsonResponse(
+                    {"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND
+                )
+
+        satellite_image_ids = await self._get_satellite_image_ids(user, batch_id)
+        response = StreamingHttpResponse(
+            self._stream(satellite_image_ids), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # disable response buffering of nginx
+        response["X-Accel-Buffering"] = "no"
+        return response